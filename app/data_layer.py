@@ -0,0 +1,178 @@
+# app/data_layer.py
+"""
+Data access for the Streamlit app.
+
+The ranked candidates CSV is converted once to an Arrow IPC file next to it
+(<csv stem>.arrow: rows sorted by final_score, drug/disease dictionary-encoded)
+and then memory-mapped, so reruns never re-parse the CSV. The Arrow file
+records the (mtime, size) of the CSV it was built from and is rebuilt when the
+aggregator writes new results.
+
+CandidateTable keeps drug and disease posting lists (row positions per name,
+CSR layout). Because rows are sorted by score, every posting list is already
+in rank order, so lookups never scan the table.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+try:
+    import streamlit as st
+except ImportError:
+    st = None
+
+SOURCE_KEY = b"source_signature"
+KEY_COLUMNS = ("drug", "disease")
+
+
+def file_signature(path):
+    """Cheap change detector for a results file: "<mtime_ns>:<size>"."""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def arrow_cache_path(path):
+    return os.path.splitext(path)[0] + ".arrow"
+
+
+def _read_source(path):
+    if path.endswith(".parquet"):
+        return pq.read_table(path)
+    return pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+        column_types={"drug": pa.string(), "disease": pa.string(), "best_path": pa.string()}))
+
+
+def _prepare(table):
+    """Rows best first, drug / disease as dictionary columns."""
+    table = table.take(pc.sort_indices(table, sort_keys=[("final_score", "descending")]))
+    for name in KEY_COLUMNS:
+        i = table.schema.get_field_index(name)
+        table = table.set_column(i, name, pc.dictionary_encode(table[name]).combine_chunks())
+    return table
+
+
+def build_arrow_cache(path, cache_path=None):
+    """Sort by final_score, dictionary-encode the keys and write an uncompressed Arrow file."""
+    cache_path = cache_path or arrow_cache_path(path)
+    signature = file_signature(path)
+    table = _prepare(_read_source(path))
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_KEY: signature.encode()})
+    tmp = cache_path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, cache_path)
+    return cache_path
+
+
+def _open_mapped(cache_path):
+    with pa.memory_map(cache_path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def open_candidates(path):
+    """CandidateTable over the memory-mapped Arrow copy of path, (re)building it when stale."""
+    cache_path = arrow_cache_path(path)
+    signature = file_signature(path).encode()
+    table = None
+    if os.path.exists(cache_path):
+        table = _open_mapped(cache_path)
+        if (table.schema.metadata or {}).get(SOURCE_KEY) != signature:
+            table = None
+    if table is None:
+        try:
+            table = _open_mapped(build_arrow_cache(path, cache_path))
+        except OSError as e:
+            # read-only artifacts dir: keep the converted table in memory instead
+            print(f"[WARN] Could not write {cache_path}: {e}. Using an in-memory table.", file=sys.stderr)
+            table = _prepare(_read_source(path))
+    return CandidateTable(table)
+
+
+def _posting_lists(codes, n_keys):
+    """CSR posting lists: rows of key k are order[offsets[k]:offsets[k + 1]], ascending."""
+    order = np.argsort(codes, kind="stable")
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=n_keys), out=offsets[1:])
+    return order, offsets
+
+
+class CandidateTable:
+    """Score-sorted candidates with drug / disease posting lists."""
+
+    def __init__(self, table):
+        self.table = table
+        self.final_score = table["final_score"].to_numpy()
+        self._keys = {}
+        for name in KEY_COLUMNS:
+            col = table[name].combine_chunks() if table[name].num_chunks != 1 else table[name].chunk(0)
+            names = pd.Index(col.dictionary.to_pylist())
+            codes = col.indices.to_numpy(zero_copy_only=False).astype(np.int64, copy=False)
+            self._keys[name] = (names, codes, *_posting_lists(codes, len(names)))
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def drugs(self):
+        return self._keys["drug"][0]
+
+    @property
+    def diseases(self):
+        return self._keys["disease"][0]
+
+    def codes(self, key):
+        return self._keys[key][1]
+
+    def postings(self, key, name):
+        """Row positions (best first) of every candidate with this drug / disease."""
+        names, _, order, offsets = self._keys[key]
+        i = names.get_indexer([name])[0]
+        if i < 0:
+            return np.zeros(0, dtype=np.int64)
+        return order[offsets[i]:offsets[i + 1]]
+
+    def drug_rows(self, drug):
+        return self.postings("drug", drug)
+
+    def disease_rows(self, disease):
+        return self.postings("disease", disease)
+
+    def rows(self, idx):
+        """Materialize the given row positions as a frame (in the given order)."""
+        out = self.table.take(pa.array(np.asarray(idx, dtype=np.int64))).to_pandas()
+        for name in KEY_COLUMNS:
+            out[name] = out[name].astype(str)
+        return out
+
+    def lookup(self, drug, disease):
+        """Best row for a (drug, disease) pair as a Series, or None."""
+        d = self.drug_rows(drug)
+        x = self.disease_rows(disease)
+        # walk the shorter posting list and check the other key by code
+        small, key, name = (d, "disease", disease) if len(d) <= len(x) else (x, "drug", drug)
+        code = self._keys[key][0].get_indexer([name])[0]
+        if code < 0 or not len(small):
+            return None
+        hit = small[self.codes(key)[small] == code]
+        return None if not len(hit) else self.rows(hit[:1]).iloc[0]
+
+    def top(self, n, disease=None):
+        idx = self.disease_rows(disease) if disease is not None else np.arange(len(self))
+        return self.rows(idx[:n] if n else idx)
+
+
+if st is not None:
+    @st.cache_resource(max_entries=2)
+    def _cached_candidates(path, signature):
+        return open_candidates(path)
+
+    def cached_candidates(path):
+        """Process-wide CandidateTable for path; reloads when the file's signature changes."""
+        return _cached_candidates(path, file_signature(path))
@@ -0,0 +1,78 @@
+# app/query_backend.py
+"""
+Paged, filtered queries over a CandidateTable.
+
+Rows are sorted by final_score (descending), so a score range is a contiguous
+row range found by binary search. A drug or disease filter narrows that to the
+key's posting list, which is itself in rank order, so the range is again two
+binary searches into the list. A page is then a slice: every query costs
+O(log N + page size). With both a drug and a disease filter the shorter of the
+two posting lists is filtered by the other key's code.
+"""
+
+from collections import namedtuple
+from functools import cached_property
+
+import numpy as np
+
+Page = namedtuple("Page", ["rows", "total", "offset", "limit"])
+
+
+class CandidateQuery:
+    """Server-side filtering and pagination for the app's candidate table."""
+
+    def __init__(self, table):
+        self.table = table
+        # ascending copy of the scores so np.searchsorted can be used directly
+        self._neg_score = -np.asarray(table.final_score, dtype=float)
+
+    @cached_property
+    def score_bounds(self):
+        """(lowest, highest) final_score, or None without scores; NaNs sort last, so no scan is needed."""
+        n = int(np.searchsorted(self._neg_score, np.nan, side="left"))
+        if n == 0:
+            return None
+        return float(-self._neg_score[n - 1]), float(-self._neg_score[0])
+
+    @cached_property
+    def drug_names(self):
+        return sorted(self.table.drugs)
+
+    @cached_property
+    def disease_names(self):
+        return sorted(self.table.diseases)
+
+    def score_range(self, min_score=None, max_score=None):
+        """[lo, hi) row positions whose final_score lies in [min_score, max_score]."""
+        lo = 0 if max_score is None else int(np.searchsorted(self._neg_score, -max_score, side="left"))
+        hi = len(self._neg_score) if min_score is None else int(np.searchsorted(self._neg_score, -min_score, side="right"))
+        return lo, max(lo, hi)
+
+    def matching_rows(self, drug=None, disease=None, min_score=None, max_score=None):
+        """
+        Row positions (best first) matching the filters: a range object without
+        key filters, otherwise a slice of a posting list.
+        """
+        lo, hi = self.score_range(min_score, max_score)
+        if drug is None and disease is None:
+            return range(lo, hi)
+        if drug is not None and disease is not None:
+            d = self.table.drug_rows(drug)
+            x = self.table.disease_rows(disease)
+            if len(d) <= len(x):
+                rows, key, name = d, "disease", disease
+            else:
+                rows, key, name = x, "drug", drug
+            rows = rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+            code = (self.table.diseases if key == "disease" else self.table.drugs).get_indexer([name])[0]
+            return rows[self.table.codes(key)[rows] == code]
+        rows = self.table.drug_rows(drug) if drug is not None else self.table.disease_rows(disease)
+        return rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+
+    def page(self, offset=0, limit=20, drug=None, disease=None, min_score=None, max_score=None):
+        """One page of candidates plus the total number of matches."""
+        rows = self.matching_rows(drug, disease, min_score, max_score)
+        total = len(rows)
+        offset = max(0, min(offset, total))
+        sel = rows[offset:offset + limit]
+        return Page(self.table.rows(np.asarray(sel, dtype=np.int64)), total, offset, limit)
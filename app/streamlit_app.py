@@ -4,15 +4,54 @@ Streamlit UI for Laptop 3 — Neuro-Symbolic Drug Repurposing
 Updated: uses Graphviz for path visualization (reliable on macOS) instead of pyvis.
 """
 
+import math
 import os
+import sys
 import streamlit as st
-import pandas as pd
 import graphviz
-from typing import List
+
+# `streamlit run app/streamlit_app.py` only puts app/ on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from symbolic_module.explain import ExplanationService
+from symbolic_module.rule_index import RuleIndex
+from symbolic_module.kg_index import KGIndex
+from data_layer import cached_candidates, file_signature
+from query_backend import CandidateQuery
 
 st.set_page_config(page_title="Neuro-Symbolic Drug Repurposing", layout="wide")
 
 DATA_CSV = "artifacts/final_ranked_candidates.csv"
+DRUGPROPS_CSV = "data/drug_properties.csv"
+PATHWAY_CSV = "data/pathway_genes.csv"
+KG_TRIPLES = "data/kg_triples.csv"
+NODE_LOOKUP = "data/node_lookup.csv"
+ROLE_STYLE = {
+    "source": dict(shape="box", style="filled", fillcolor="#1f77b4", fontcolor="white"),
+    "target": dict(shape="oval", style="filled", fillcolor="#d62728", fontcolor="white"),
+    "path": dict(shape="ellipse", style="filled", fillcolor="#ffdd99"),
+    "neighbour": dict(shape="ellipse", style="filled", fillcolor="#eeeeee", fontsize="10"),
+}
+
+
+@st.cache_resource(max_entries=2)
+def get_query(ranked_csv, signature):
+    return CandidateQuery(cached_candidates(ranked_csv))
+
+
+@st.cache_resource(max_entries=2)
+def get_kg(triples_path, signature):
+    return KGIndex.load(triples_path, NODE_LOOKUP)
+
+
+@st.cache_data(max_entries=256)
+def get_subgraph(triples_path, signature, drug, disease, max_hops, node_budget, relations):
+    return get_kg(triples_path, signature).subgraph(drug, disease, max_hops, node_budget, list(relations) or None)
+
+
+@st.cache_resource(max_entries=2)
+def get_explainer(ranked_csv, signature):
+    """One explanation service (and its LRU cache) per version of the ranked CSV."""
+    return ExplanationService(cached_candidates(ranked_csv), RuleIndex.from_files(DRUGPROPS_CSV, PATHWAY_CSV))
 
 st.title("Neuro-Symbolic Drug Repurposing — Laptop 3 Demo")
 
@@ -23,34 +62,59 @@ if not os.path.exists(DATA_CSV):
                "--pathway data/pathway_genes.csv --out artifacts/final_ranked_candidates.csv`")
     st.stop()
 
-# Load data
+# Load data (parsed once per file version, then memory-mapped and shared across reruns)
 try:
-    df = pd.read_csv(DATA_CSV)
+    query = get_query(DATA_CSV, file_signature(DATA_CSV))
 except Exception as e:
     st.error(f"Failed to read {DATA_CSV}: {e}")
     st.stop()
+table = query.table
 
-# Sidebar filters
+# Sidebar filters (evaluated server-side on the sorted index, one page at a time)
+ALL = "(all)"
 st.sidebar.header("Filters")
-top_k = st.sidebar.number_input("Top K to show", min_value=1, max_value=500, value=20)
-min_score = st.sidebar.slider("Min final score", 0.0, 1.0, 0.0, 0.01)
-
-filtered = df[df["final_score"] >= min_score].copy()
-filtered = filtered.sort_values("final_score", ascending=False).head(top_k)
+disease_sel = st.sidebar.selectbox("Disease", [ALL] + query.disease_names)
+drug_sel = st.sidebar.selectbox("Drug", [ALL] + query.drug_names)
+# bounds from the data (neural scores can be negative); an end of the slider means "no bound"
+bounds = query.score_bounds or (0.0, 1.0)
+score_lo = math.floor(bounds[0] * 100) / 100
+score_hi = max(math.ceil(bounds[1] * 100) / 100, score_lo + 0.01)
+min_score, max_score = st.sidebar.slider("Final score range", score_lo, score_hi, (score_lo, score_hi), 0.01)
+min_score = None if min_score <= score_lo else min_score
+max_score = None if max_score >= score_hi else max_score
+page_size = st.sidebar.number_input("Rows per page", min_value=1, max_value=500, value=20)
+
+kg = get_kg(KG_TRIPLES, file_signature(KG_TRIPLES)) if os.path.exists(KG_TRIPLES) else None
+if kg is not None:
+    st.sidebar.header("Mechanism view")
+    max_hops = st.sidebar.slider("Max path length (hops)", 1, 4, 3)
+    node_budget = st.sidebar.slider("Node budget", 5, 150, 40, 5)
+    rel_filter = st.sidebar.multiselect("Relations", sorted(kg.relations))
+
+filters = dict(drug=None if drug_sel == ALL else drug_sel, disease=None if disease_sel == ALL else disease_sel,
+               min_score=min_score, max_score=max_score)
+total = len(query.matching_rows(**filters))
+n_pages = max(1, -(-total // page_size))
+page_no = st.sidebar.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1)
+page = query.page((page_no - 1) * page_size, page_size, **filters)
+filtered = page.rows
 
 st.subheader("Top Candidates")
-st.dataframe(filtered[["drug", "disease", "final_score", "neural_score", "best_path_score", "symbolic_score"]].reset_index(drop=True))
+st.caption(f"{page.total} matching candidates — showing {page.offset + 1 if page.total else 0}"
+           f"–{page.offset + len(filtered)}")
+st.dataframe(filtered[["drug", "disease", "final_score", "neural_score", "best_path_score", "symbolic_score"]]
+             .set_index(filtered.index + page.offset + 1))
 
 # Candidate selection
-candidates = filtered["drug"].tolist()
-if not candidates:
+if filtered.empty:
     st.info("No candidates match the current filter.")
     st.stop()
 
-sel = st.selectbox("Select a candidate to inspect", candidates)
+labels = [f"{d} — {x}" for d, x in zip(filtered["drug"], filtered["disease"])]
+sel = st.selectbox("Select a candidate to inspect", range(len(labels)), format_func=labels.__getitem__)
 
-if sel:
-    row = df[df["drug"] == sel].iloc[0]
+if sel is not None:
+    row = filtered.iloc[sel]
 
     st.markdown("### Candidate details")
     col1, col2 = st.columns([2, 3])
@@ -63,33 +127,33 @@ if sel:
         st.write("**Best path score:**", float(row["best_path_score"]))
         st.write("**Symbolic score:**", float(row["symbolic_score"]))
 
+    # built on demand for the selected pair only and memoized by the service
+    explanation = get_explainer(DATA_CSV, file_signature(DATA_CSV)).explain(str(row["drug"]), str(row["disease"]))
+
     with col2:
         st.markdown("**Rule breakdown**")
-        st.json({
-            "target_in_pathway": row.get("rule_target_in_pathway", 0),
-            "bbb_check": row.get("rule_bbb_check", 0),
-            "toxicity_ok": row.get("rule_toxicity_ok", 0),
-            "mechanism_consistent": row.get("rule_mechanism_consistent", 0),
-            "meta_path_score": row.get("rule_meta_path_score", 0),
-        })
-
-    # Prepare path (split by " | " which aggregate_scores writes)
-    raw_path = str(row.get("best_path", ""))
-    if raw_path.strip() == "":
-        path: List[str] = []
-    else:
-        # support both "A | B | C" and comma/arrow separated variants
-        if " | " in raw_path:
-            path = [p.strip() for p in raw_path.split(" | ") if p.strip()]
-        elif "->" in raw_path:
-            path = [p.strip() for p in raw_path.split("->") if p.strip()]
-        else:
-            # fallback: single node or whitespace-separated
-            path = [raw_path.strip()] if raw_path.strip() else []
+        st.json(explanation["rules"] if explanation else {})
+
+    path = explanation["best_path"] if explanation else []
 
     st.markdown("### Path visualization ")
 
-    if not path:
+    sub_nodes = sub_edges = None
+    if kg is not None:
+        sub_nodes, sub_edges = get_subgraph(KG_TRIPLES, file_signature(KG_TRIPLES), str(row["drug"]),
+                                            str(row["disease"]), max_hops, node_budget, tuple(rel_filter))
+    if sub_nodes is not None and len(sub_nodes):
+        # KG neighbourhood: connecting paths plus immediate neighbours; stored best path in bold
+        on_best = {kg.nodes[i] for i in map(kg.resolve, path) if i >= 0}
+        dot = graphviz.Digraph(engine="dot", graph_attr={"rankdir": "LR"})
+        for node, role in zip(sub_nodes["node"], sub_nodes["role"]):
+            dot.node(node, label=node, **ROLE_STYLE[role], penwidth="3" if node in on_best else "1")
+        for h, rel, t in sub_edges.itertuples(index=False):
+            dot.edge(h, t, label=rel, fontsize="9")
+        st.graphviz_chart(dot)
+        st.caption(f"{len(sub_nodes)} nodes, {len(sub_edges)} edges within {max_hops} hops "
+                   f"(bold: stored best path)")
+    elif not path:
         st.info("No supporting path available for this candidate.")
     else:
         try:
@@ -116,18 +180,17 @@ if sel:
             # also show monospace rendering
             st.markdown(f"```\n{' -> '.join(path)}\n```")
 
-    # Explanation section (simple)
     st.markdown("### Mechanistic explanation")
-    # Build a short sentence from path nodes when available
     if path and len(path) >= 2:
-        drug_node = path[0]
-        last_node = path[-1]
         middle = " → ".join(path[1:-1]) if len(path) > 2 else ""
-        rationale = f"This path connects **{drug_node}** to **{last_node}** via {middle if middle else 'direct interaction'}."
+        st.write(f"This path connects **{path[0]}** to **{path[-1]}** via {middle if middle else 'direct interaction'}.")
     else:
-        rationale = "No mechanistic path available to generate an explanation."
-
-    st.write(rationale)
+        st.write("No mechanistic path available to generate an explanation.")
+    if explanation:
+        for reason in explanation["rule_explanations"]:
+            st.markdown(f"- {reason}")
+        with st.expander("Full explanation"):
+            st.text(explanation["text"])
 
     # Optional: show raw row for debugging
     with st.expander("Raw candidate record"):
@@ -1,45 +1,158 @@
+"""
+Build diseases.csv and disease_gene.csv from a CTD gene-disease dump.
+
+The gzip is read in chunks with a columnar reader (comment lines skipped, only
+the needed columns, categorical dtypes) and both outputs are appended chunk by
+chunk. Gene-disease pairs are deduplicated by a 64-bit hash of
+(gene, disease): the seen hashes are kept as one sorted array (8 bytes per
+pair), or with --spill_dir rows are partitioned by hash into files on disk and
+deduplicated one partition at a time, so memory stays bounded even on the full
+CTD_genes_diseases dump with inferred associations.
+
+Usage:
+python scripts/build_disease_layers_from_ctd.py
+python scripts/build_disease_layers_from_ctd.py --input data/raw/CTD_genes_diseases.tsv.gz \
+  --include_inferred --spill_dir data/cache/ctd_spill
+"""
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-import gzip
-import os
 
 INPUT = "data/raw/CTD_curated_genes_diseases.tsv.gz"
 OUT_DISEASE = "data/layers/diseases.csv"
 OUT_GDA = "data/layers/disease_gene.csv"
 
-print("Reading CTD curated dataset:", INPUT)
-
-rows = []
-disease_rows = set()
-
-with gzip.open(INPUT, "rt", encoding="utf-8") as f:
-    for line in f:
-        if line.startswith("#"):
-            continue
-        
-        parts = line.strip().split("\t")
-        if len(parts) < 4:
-            continue
-        
-        gene_symbol = parts[0]
-        gene_id = parts[1]
-        disease_name = parts[2]
-        disease_id = parts[3]
-        
-        disease_rows.add((disease_id, disease_name))
-        
-        rows.append((gene_symbol, disease_id, 1))  # score=1
-
-print("Building DataFrames...")
-
-diseases_df = pd.DataFrame(list(disease_rows), columns=["disease_id", "disease_name"])
-diseases_df.to_csv(OUT_DISEASE, index=False)
-
-gda_df = pd.DataFrame(rows, columns=["gene_id", "disease_id", "score"])
-gda_df.to_csv(OUT_GDA, index=False)
-
-print("DONE.")
-print("Diseases:", len(diseases_df))
-print("Gene–Disease associations:", len(gda_df))
-print("Saved to:")
-print(" →", OUT_DISEASE)
-print(" →", OUT_GDA)
+# CTD columns: GeneSymbol, GeneID, DiseaseName, DiseaseID, DirectEvidence, ...
+CTD_COLUMNS = ["gene_symbol", "ncbi_id", "disease_name", "disease_id", "direct_evidence"]
+CTD_DTYPES = {"gene_symbol": "category", "ncbi_id": "category", "disease_name": "category",
+              "disease_id": "category", "direct_evidence": "category"}
+
+
+def read_ctd_chunks(path, chunksize=1_000_000):
+    """Chunks of the CTD gene-disease file with the CTD_COLUMNS columns."""
+    return pd.read_csv(path, sep="\t", comment="#", header=None, names=CTD_COLUMNS, usecols=range(5),
+                       dtype=CTD_DTYPES, chunksize=chunksize, compression="infer", on_bad_lines="skip")
+
+
+def pair_hashes(df):
+    """64-bit hash of every (gene_symbol, disease_id) row."""
+    return pd.util.hash_pandas_object(df[["gene_symbol", "disease_id"]], index=False).to_numpy()
+
+
+class SeenHashes:
+    """Sorted array of the hashes seen so far; new() keeps the first row of every unseen hash."""
+
+    def __init__(self):
+        self.sorted = np.zeros(0, dtype=np.uint64)
+
+    def new(self, h):
+        uniq, first = np.unique(h, return_index=True)
+        seen = np.zeros(len(uniq), dtype=bool)
+        if len(self.sorted):
+            pos = np.minimum(np.searchsorted(self.sorted, uniq), len(self.sorted) - 1)
+            seen = self.sorted[pos] == uniq
+        fresh = uniq[~seen]
+        # both runs are sorted, so the stable sort is a linear merge
+        self.sorted = np.concatenate([self.sorted, fresh])
+        self.sorted.sort(kind="stable")
+        keep = np.zeros(len(h), dtype=bool)
+        keep[first[~seen]] = True
+        return keep
+
+    def __len__(self):
+        return len(self.sorted)
+
+
+def _append_csv(df, path, started):
+    df.to_csv(path, mode="a" if started else "w", header=not started, index=False)
+
+
+def build(input_path=INPUT, out_disease=OUT_DISEASE, out_gda=OUT_GDA, include_inferred=False,
+          chunksize=1_000_000, spill_dir=None, partitions=64):
+    seen = SeenHashes()
+    seen_diseases = set()
+    n_rows = n_pairs = n_diseases = 0
+    spill = None
+    if spill_dir:
+        # a private subdirectory: only it is removed afterwards, never spill_dir itself
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+        spill = Path(tempfile.mkdtemp(prefix="ctd_spill-", dir=spill_dir))
+
+    try:
+        for i, chunk in enumerate(read_ctd_chunks(input_path, chunksize)):
+            chunk = chunk.dropna(subset=["gene_symbol", "disease_id"])
+            if not include_inferred:
+                # inferred associations have no DirectEvidence
+                chunk = chunk[chunk["direct_evidence"].notna()]
+            n_rows += len(chunk)
+
+            diseases = chunk[["disease_id", "disease_name"]].drop_duplicates("disease_id")
+            diseases = diseases[~diseases["disease_id"].astype(str).isin(seen_diseases)]
+            seen_diseases.update(diseases["disease_id"].astype(str))
+            _append_csv(diseases, out_disease, n_diseases > 0)
+            n_diseases += len(diseases)
+
+            h = pair_hashes(chunk)
+            gda = pd.DataFrame({"gene_id": chunk["gene_symbol"].astype(str).to_numpy(),
+                                "disease_id": chunk["disease_id"].astype(str).to_numpy(), "score": 1})
+            if spill:
+                part = (h % np.uint64(partitions)).astype(np.int64)
+                gda.insert(0, "hash", h.astype(np.int64))
+                for p, rows in gda.groupby(part, sort=False):
+                    f = spill / f"part-{p:03d}.csv"
+                    rows.to_csv(f, mode="a", header=not f.exists(), index=False)
+            else:
+                gda = gda[seen.new(h)]
+                _append_csv(gda, out_gda, n_pairs > 0)
+                n_pairs += len(gda)
+            print(f"chunk {i}: {n_rows} rows, {n_diseases} diseases, "
+                  f"{len(seen) if not spill else 'spilled'} unique pairs")
+
+        if spill:
+            for f in sorted(spill.glob("part-*.csv")):
+                part = pd.read_csv(f, dtype={"gene_id": str, "disease_id": str})
+                part = part.drop_duplicates("hash").drop(columns="hash")
+                _append_csv(part, out_gda, n_pairs > 0)
+                n_pairs += len(part)
+    finally:
+        if spill:
+            shutil.rmtree(spill, ignore_errors=True)
+
+    # keep the output headers even when nothing was read
+    if not n_diseases:
+        pd.DataFrame(columns=["disease_id", "disease_name"]).to_csv(out_disease, index=False)
+    if not n_pairs:
+        pd.DataFrame(columns=["gene_id", "disease_id", "score"]).to_csv(out_gda, index=False)
+    return n_rows, n_diseases, n_pairs
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--input", default=INPUT)
+    p.add_argument("--out_disease", default=OUT_DISEASE)
+    p.add_argument("--out_gda", default=OUT_GDA)
+    p.add_argument("--include_inferred", action="store_true",
+                   help="keep associations without direct evidence (full CTD_genes_diseases dump)")
+    p.add_argument("--chunksize", type=int, default=1_000_000)
+    p.add_argument("--spill_dir", default=None,
+                   help="deduplicate via hash-partitioned files in a temporary subdirectory of this directory")
+    p.add_argument("--partitions", type=int, default=64)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("Reading CTD dataset:", args.input)
+    n_rows, n_diseases, n_pairs = build(args.input, args.out_disease, args.out_gda, args.include_inferred,
+                                        args.chunksize, args.spill_dir, args.partitions)
+    print("DONE.")
+    print("Rows read:", n_rows)
+    print("Diseases:", n_diseases)
+    print("Gene–Disease associations:", n_pairs)
+    print("Saved to:")
+    print(" →", args.out_disease)
+    print(" →", args.out_gda)
@@ -1,17 +1,17 @@
-import json
+import os
+import sys
 
-entities_file = "data/drkg/embed/entities.tsv"
-out_json = "data/drkg/entity2id.json"
-
-entity2id = {}
+# scripts/ is on the path when run directly; the entity dictionary lives in symbolic_module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from symbolic_module.entity_dict import EntityDict
 
-with open(entities_file, "r") as f:
-    for idx, line in enumerate(f):
-        entity = line.strip()
-        if entity:
-            entity2id[entity] = idx
+entities_file = "data/drkg/embed/entities.tsv"
+out_dict = "data/drkg/entities.dict"
 
-with open(out_json, "w") as f:
-    json.dump(entity2id, f, indent=2)
+# line number = entity ID (embedding row)
+entity_dict = EntityDict.from_lines(entities_file)
+entity_dict.save(out_dict)
 
-print(f"Wrote {len(entity2id)} entities → {out_json}")
+print(f"Wrote {len(entity_dict)} entities → {out_dict}")
+for kind, (start, end) in entity_dict.types.items():
+    print(f"  {kind}: {end - start}")
@@ -1,21 +1,19 @@
 import pandas as pd
 
-input_file = "data/raw/Ensembl2Reactome.txt"
-output_file = "data/layers/genes.csv"
-
-print("Reading Reactome → Ensembl mapping...")
+from id_store import IDStore
 
-df = pd.read_csv(input_file, sep="\t", header=None,
-                 names=["ensembl_id", "reactome_id", "species", "pathway_name", "url"])
+output_file = "data/layers/genes.csv"
 
-# Only keep Human genes
-df = df[df["species"] == "Homo sapiens"]
+print("Loading human Reactome Ensembl IDs from the ID store...")
 
-# Extract unique Ensembl IDs
-genes = df[["ensembl_id"]].drop_duplicates()
+# Ensembl2Reactome.txt is parsed once into the ID store (human rows only)
+store = IDStore.open()
+genes = store.genes_with("ensembl", source="reactome").drop_duplicates("id_value")
+genes = genes.rename(columns={"id_value": "ensembl_id"})
 
-# Add a placeholder gene symbol (OPTIONAL)
-genes["gene_symbol"] = genes["ensembl_id"]
+# Gene symbol from the store; the Ensembl ID itself where none is known
+symbols = store.primary("symbol")[genes["gene"].to_numpy()]
+genes["gene_symbol"] = pd.Series(symbols, index=genes.index).fillna(genes["ensembl_id"])
 
 # Reorder
 genes = genes[["gene_symbol", "ensembl_id"]]
@@ -1,29 +1,16 @@
-import pandas as pd
+from id_store import IDStore
 
-in_file = "data/raw/human_genes_info"
 out_file = "data/layers/genes.csv"
 
-# NCBI format columns:
-# tax_id, GeneID, Symbol, LocusTag, Synonyms, dbXrefs, chromosome, map_location,
-# description, type_of_gene, ...
-
-cols = [
-    "tax_id", "GeneID", "Symbol", "Synonyms",
-    "dbXrefs", "description", "type_of_gene"
-]
-
-df = pd.read_csv(
-    in_file,
-    sep="\t",
-    names=cols,
-    usecols=[0,1,2,4,5,8,9],
-    dtype=str,
-    comment="#"
-)
+# NCBI gene_info (data/raw/human_genes_info) is parsed once into the ID store;
+# this reads the gene table from there.
+store = IDStore.open()
+df = store.genes[store.genes["ncbi"].notna()]
 
 # Keep only HOMO SAPIENS + protein coding
 df = df[df["type_of_gene"] == "protein-coding"]
 
+df = df.rename(columns={"ncbi": "GeneID", "symbol": "Symbol"})
 df = df[["GeneID", "Symbol", "description"]].fillna("")
 
 df.to_csv(out_file, index=False)
@@ -1,6 +1,8 @@
 import os
 import pandas as pd
 
+from string_aliases import StringAliasIndex
+
 def load_csv(path, required_cols):
     df = pd.read_csv(path, dtype=str).fillna("")
     missing = [c for c in required_cols if c not in df.columns]
@@ -8,43 +10,50 @@ def load_csv(path, required_cols):
         raise ValueError(f"Missing columns in {path}: {missing}")
     return df
 
-def main(in_dir, out_file):
-    triples = []
+def edges(df, head, relation, tail):
+    return pd.DataFrame({"head": df[head].to_numpy(), "relation": relation, "tail": df[tail].to_numpy()})
+
+def main(in_dir, out_file, string_symbols=False):
+    parts = []
 
     # 1) DRUG TARGETS
     drug_targets = load_csv(
         f"{in_dir}/layers/drug_targets.csv",
         ["drug_id", "gene_id", "action"]
     )
-    for _, row in drug_targets.iterrows():
-        triples.append([row["drug_id"], "targets", row["gene_id"]])
+    parts.append(edges(drug_targets, "drug_id", "targets", "gene_id"))
 
     # 2) GENE-GENE INTERACTIONS
     gg = load_csv(
         f"{in_dir}/layers/gene_interactions.csv",
         ["gene1", "gene2", "score"]
     )
-    for _, row in gg.iterrows():
-        triples.append([row["gene1"], "interacts_with", row["gene2"]])
+    parts.append(edges(gg, "gene1", "interacts_with", "gene2"))
 
     # 3) GENE → PATHWAY
     gp = load_csv(
         f"{in_dir}/layers/gene_pathway.csv",
         ["gene_id", "pathway_id"]
     )
-    for _, row in gp.iterrows():
-        triples.append([row["gene_id"], "in_pathway", row["pathway_id"]])
+    parts.append(edges(gp, "gene_id", "in_pathway", "pathway_id"))
 
     # 4) DISEASE–GENE ASSOCIATIONS
     dg = load_csv(
         f"{in_dir}/layers/disease_gene.csv",
         ["gene_id", "disease_id", "score"]
     )
-    for _, row in dg.iterrows():
-        triples.append([row["gene_id"], "associated_with", row["disease_id"]])
+    parts.append(edges(dg, "gene_id", "associated_with", "disease_id"))
+
+    triples_df = pd.concat(parts, ignore_index=True)
+
+    # STRING protein ids -> preferred gene symbols, so all layers share gene nodes
+    if string_symbols:
+        index = StringAliasIndex.open(raw_dir=f"{in_dir}/raw")
+        for col in ("head", "tail"):
+            symbols = pd.Series(index.to_symbol(triples_df[col]), index=triples_df.index)
+            triples_df[col] = symbols.fillna(triples_df[col])
 
     # OUTPUT
-    triples_df = pd.DataFrame(triples, columns=["head", "relation", "tail"])
     triples_df.to_csv(out_file, index=False)
 
     print(f"Wrote {len(triples_df)} triples → {out_file}")
@@ -58,5 +67,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--in_dir", required=True)
     parser.add_argument("--out", required=True)
+    parser.add_argument("--string_symbols", action="store_true",
+                        help="rename STRING protein ids to gene symbols (scripts/string_aliases.py index)")
     args = parser.parse_args()
-    main(args.in_dir, args.out)
+    main(args.in_dir, args.out, args.string_symbols)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Resumable, checkpointed crawls for the fetch scripts.
+
+A crawl runs a function over work units (genes, drugs, result pages, ...) with
+a bounded number of requests in flight and, optionally, a rate limit. Results
+are flushed every flush_every units (or flush_seconds) to an append-only shard
+in data/cache/crawls/<name>/, and only then are the finished units recorded in
+journal.jsonl, so a killed or failed run loses at most the unflushed buffer.
+Rerunning skips every journaled unit; failed units are retried.
+
+Units that only make sense for one state of the source (e.g. result-page
+offsets) pass a snapshot, any JSON value describing that state such as the
+total record count: it is kept in snapshot.json, and a crawl whose snapshot
+changed is reset instead of resumed. With max_age (seconds), journal entries
+older than that count as not done, so their units are fetched again and only
+the fresh rows are returned.
+
+    crawl = Crawl("opentargets", ["disease_id", "disease_name", "gene_symbol", "score"])
+    failed = crawl.run(genes, fetch_rows)      # fetch_rows(gene) -> list of row tuples
+    df = crawl.results()
+
+Inspect / restart a crawl:
+python scripts/crawl.py status opentargets
+python scripts/crawl.py reset opentargets
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+from tqdm import tqdm
+
+from http_fetch import TokenBucket
+
+CRAWL_ROOT = Path("data") / "cache" / "crawls"
+
+
+class Crawl:
+    """Journal of completed units plus shards of their result rows."""
+
+    def __init__(self, name, columns, root=CRAWL_ROOT, workers=8, rate=None, flush_every=500, flush_seconds=60,
+                 snapshot=None, max_age=None):
+        self.name = name
+        self.columns = list(columns)
+        self.dir = Path(root) / name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.journal = self.dir / "journal.jsonl"
+        if snapshot is not None:
+            self._check_snapshot(snapshot)
+        self.workers = workers
+        self.bucket = TokenBucket(rate) if rate else None
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.max_age = max_age
+        # a run killed mid-write can leave a torn last line; start appends on a fresh one
+        if self.journal.exists() and self.journal.stat().st_size:
+            with open(self.journal, "rb+") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    def _check_snapshot(self, snapshot):
+        path = self.dir / "snapshot.json"
+        snapshot = json.loads(json.dumps(snapshot))
+        if path.exists():
+            old = json.loads(path.read_text())
+            if old == snapshot:
+                return
+            print(f"[{self.name}] source changed ({old} -> {snapshot}); starting the crawl over")
+            self.reset()
+        elif self.journal.exists():
+            # journaled before snapshots were recorded: its state is unknown
+            self.reset()
+        tmp = self.dir / "snapshot.json.tmp"
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, path)
+
+    # ---------- journal ----------
+
+    def _entries(self):
+        if not self.journal.exists():
+            return []
+        entries = []
+        min_time = time.time() - self.max_age if self.max_age else 0
+        with open(self.journal) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn line of a killed run; its units are redone
+                    continue
+                if entry.get("time", 0) >= min_time:
+                    entries.append(entry)
+        return entries
+
+    def completed(self):
+        return {u for e in self._entries() for u in e["units"]}
+
+    def _flush(self, rows, units):
+        if not units:
+            return
+        shard = None
+        if rows:
+            shard = f"shard-{time.time_ns()}.csv"
+            tmp = self.dir / (shard + ".tmp")
+            pd.DataFrame(rows, columns=self.columns).to_csv(tmp, index=False)
+            os.replace(tmp, self.dir / shard)
+        with open(self.journal, "a") as f:
+            f.write(json.dumps({"shard": shard, "units": units, "time": time.time()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        rows.clear()
+        units.clear()
+
+    # ---------- running ----------
+
+    def _call(self, fn, batch, batched):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        return fn(batch) if batched else fn(batch[0])
+
+    def run(self, units, fn, batch_size=1, desc=None):
+        """
+        Call fn on every unit not journaled yet (fn(unit), or fn(list of units)
+        when batch_size > 1) and checkpoint the returned rows. Returns
+        {unit: error text} for the units that failed in this run.
+        """
+        done = self.completed()
+        pending = [u for u in dict.fromkeys(str(u) for u in units) if u not in done]
+        if done:
+            print(f"[{self.name}] resuming: {len(done)} units done, {len(pending)} to go")
+        batches = iter([pending[i:i + batch_size] for i in range(0, len(pending), batch_size)])
+        failures = {}
+        rows, finished = [], []
+        last_flush = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool, tqdm(total=len(pending), desc=desc or self.name) as bar:
+            inflight = {}
+
+            def submit():
+                batch = next(batches, None)
+                if batch is not None:
+                    inflight[pool.submit(self._call, fn, batch, batch_size > 1)] = batch
+
+            for _ in range(2 * self.workers):
+                submit()
+            try:
+                while inflight:
+                    ready, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                    for fut in ready:
+                        batch = inflight.pop(fut)
+                        try:
+                            rows.extend(fut.result())
+                            finished.extend(batch)
+                        except Exception as e:
+                            failures.update((u, f"{type(e).__name__}: {e}") for u in batch)
+                        bar.update(len(batch))
+                        submit()
+                    if len(finished) >= self.flush_every or time.time() - last_flush >= self.flush_seconds:
+                        self._flush(rows, finished)
+                        last_flush = time.time()
+            except BaseException:
+                for fut in inflight:
+                    fut.cancel()
+                raise
+            finally:
+                # keep whatever finished, also on Ctrl-C
+                self._flush(rows, finished)
+        if failures:
+            print(f"[WARN] [{self.name}] {len(failures)} units failed, e.g. {next(iter(failures.items()))}. "
+                  f"Rerun to retry them.", file=sys.stderr)
+        return failures
+
+    # ---------- results ----------
+
+    def results(self, **read_csv_kwargs):
+        """All checkpointed rows, from the shards named in the journal."""
+        shards = [self.dir / e["shard"] for e in self._entries() if e["shard"]]
+        parts = [pd.read_csv(s, **read_csv_kwargs) for s in shards if s.exists()]
+        if not parts:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(parts, ignore_index=True)
+
+    def reset(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("command", choices=["status", "reset"])
+    p.add_argument("name")
+    p.add_argument("--root", default=str(CRAWL_ROOT))
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    crawl_dir = Path(args.root) / args.name
+    if not crawl_dir.exists():
+        print(f"[WARN] No crawl named {args.name} under {args.root}", file=sys.stderr)
+        sys.exit(1)
+    if args.command == "reset":
+        shutil.rmtree(crawl_dir)
+        print(f"Removed {crawl_dir}")
+    else:
+        entries = Crawl(args.name, [], args.root)._entries()
+        n_units = sum(len(e["units"]) for e in entries)
+        n_shards = sum(1 for e in entries if e["shard"])
+        last = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entries[-1]["time"])) if entries else "-"
+        print(f"{args.name}: {n_units} units done in {n_shards} shards, last flush {last}")
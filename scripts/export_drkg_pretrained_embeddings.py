@@ -1,19 +1,22 @@
+import os
+import sys
+
 import numpy as np
 import pandas as pd
-import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from symbolic_module.embedding_store import EmbeddingStore
+from symbolic_module.entity_dict import EntityDict
 
 # Load DRKG entity list
 entities = pd.read_csv("data/drkg/entities.txt", header=None)[0].tolist()
-entity2id = {e: i for i, e in enumerate(entities)}
+entity_dict = EntityDict.from_names(entities)
 
 # Load pretrained embeddings
-emb = np.load("data/drkg/embed/DRKG_TransE_l2_entity.npy")
+emb = np.load("data/drkg/embed/DRKG_TransE_l2_entity.npy", mmap_mode="r")
 
-# Save in your project format
-np.save("embeddings.npy", emb)
-with open("entity2id.json", "w") as f:
-    json.dump(entity2id, f)
+# Save in your project format: one contiguous block per entity type, plus the entity dictionary
+store = EmbeddingStore.build(emb, entity_dict, "embeddings.store")
 
 print("Saved:")
-print(" - embeddings.npy")
-print(" - entity2id.json")
+print(" - embeddings.store (" + ", ".join(f"{k}: {store.meta['blocks'][k]['rows']}" for k in store.kinds) + ")")
@@ -1,33 +1,50 @@
-import pandas as pd
+import os
+
 from chembl_webresource_client.new_client import new_client
 
+from crawl import Crawl
+
+PAGE_SIZE = 1000
+
 mechanisms = new_client.mechanism
 
 print("Fetching ChEMBL Mechanisms of Action (MoA)... This may take a few minutes.")
 
-# Fetch all mechanisms
+# Fetch all mechanisms (ordered by mec_id, so a page offset names the same rows on every request)
 data = mechanisms.filter(target_chembl_id__isnull=False).only(
     ['mec_id', 'molecule_chembl_id', 'target_chembl_id', 'action_type', 'target_components']
-)
+).order_by('mec_id')
+
+
+def page_records(offset):
+    records = []
+    offset = int(offset)
+    for row in data[offset:offset + PAGE_SIZE]:
+        drug = row.get('molecule_chembl_id')
+        action = (row.get('action_type') or '').lower()
 
-records = []
+        # target_components contains UniProt IDs
+        comps = row.get('target_components') or []
 
-for row in data:
-    drug = row.get('molecule_chembl_id')
-    action = row.get('action_type', '').lower()
+        for comp in comps:
+            uniprot = comp.get('accession')
+            if uniprot:
+                records.append([drug, uniprot, action])
+    return records
 
-    # target_components contains UniProt IDs
-    comps = row.get('target_components') or []
 
-    for comp in comps:
-        uniprot = comp.get('accession')
-        if uniprot:
-            records.append([drug, uniprot, action])
+# Pages are fetched concurrently and checkpointed under data/cache/crawls/chembl_moa,
+# so an interrupted run resumes from the pages it has not finished. The offsets
+# are only valid for one mechanism count, so a changed count starts the crawl over.
+total = len(data)
+crawl = Crawl("chembl_moa", ["drug_id", "gene_id", "action"], workers=int(os.environ.get("CHEMBL_WORKERS", 4)),
+              flush_every=5, snapshot={"mechanisms": total})
+crawl.run(range(0, total, PAGE_SIZE), page_records, desc="MoA pages")
 
-df = pd.DataFrame(records, columns=["drug_id", "gene_id", "action"])
+df = crawl.results(dtype=str, keep_default_na=False)
 
 # drop missing
-df = df[df["drug_id"].notna() & df["gene_id"].notna()]
+df = df[(df["drug_id"] != "") & (df["gene_id"] != "")]
 
 df.to_csv("data/layers/drug_targets_clean.csv", index=False)
 
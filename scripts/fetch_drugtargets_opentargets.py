@@ -5,14 +5,17 @@ Writes:
  - data/layers/drug_targets.csv  (drug_id, gene_symbol, evidence)
  - data/layers/diseases.csv     (disease_id, disease_name)
  - data/layers/disease_gene.csv (disease_id, gene_symbol, score)
-Requirements: chembl_webresource_client, mygene, requests, pandas, tqdm
+Gene IDs are resolved through the local ID store (scripts/id_store.py).
+Requirements: chembl_webresource_client, requests, pandas, pyarrow, tqdm
 """
-import time, sys, re, json
+import os, sys
 from pathlib import Path
 import pandas as pd
-from tqdm import tqdm
-import requests
-import mygene
+
+from crawl import Crawl
+from http_fetch import KVCache, PooledFetcher
+from id_store import IDStore
+from opentargets_client import fetch_gene_associations
 
 # chembl client
 try:
@@ -32,29 +35,8 @@ if not drugs_path.exists():
     raise FileNotFoundError(drugs_path)
 drugs = pd.read_csv(drugs_path, dtype=str).fillna("")
 
-# 1) Build STRING ID -> gene symbol mapping from alias file if available
-alias_candidates = list(RAW.glob("9606.protein.aliases*.txt.gz"))
-string_to_symbol = {}
-if alias_candidates:
-    import gzip
-    alias_file = alias_candidates[0]
-    print("Parsing STRING alias file:", alias_file)
-    # alias file columns vary; typical format: string_protein_id <tab> alias <tab> alias_type
-    with gzip.open(alias_file, "rt", errors="ignore") as fh:
-        for line in fh:
-            parts = line.strip().split("\t")
-            if len(parts) < 2:
-                continue
-            sid = parts[0]
-            alias = parts[1]
-            # heuristics: prefer aliases that look like gene symbols (mostly uppercase, len<10)
-            if re.fullmatch(r"[A-Z0-9\-]{2,10}", alias):
-                # prefer the first good alias we see
-                if sid not in string_to_symbol:
-                    string_to_symbol[sid] = alias
-    print("Mapped STRING ids -> gene symbols (sample):", list(string_to_symbol.items())[:5])
-else:
-    print("No STRING alias file found; continuing without direct mapping.")
+# 1) Local identifier store (STRING aliases, NCBI, Reactome, ChEMBL MoA parsed once)
+store = IDStore.open(LAYERS / "id_store", RAW)
 
 # 2) Load existing genes.csv (these are currently STRING ids)
 genes_csv = LAYERS / "genes.csv"
@@ -62,18 +44,58 @@ if not genes_csv.exists():
     print("genes.csv missing; can't map genes. Exiting.")
     sys.exit(1)
 genes_df = pd.read_csv(genes_csv, dtype=str).fillna("")
-# create gene_symbol list by mapping string ids where possible; fallback to original id
-def map_string_to_symbol(sid):
-    if sid in string_to_symbol:
-        return string_to_symbol[sid]
-    # fallback heuristics: if sid looks like ENSG or numeric, return as-is
-    return sid
-
-genes_df['gene_symbol'] = genes_df['gene_id'].apply(map_string_to_symbol)
+# gene_symbol from the STRING id where the store knows it; fallback to original id
+genes_df['gene_symbol'] = pd.Series(store.map(genes_df['gene_id'], 'string', 'symbol'),
+                                    index=genes_df.index).fillna(genes_df['gene_id'])
 # write a mapped genes file for inspection
 genes_df[['gene_id','gene_symbol']].to_csv(LAYERS/"genes_mapped.csv", index=False)
 
 # 3) Resolve drug -> targets from ChEMBL (best-effort)
+# Resumable crawl over drugs: finished drugs are checkpointed under
+# data/cache/crawls/chembl_drug_targets and skipped on rerun.
+CRAWLS = ROOT / "data" / "cache" / "crawls"
+drug_names = dict(zip(drugs['drug_id'].str.strip(), drugs['drug_name'].str.strip()))
+
+
+def chembl_drug_targets(dbid):
+    name = drug_names[dbid]
+    rows = []
+    chembl_id = None
+    # attempt search by drugbank crossref
+    try:
+        q = molecule.filter(molecule_properties__drugbank__exact=dbid)
+        results = list(q)[:1]
+        if results:
+            chembl_id = results[0].get('molecule_chembl_id')
+    except Exception:
+        pass
+    # fallback: search by pref_name
+    if not chembl_id:
+        try:
+            q2 = molecule.filter(pref_name__icontains=name)
+            results2 = list(q2)[:2]
+            if results2:
+                chembl_id = results2[0].get('molecule_chembl_id')
+        except Exception:
+            pass
+    # if we have a chembl_id, fetch activities (which include target info)
+    if chembl_id:
+        acts = activity.filter(molecule_chembl_id=chembl_id).only(['target_pref_name','target_chembl_id','target_organism'])[:500]
+        for a in acts:
+            tname = a.get('target_pref_name') or a.get('target_chembl_id')
+            # keep only human targets
+            org = a.get('target_organism') or ''
+            if 'Homo sapiens' in org or org=='' or 'human' in org.lower():
+                rows.append((dbid, tname, "chembl_activity"))
+    # If none found, try searching activities by drug name
+    if not chembl_id:
+        acts2 = activity.filter(pmid__isnull=False).filter(description__icontains=name)[:100]
+        for a in acts2:
+            tname = a.get('target_pref_name') or a.get('target_chembl_id')
+            rows.append((dbid, tname, "chembl_textsearch"))
+    return rows
+
+
 drug_targets = []
 if new_client is None:
     print("ChEMBL client not available; skipping drug->target extraction.")
@@ -81,48 +103,11 @@ else:
     molecule = new_client.molecule
     activity = new_client.activity
     # iterate drugs; prefer direct DrugBank -> ChEMBL mapping via molecule_properties.drugbank
-    for _, r in drugs.iterrows():
-        dbid = str(r['drug_id']).strip()
-        name = str(r['drug_name']).strip()
-        chembl_id = None
-        # attempt search by drugbank crossref
-        try:
-            q = molecule.filter(molecule_properties__drugbank__exact=dbid)
-            results = list(q)[:1]
-            if results:
-                chembl_id = results[0].get('molecule_chembl_id')
-        except Exception:
-            pass
-        # fallback: search by pref_name
-        if not chembl_id:
-            try:
-                q2 = molecule.filter(pref_name__icontains=name)
-                results2 = list(q2)[:2]
-                if results2:
-                    chembl_id = results2[0].get('molecule_chembl_id')
-            except Exception:
-                pass
-        # if we have a chembl_id, fetch activities (which include target info)
-        if chembl_id:
-            try:
-                acts = activity.filter(molecule_chembl_id=chembl_id).only(['target_pref_name','target_chembl_id','target_organism'])[:500]
-                for a in acts:
-                    tname = a.get('target_pref_name') or a.get('target_chembl_id')
-                    # keep only human targets
-                    org = a.get('target_organism') or ''
-                    if 'Homo sapiens' in org or org=='' or 'human' in org.lower():
-                        drug_targets.append((dbid, tname, "chembl_activity"))
-            except Exception:
-                pass
-        # If none found, try searching activities by drug name
-        if not chembl_id:
-            try:
-                acts2 = activity.filter(pmid__isnull=False).filter(description__icontains=name)[:100]
-                for a in acts2:
-                    tname = a.get('target_pref_name') or a.get('target_chembl_id')
-                    drug_targets.append((dbid, tname, "chembl_textsearch"))
-            except Exception:
-                pass
+    dt_crawl = Crawl("chembl_drug_targets", ['drug_id','gene_symbol','evidence'], CRAWLS,
+                     workers=int(os.environ.get("CHEMBL_WORKERS", 4)))
+    dt_crawl.run(drug_names, chembl_drug_targets, desc="ChEMBL drugs")
+    dt_res = dt_crawl.results(dtype=str)
+    drug_targets = list(dt_res[dt_res['drug_id'].isin(drug_names)].itertuples(index=False, name=None))
 
 # dedupe & save
 if drug_targets:
@@ -133,92 +118,41 @@ if drug_targets:
 else:
     print("No drug-target pairs found via ChEMBL for provided drugs; you may need manual curation.")
 
-# 4) Map gene_symbol -> Ensembl gene id using MyGene.info (for Open Targets)
-mg = mygene.MyGeneInfo()
+# 4) Map gene_symbol -> Ensembl gene id through the ID store (for Open Targets)
 unique_symbols = genes_df['gene_symbol'].unique().tolist()
-print("Mapping", len(unique_symbols), "gene symbols to Ensembl IDs (batched)...")
-symbol_to_ensembl = {}
-batch_size = 500
-for i in range(0, len(unique_symbols), batch_size):
-    batch = unique_symbols[i:i+batch_size]
-    try:
-        res = mg.querymany(batch, scopes='symbol', fields='ensembl.gene', species='human', as_dataframe=False)
-        for r in res:
-            query = r.get('query')
-            if 'notfound' in r and r['notfound']:
-                continue
-            ensembl = None
-            if 'ensembl' in r:
-                e = r['ensembl']
-                # ensembl can be dict or list
-                if isinstance(e, list):
-                    ensembl = e[0].get('gene')
-                elif isinstance(e, dict):
-                    ensembl = e.get('gene')
-            if ensembl:
-                symbol_to_ensembl[query] = ensembl
-    except Exception as e:
-        print("MyGene batch failed:", e)
-    time.sleep(0.5)
+print("Mapping", len(unique_symbols), "gene symbols to Ensembl IDs...")
+ensembl_ids = store.map(unique_symbols, ('symbol', 'synonym'), 'ensembl')
+symbol_to_ensembl = {sym: ens for sym, ens in zip(unique_symbols, ensembl_ids) if ens}
 
 print("Mapped symbols -> ensembl sample:", list(symbol_to_ensembl.items())[:5])
 
 # 5) Query Open Targets for disease associations per Ensembl gene
-# We'll use the Open Targets public REST filter endpoint: /public/association/filter?target=ENSG...
-OT_BASE = "https://platform.opentargets.org/api/v4/graphql"
-# GraphQL query to get top disease associations for a gene (by ensembl id)
-gql_template = '''
-query getAssociations($ensg:String!, $size:Int!) {
-  target(ensemblId: $ensg) {
-    id
-    approvedSymbol
-    associations(diseaseType: DISEASE, size: $size) {
-      count
-      rows {
-        disease {
-          id
-          name
-        }
-        score
-      }
-    }
-  }
-}
-'''
-# Prepare outputs
-disease_rows = []  # disease_id, disease_name
-disease_gene = []  # disease_id, gene_symbol, score
-
-ensembl_items = list(symbol_to_ensembl.items())
-print("Querying Open Targets for", len(ensembl_items), "genes (this may take some minutes)...")
-for gene_symbol, ensg in tqdm(ensembl_items):
-    # GraphQL payload
-    payload = {"query": gql_template, "variables": {"ensg": ensg, "size": 50}}
-    try:
-        r = requests.post(OT_BASE, json=payload, timeout=60)
-        if r.status_code != 200:
-            # skip on error
-            # print("OT API error", r.status_code, r.text)
-            time.sleep(0.2)
-            continue
-        data = r.json().get('data') or {}
-        if not data.get('target'):
-            time.sleep(0.1)
-            continue
-        assoc_info = data['target'].get('associations') or {}
-        rows = assoc_info.get('rows') or []
-        for row in rows:
-            d = row['disease']
-            did = d['id']
-            dname = d['name']
-            score = row.get('score') or 0.0
-            disease_rows.append((did, dname))
-            disease_gene.append((did, gene_symbol, float(score)))
-    except Exception as e:
-        # skip on exceptions
-        # print("Query error for", ensg, e)
-        time.sleep(0.2)
-    time.sleep(0.1)  # polite
+# Concurrent, rate-limited GraphQL requests with retries; responses are cached in
+# data/cache/fetch_cache.sqlite so reruns only fetch genes not seen before (or
+# fetched more than OT_MAX_AGE seconds ago, when set).
+# OT_GRAPHQL_URL / OT_WORKERS / OT_RATE override the endpoint and the concurrency.
+OT_MAX_AGE = float(os.environ["OT_MAX_AGE"]) if os.environ.get("OT_MAX_AGE") else None
+ot_fetcher = PooledFetcher(rate=float(os.environ.get("OT_RATE", 5)),
+                           workers=int(os.environ.get("OT_WORKERS", 8)),
+                           cache=KVCache(ROOT / "data" / "cache" / "fetch_cache.sqlite"),
+                           namespace="opentargets", max_age=OT_MAX_AGE)
+
+
+# Resumable crawl over genes, checkpointed under data/cache/crawls/opentargets.
+def ot_rows(gene_symbol):
+    return [(did, dname, gene_symbol, score)
+            for did, dname, score in fetch_gene_associations(ot_fetcher, symbol_to_ensembl[gene_symbol], size=50)]
+
+
+print("Querying Open Targets for", len(symbol_to_ensembl), "genes...")
+ot_crawl = Crawl("opentargets", ['disease_id','disease_name','gene_symbol','score'], CRAWLS,
+                 workers=ot_fetcher.workers, flush_every=200, max_age=OT_MAX_AGE)
+ot_crawl.run(symbol_to_ensembl, ot_rows, desc="Open Targets")
+print("Open Targets requests:", ot_fetcher.stats)
+ot_res = ot_crawl.results(dtype={'disease_id': str, 'disease_name': str, 'gene_symbol': str})
+ot_res = ot_res[ot_res['gene_symbol'].isin(symbol_to_ensembl)]
+disease_rows = list(zip(ot_res['disease_id'], ot_res['disease_name']))
+disease_gene = list(zip(ot_res['disease_id'], ot_res['gene_symbol'], ot_res['score'].astype(float)))
 
 # dedupe and write diseases.csv and disease_gene.csv
 if disease_rows:
@@ -1,63 +1,60 @@
+import os
+
 import pandas as pd
 from chembl_webresource_client.new_client import new_client
-import mygene
 
-mg = mygene.MyGeneInfo()
+from crawl import Crawl
+from id_store import IDStore
 
-drugs = pd.read_csv("data/layers/drugs.csv", dtype=str)
+# Activities and target metadata are fetched as resumable crawls, checkpointed
+# under data/cache/crawls/, so reruns only query ChEMBL for drugs and targets
+# not finished before.
+WORKERS = int(os.environ.get("CHEMBL_WORKERS", 8))
+TARGET_BATCH = 100
 
-drug_ids = drugs["drug_id"].unique()
+drugs = pd.read_csv("data/layers/drugs.csv", dtype=str)
 
-records = []
+drug_ids = drugs["drug_id"].dropna().unique().tolist()
 
 target = new_client.target
 activity = new_client.activity
 
-for d in drug_ids:
-    try:
-        acts = activity.filter(molecule_chembl_id=d)
-    except:
-        continue
-
-    for a in acts:
-        if "target_chembl_id" not in a:
-            continue
 
-        tid = a["target_chembl_id"]
-        t = target.filter(target_chembl_id=tid)
+# 1) Target IDs hit by each drug's activities (drugs fetched concurrently)
+def drug_targets(d):
+    acts = activity.filter(molecule_chembl_id=d).only(["target_chembl_id"])
+    return [(d, tid) for tid in sorted({a["target_chembl_id"] for a in acts if a.get("target_chembl_id")})]
 
-        if len(t) == 0:
-            continue
 
-        tgt = t[0]
+act_crawl = Crawl("chembl_activity_targets", ["drug_id", "target_chembl_id"], workers=WORKERS)
+act_crawl.run(drug_ids, drug_targets, desc="ChEMBL activities")
+acts = act_crawl.results(dtype=str)
+acts = acts[acts["drug_id"].isin(drug_ids)]
 
-        # Filter only single protein targets
-        if tgt["target_type"] != "SINGLE PROTEIN":
-            continue
 
-        gene = tgt["pref_name"]
+# 2) Metadata of the unique targets, resolved in batched __in queries
+def target_batch(tids):
+    rows = target.filter(target_chembl_id__in=list(tids)).only(["target_chembl_id", "target_type", "pref_name"])
+    return [(t["target_chembl_id"], t.get("target_type"), t.get("pref_name")) for t in rows]
 
-        records.append({
-            "drug_id": d,
-            "gene_name": gene,
-            "action": "binds"
-        })
 
-df = pd.DataFrame(records).drop_duplicates()
+unique_tids = acts["target_chembl_id"].drop_duplicates().tolist()
+print(f"{len(unique_tids)} unique targets")
+tgt_crawl = Crawl("chembl_targets", ["target_chembl_id", "target_type", "pref_name"], workers=WORKERS)
+tgt_crawl.run(unique_tids, target_batch, batch_size=TARGET_BATCH, desc="ChEMBL targets")
+targets = tgt_crawl.results(dtype=str).drop_duplicates("target_chembl_id")
 
-# Map gene names → official gene symbols
-mapped = mg.querymany(
-    df["gene_name"].tolist(),
-    scopes="name",
-    fields="symbol",
-    species="human",
-    as_dataframe=True
-)
+# Filter only single protein targets
+single = targets[targets["target_type"] == "SINGLE PROTEIN"]
+df = acts.merge(single, on="target_chembl_id")
+df = pd.DataFrame({"drug_id": df["drug_id"], "gene_name": df["pref_name"], "action": "binds"}).drop_duplicates()
 
-df["gene_symbol"] = mapped["symbol"].tolist()
+# 3) Map gene names → official gene symbols through the local ID store
+store = IDStore.open()
+df["gene_symbol"] = store.map(df["gene_name"], ("protein_name", "name", "symbol", "synonym"), "symbol")
 df = df.dropna(subset=["gene_symbol"])
 
-df = df[["drug_id", "gene_symbol", "action"]]
+df = df[["drug_id", "gene_symbol", "action"]].drop_duplicates()
 
 df.to_csv("data/layers/drug_targets_clean.csv", index=False)
 print("Saved clean drug targets → data/layers/drug_targets_clean.csv")
@@ -1,20 +1,16 @@
 import pandas as pd
 
+from id_store import IDStore
+
 drug_file = "data/layers/drug_targets.csv"
-genes_map_file = "data/layers/genes_mapped.csv"
 out_file = "data/layers/drug_targets_clean.csv"
 
 # Load raw drug-target data
 df = pd.read_csv(drug_file, dtype=str).fillna("")
 
-# Load gene mapping: gene_symbol -> gene_id (STRING-based id)
-genes = pd.read_csv(genes_map_file, dtype=str).fillna("")
-
-# Create lookup dictionary
-symbol_to_geneid = dict(zip(genes["gene_symbol"], genes["gene_id"]))
-
-# Map symbols to gene_id
-df["gene_id"] = df["gene_symbol"].map(symbol_to_geneid)
+# Map symbols to gene_id (STRING protein id) through the local ID store
+store = IDStore.open()
+df["gene_id"] = store.map(df["gene_symbol"], ("symbol", "synonym"), "string")
 
 # Drop rows where mapping failed
 df = df[df["gene_id"].notna()]
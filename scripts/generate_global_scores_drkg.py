@@ -1,35 +1,28 @@
-import json
-import numpy as np
+import os
+import sys
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
 
-# Load embeddings + mapping
-emb = np.load("embeddings.npy")
-with open("entity2id.json") as f:
-    node2id = json.load(f)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from symbolic_module.embedding_store import EmbeddingStore
 
-# Correct DRKG prefixes
-drugs = [n for n in node2id if n.startswith("Compound::")]
-diseases = [n for n in node2id if n.startswith("Disease::")]
+# Load the Compound and Disease embedding blocks (built once from embeddings.npy + entity map if needed)
+store = EmbeddingStore.open("embeddings.store", "embeddings.npy",
+                            "entities.dict" if os.path.isdir("entities.dict") else "entity2id.json")
+drug_block = store.block("Compound")
+disease_block = store.block("Disease")
+drugs = drug_block.names()
+diseases = disease_block.names()
 
 print(f"Found {len(drugs)} drugs, {len(diseases)} diseases")
 
-# Convert node names → embedding indices
-drug_ids = [node2id[n] for n in drugs]
-disease_ids = [node2id[n] for n in diseases]
-
 # Safety check
-if len(drug_ids) == 0 or len(disease_ids) == 0:
+if len(drugs) == 0 or len(diseases) == 0:
     raise ValueError(
         "ERROR: No drugs or diseases found. Check entity prefixes."
     )
 
-# Slice embeddings
-drug_emb = emb[drug_ids]
-disease_emb = emb[disease_ids]
-
-# Compute cosine similarity matrix
-scores = cosine_similarity(drug_emb, disease_emb)
+# Compute cosine similarity matrix (precomputed norms)
+scores = drug_block.cosine(disease_block)
 
 # Build output table
 rows = []
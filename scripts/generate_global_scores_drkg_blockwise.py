@@ -1,27 +1,22 @@
-import numpy as np
 import pandas as pd
-import json
-from sklearn.metrics.pairwise import cosine_similarity
 from tqdm import tqdm
 import os
+import sys
 
-# Load embeddings
-entity_emb = np.load("data/drkg/embed/DRKG_TransE_l2_entity.npy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from symbolic_module.embedding_store import EmbeddingStore
 
-# Load entity list
-entities = []
-with open("data/drkg/embed/entities.tsv") as f:
-    for line in f:
-        entities.append(line.strip())
+# Load the Compound and Disease embedding blocks, partitioning the DRKG matrix on first use
+# (entity dictionary from scripts/build_drkg_entity_map.py, else the entity list)
+ENTITY_DICT = "data/drkg/entities.dict"
+store = EmbeddingStore.open("data/drkg/embeddings.store", "data/drkg/embed/DRKG_TransE_l2_entity.npy",
+                            ENTITY_DICT if os.path.isdir(ENTITY_DICT) else "data/drkg/embed/entities.tsv")
+drug_block = store.block("Compound")
+disease_block = store.block("Disease")
+drug_names = drug_block.names()
+disease_names = disease_block.names()
 
-# Separate drugs and diseases
-drug_ids = [i for i,e in enumerate(entities) if e.startswith("Compound::")]
-disease_ids = [i for i,e in enumerate(entities) if e.startswith("Disease::")]
-
-print(f"Found {len(drug_ids)} drugs, {len(disease_ids)} diseases")
-
-drug_emb = entity_emb[drug_ids]
-disease_emb = entity_emb[disease_ids]
+print(f"Found {len(drug_block)} drugs, {len(disease_block)} diseases")
 
 BLOCK = 1000
 OUT = "data/global_scores.csv"
@@ -32,14 +27,13 @@ with open(OUT, "a") as fout:
     if write_header:
         fout.write("drug,disease,score\n")
 
-    for i in tqdm(range(0, len(drug_emb), BLOCK), desc="Computing blocks"):
-        d_block = drug_emb[i:i+BLOCK]
-        scores = cosine_similarity(d_block, disease_emb)
+    for i in tqdm(range(0, len(drug_block), BLOCK), desc="Computing blocks"):
+        scores = drug_block.cosine(disease_block, slice(i, i+BLOCK))
 
         for di in range(scores.shape[0]):
-            drug_name = entities[drug_ids[i + di]]
+            drug_name = drug_names[i + di]
             for dj in range(scores.shape[1]):
-                disease_name = entities[disease_ids[dj]]
+                disease_name = disease_names[dj]
                 fout.write(f"{drug_name},{disease_name},{scores[di, dj]:.6f}\n")
 
         fout.flush()
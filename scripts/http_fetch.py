@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Shared plumbing for the fetch scripts:
+
+ - KVCache: persistent SQLite cache of JSON values, by namespace and key,
+   with optional expiry (max_age in seconds)
+ - TokenBucket: thread-safe rate limiter (rate requests/s, bursts up to burst)
+ - PooledFetcher: one pooled requests.Session shared by worker threads, with
+   rate limiting, retry with exponential backoff (honouring Retry-After) and
+   the response cache in front
+
+Import from sibling scripts (scripts/ is on sys.path when they are run as
+`python scripts/<name>.py`).
+"""
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE = Path("data") / "cache" / "fetch_cache.sqlite"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def cache_key(*parts):
+    """Stable key for a request: sha256 of its JSON-encoded parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class KVCache:
+    """SQLite-backed {namespace, key} -> JSON store shared by threads."""
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=60)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS kv (ns TEXT, key TEXT, value TEXT, "
+                               "fetched_at REAL, PRIMARY KEY (ns, key))")
+            self._conn.commit()
+
+    def get(self, ns, key, max_age=None):
+        return self.get_many(ns, [key], max_age).get(key)
+
+    def get_many(self, ns, keys, max_age=None):
+        """{key: value} for the keys present (and not older than max_age)."""
+        keys = list(dict.fromkeys(keys))
+        out = {}
+        min_time = time.time() - max_age if max_age else 0
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM kv WHERE ns = ? AND fetched_at >= ? AND key IN ({','.join('?' * len(chunk))})",
+                    [ns, min_time, *chunk]).fetchall()
+                out.update((k, json.loads(v)) for k, v in rows)
+        return out
+
+    def put(self, ns, key, value):
+        self.put_many(ns, {key: value})
+
+    def put_many(self, ns, items):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO kv VALUES (?, ?, ?, ?)",
+                                   [(ns, k, json.dumps(v), now) for k, v in items.items()])
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TokenBucket:
+    """Allow on average `rate` acquisitions per second, with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchError(RuntimeError):
+    pass
+
+
+class PooledFetcher:
+    """Rate-limited, retrying, cached JSON requests over one pooled session."""
+
+    def __init__(self, rate=5.0, burst=None, workers=8, max_retries=5, backoff=1.0, timeout=60,
+                 cache=None, namespace="http", max_age=None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.bucket = TokenBucket(rate, burst)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.namespace = namespace
+        self.max_age = max_age
+        self.stats = {"cached": 0, "fetched": 0, "retries": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def request_json(self, method, url, params=None, payload=None, validate=None):
+        """
+        Parsed JSON response; served from the cache when present, else fetched with retries.
+        validate(body) returns an error text for a 200 body that must not be kept
+        (e.g. a GraphQL error); such bodies raise FetchError and are never cached,
+        so the next run asks the server again.
+        """
+        key = cache_key(method, url, params, payload)
+        if self.cache is not None:
+            hit = self.cache.get(self.namespace, key, self.max_age)
+            if hit is not None and (validate is None or validate(hit) is None):
+                self._count("cached")
+                return hit
+        last, attempts = None, 0
+        for attempt in range(self.max_retries + 1):
+            attempts += 1
+            self.bucket.acquire()
+            try:
+                r = self.session.request(method, url, params=params, json=payload, timeout=self.timeout)
+                if r.status_code == 200:
+                    data = r.json()
+                    error = validate(data) if validate is not None else None
+                    if error is not None:
+                        self._count("failed")
+                        raise FetchError(f"{method} {url}: {error}")
+                    if self.cache is not None:
+                        self.cache.put(self.namespace, key, data)
+                    self._count("fetched")
+                    return data
+                last = f"HTTP {r.status_code}"
+                if r.status_code not in RETRY_STATUS:
+                    break
+                retry_after = r.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+            except (requests.ConnectionError, requests.Timeout, ValueError) as e:
+                last = f"{type(e).__name__}: {e}"
+                delay = None
+            if attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(delay if delay is not None else self.backoff * 2 ** attempt * (0.5 + random.random()))
+        self._count("failed")
+        raise FetchError(f"{method} {url} failed after {attempts} attempt(s): {last}")
+
+    def post_json(self, url, payload, validate=None):
+        return self.request_json("POST", url, payload=payload, validate=validate)
+
+    def get_json(self, url, params=None, validate=None):
+        return self.request_json("GET", url, params=params, validate=validate)
+
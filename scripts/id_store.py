@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Local gene / protein identifier store.
+
+Built once from the raw files in data/raw and saved to data/layers/id_store/
+(genes.parquet: one row per gene; ids.parquet: every known identifier of a gene
+as (gene, id_type, id_value, key, source) rows):
+
+ - human_genes_info (NCBI gene_info): GeneID, symbol, synonyms, full name, Ensembl / HGNC xrefs
+ - 9606.protein.aliases*.txt.gz (STRING, via the string_aliases index): STRING
+   protein IDs, linked to genes by Entrez ID, Ensembl gene or preferred symbol,
+   plus their UniProt accessions
+ - Ensembl2Reactome.txt: human Ensembl IDs with Reactome annotations
+ - chembl_moa.tsv: UniProt accession, ChEMBL target ID and protein name
+
+Lookups are vectorized over whole columns and never touch the network:
+
+    store = IDStore.open()
+    store.map(df["gene_symbol"], "symbol", "ensembl")
+    store.map(names, ("symbol", "synonym", "name"), "symbol")   # first matching ID type wins
+
+IDStore.open() rebuilds the saved store whenever one of those raw files
+appears, disappears or changes (meta.json records their mtimes and sizes).
+
+Build / rebuild:
+python scripts/id_store.py --raw data/raw --out data/layers/id_store
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from string_aliases import StringAliasIndex
+
+RAW = Path("data") / "raw"
+DEFAULT_STORE = Path("data") / "layers" / "id_store"
+STORE_VERSION = 1
+
+ID_TYPES = ("symbol", "ncbi", "ensembl", "uniprot", "string", "hgnc", "chembl_target",
+            "synonym", "protein_name", "name")
+# free-text identifiers are matched case-insensitively
+TEXT_TYPES = {"symbol", "synonym", "protein_name", "name"}
+# which identifier wins when linking records from another source to an existing gene
+LINK_PRIORITY = {"ncbi": 0, "ensembl": 1, "uniprot": 2, "hgnc": 3, "symbol": 4}
+
+GENE_COLUMNS = ["gene", "symbol", "ncbi", "description", "type_of_gene"]
+ID_COLUMNS = ["gene", "id_type", "id_value", "key", "source"]
+
+
+def source_files(raw_dir=RAW):
+    """The raw input files present in raw_dir, in build order."""
+    raw_dir = Path(raw_dir)
+    alias_files = sorted(raw_dir.glob("9606.protein.aliases*.txt.gz"))
+    files = [raw_dir / "human_genes_info", *alias_files[:1], raw_dir / "Ensembl2Reactome.txt",
+             raw_dir / "chembl_moa.tsv"]
+    return [f for f in files if f.exists()]
+
+
+def _signature(raw_dir=RAW):
+    files = {}
+    for f in source_files(raw_dir):
+        stat = os.stat(f)
+        files[f.name] = [stat.st_mtime_ns, stat.st_size]
+    return {"version": STORE_VERSION, "files": files}
+
+
+def normalize(values, id_type):
+    """Lookup keys for raw identifier values (stripped; upper-cased for text types)."""
+    s = pd.Series(values, dtype=object).astype("string").str.strip()
+    return s.str.upper() if id_type in TEXT_TYPES else s
+
+
+def _id_rows(gene, id_type, values, source):
+    df = pd.DataFrame({"gene": np.asarray(gene, dtype=np.int64), "id_value": pd.Series(values, dtype=object).values})
+    df = df[df["id_value"].notna() & (df["id_value"].astype(str).str.strip() != "")]
+    df["id_type"] = id_type
+    df["key"] = normalize(df["id_value"], id_type).values
+    df["source"] = source
+    return df[ID_COLUMNS]
+
+
+def read_ncbi(path):
+    """Gene rows and identifier rows from an NCBI gene_info file."""
+    cols = ["tax_id", "GeneID", "Symbol", "Synonyms", "dbXrefs", "description", "type_of_gene"]
+    df = pd.read_csv(path, sep="\t", names=cols, usecols=[0, 1, 2, 4, 5, 8, 9], dtype=str, comment="#")
+    df = df[df["tax_id"].isna() | (df["tax_id"] == "9606")].reset_index(drop=True)
+    gene = np.arange(len(df))
+    genes = pd.DataFrame({"gene": gene, "symbol": df["Symbol"], "ncbi": df["GeneID"],
+                          "description": df["description"], "type_of_gene": df["type_of_gene"]})
+    parts = [_id_rows(gene, "symbol", df["Symbol"], "ncbi"),
+             _id_rows(gene, "ncbi", df["GeneID"], "ncbi"),
+             _id_rows(gene, "name", df["description"].where(df["description"] != "-"), "ncbi")]
+    syn = df["Synonyms"].str.split("|").explode()
+    parts.append(_id_rows(syn.index, "synonym", syn.where(syn != "-"), "ncbi"))
+    xref = df["dbXrefs"].str.split("|").explode().dropna()
+    for prefix, id_type in (("Ensembl:", "ensembl"), ("HGNC:", "hgnc")):
+        hit = xref[xref.str.startswith(prefix)]
+        parts.append(_id_rows(hit.index, id_type, hit.str.slice(len(prefix)), "ncbi"))
+    return genes, pd.concat(parts, ignore_index=True)
+
+
+def classify_string_alias(alias, source):
+    """ID type of each STRING alias (by its source column), None for the ones the store does not keep."""
+    src = source.str.lower()
+    out = pd.Series(None, index=alias.index, dtype=object)
+    out[src.str.contains("entrez") & alias.str.fullmatch(r"\d+")] = "ncbi"
+    out[alias.str.match(r"ENSG\d+")] = "ensembl"
+    out[src.str.contains("uniprot_ac")] = "uniprot"
+    out[alias.str.startswith("HGNC:")] = "hgnc"
+    return out
+
+
+def read_string_aliases(path):
+    """
+    (string, id_type, id_value) rows linking STRING proteins to genes: the
+    preferred symbol of each protein plus its Entrez / Ensembl / UniProt / HGNC
+    aliases, from the persisted STRING alias index (built on first use).
+    """
+    index = StringAliasIndex.open(path)
+    aliases = index.aliases
+    id_type = classify_string_alias(aliases["alias"], aliases["source"].astype(str))
+    keep = id_type.notna().to_numpy()
+    df = pd.concat([
+        pd.DataFrame({"string": index.preferred["string_id"], "id_type": "symbol", "id_value": index.preferred["symbol"]}),
+        pd.DataFrame({"string": aliases["string_id"].astype(str).to_numpy()[keep], "id_type": id_type[keep].to_numpy(),
+                      "id_value": aliases["alias"].to_numpy()[keep]})], ignore_index=True)
+    return df.drop_duplicates(ignore_index=True)
+
+
+def read_reactome_ensembl(path):
+    """Unique human Ensembl IDs of an Ensembl2Reactome mapping file."""
+    df = pd.read_csv(path, sep="\t", header=None, dtype=str)
+    human = df.eq("Homo sapiens").any(axis=1)
+    return df.loc[human, 0].drop_duplicates().tolist()
+
+
+def read_chembl_moa(path):
+    """uniprot / chembl_target / protein_name columns of chembl_moa.tsv (header or positional)."""
+    df = pd.read_csv(path, sep="\t", dtype=str, comment="#").fillna("")
+    if "uniprot_id" not in df.columns:
+        df = df.iloc[:, :3].set_axis(["uniprot_id", "target_chembl_id", "protein_name"], axis=1)
+    return pd.DataFrame({col: df[col] if col in df.columns else "" for col in
+                         ("uniprot_id", "target_chembl_id", "protein_name")})
+
+
+class IDStore:
+    """Gene table plus a long identifier table, indexed per ID type on first use."""
+
+    def __init__(self, genes, ids):
+        self.genes = genes.reset_index(drop=True)
+        self.ids = ids.reset_index(drop=True)
+        # raw files the store was built from (see _signature)
+        self.signature = None
+        self._index = {}
+        self._primary = {}
+
+    def __len__(self):
+        return len(self.genes)
+
+    # ---------- building ----------
+
+    @classmethod
+    def build(cls, raw_dir=RAW):
+        """Merge all raw sources present in raw_dir into one store."""
+        raw_dir = Path(raw_dir)
+        genes = pd.DataFrame(columns=GENE_COLUMNS)
+        ids = pd.DataFrame(columns=ID_COLUMNS)
+        store = cls(genes, ids)
+
+        ncbi = raw_dir / "human_genes_info"
+        if ncbi.exists():
+            store = cls(*read_ncbi(ncbi))
+            print(f"NCBI: {len(store)} genes")
+        else:
+            print(f"[WARN] {ncbi} not found; the store has no NCBI genes.", file=sys.stderr)
+
+        alias_files = sorted(raw_dir.glob("9606.protein.aliases*.txt.gz"))
+        if alias_files:
+            aliases = read_string_aliases(alias_files[0])
+            units = aliases["string"].drop_duplicates().tolist()
+            store._attach(units, aliases.rename(columns={"string": "unit"}), "string")
+            print(f"STRING: {len(units)} proteins from {alias_files[0].name}")
+        else:
+            print("[WARN] No STRING alias file found; STRING IDs will not resolve.", file=sys.stderr)
+
+        reactome = raw_dir / "Ensembl2Reactome.txt"
+        if reactome.exists():
+            ens = read_reactome_ensembl(reactome)
+            store._attach(ens, pd.DataFrame({"unit": ens, "id_type": "ensembl", "id_value": ens}), "reactome",
+                          own_id=None)
+            print(f"Reactome: {len(ens)} human Ensembl IDs")
+
+        moa = raw_dir / "chembl_moa.tsv"
+        if moa.exists():
+            df = read_chembl_moa(moa)
+            df = df[df["uniprot_id"] != ""].drop_duplicates()
+            units = df["uniprot_id"].drop_duplicates().tolist()
+            cand = pd.concat([
+                pd.DataFrame({"unit": df["uniprot_id"], "id_type": id_type, "id_value": df[col]})
+                for id_type, col in (("uniprot", "uniprot_id"), ("chembl_target", "target_chembl_id"),
+                                     ("protein_name", "protein_name"))], ignore_index=True)
+            store._attach(units, cand[cand["id_value"] != ""], "chembl", own_id=None)
+            print(f"ChEMBL MoA: {len(units)} UniProt accessions")
+        store.signature = _signature(raw_dir)
+        return store
+
+    def _attach(self, units, cand, source, own_id="string"):
+        """
+        Link each unit (a STRING protein, a UniProt accession, ...) to an existing
+        gene through its candidate identifiers (cand: unit, id_type, id_value),
+        creating a new gene for units that match nothing, and record all of the
+        unit's identifiers (plus the unit itself as own_id) under that gene.
+        """
+        cand = cand.assign(key=lambda d: [None] * len(d))
+        for id_type in cand["id_type"].unique():
+            m = (cand["id_type"] == id_type).to_numpy()
+            cand.loc[m, "key"] = normalize(cand.loc[m, "id_value"], id_type).values
+        linkable = cand[cand["id_type"].isin(list(LINK_PRIORITY))]
+        rows = np.full(len(linkable), -1, dtype=np.int64)
+        for id_type in linkable["id_type"].unique():
+            m = (linkable["id_type"] == id_type).to_numpy()
+            rows[m] = self.gene_rows(linkable.loc[m, "key"], id_type, normalized=True)
+        hits = linkable.assign(gene=rows, rank=linkable["id_type"].map(LINK_PRIORITY))
+        hits = hits[hits["gene"] >= 0].sort_values(["rank"], kind="stable").drop_duplicates("unit")
+        gene_of = pd.Series(hits["gene"].to_numpy(), index=hits["unit"].to_numpy())
+
+        units = pd.Index(pd.unique(pd.Series(units, dtype=object)))
+        gene = gene_of.reindex(units).to_numpy(dtype=float, copy=True)
+        new = np.isnan(gene)
+        gene[new] = len(self.genes) + np.arange(int(new.sum()))
+        gene = gene.astype(np.int64)
+        if new.any():
+            sym = cand[cand["id_type"] == "symbol"].drop_duplicates("unit").set_index("unit")["id_value"]
+            self.genes = pd.concat([self.genes, pd.DataFrame({
+                "gene": gene[new], "symbol": sym.reindex(units[new]).to_numpy(),
+                "ncbi": None, "description": None, "type_of_gene": None})], ignore_index=True)
+
+        unit_gene = pd.Series(gene, index=units)
+        parts = [pd.DataFrame({"gene": unit_gene.reindex(cand["unit"]).to_numpy(),
+                               "id_type": cand["id_type"].to_numpy(), "id_value": cand["id_value"].to_numpy(),
+                               "key": cand["key"].to_numpy(), "source": source})]
+        if own_id:
+            parts.append(_id_rows(gene, own_id, units, source))
+        self.ids = pd.concat([self.ids] + parts, ignore_index=True).drop_duplicates(
+            ["gene", "id_type", "key", "source"], ignore_index=True)
+        self._index.clear()
+        self._primary.clear()
+
+    # ---------- persistence ----------
+
+    def save(self, path=DEFAULT_STORE):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        genes = self.genes.astype({"gene": np.int64})
+        ids = self.ids.astype({"gene": np.int64, "id_type": "category", "source": "category"})
+        genes.to_parquet(path / "genes.parquet", index=False)
+        ids.to_parquet(path / "ids.parquet", index=False)
+        (path / "meta.json").write_text(json.dumps(self.signature))
+
+    @classmethod
+    def load(cls, path=DEFAULT_STORE):
+        path = Path(path)
+        ids = pd.read_parquet(path / "ids.parquet")
+        ids["id_type"] = ids["id_type"].astype(object)
+        store = cls(pd.read_parquet(path / "genes.parquet"), ids)
+        meta = path / "meta.json"
+        store.signature = json.loads(meta.read_text()) if meta.exists() else None
+        return store
+
+    @classmethod
+    def open(cls, path=DEFAULT_STORE, raw_dir=RAW):
+        """Saved store, (re)built first if it is missing or the raw files in raw_dir changed since."""
+        meta = Path(path) / "meta.json"
+        if (Path(path) / "ids.parquet").exists():
+            # no raw files (cleaned up after the build) or unchanged ones: keep the saved store
+            if not source_files(raw_dir) or (meta.exists() and json.loads(meta.read_text()) == _signature(raw_dir)):
+                return cls.load(path)
+            print(f"Raw files in {raw_dir} changed since the ID store was built; rebuilding...")
+        else:
+            print(f"Building ID store from {raw_dir} (one time)...")
+        store = cls.build(raw_dir)
+        store.save(path)
+        return store
+
+    # ---------- lookups ----------
+
+    def _type_index(self, id_type):
+        """(key index, gene per key) for one ID type; the first gene recorded for a key wins."""
+        if id_type not in self._index:
+            sub = self.ids[self.ids["id_type"] == id_type].drop_duplicates("key")
+            self._index[id_type] = (pd.Index(sub["key"].to_numpy(dtype=object)), sub["gene"].to_numpy(np.int64))
+        return self._index[id_type]
+
+    def gene_rows(self, values, id_types, normalized=False):
+        """Gene row of every value (-1 if unknown), trying the given ID type(s) in order."""
+        id_types = (id_types,) if isinstance(id_types, str) else tuple(id_types)
+        raw = pd.Series(values, dtype=object).reset_index(drop=True)
+        out = np.full(len(raw), -1, dtype=np.int64)
+        for id_type in id_types:
+            todo = out < 0
+            if not todo.any():
+                break
+            keys, genes = self._type_index(id_type)
+            if not len(keys):
+                continue
+            k = raw[todo] if normalized else normalize(raw[todo], id_type)
+            pos = keys.get_indexer(k.astype(object).where(k.notna(), None))
+            out[np.flatnonzero(todo)] = np.where(pos >= 0, genes[pos], -1)
+        return out
+
+    def primary(self, id_type):
+        """One value of id_type per gene row (the first recorded), None where the gene has none."""
+        if id_type not in self._primary:
+            out = np.full(len(self.genes), None, dtype=object)
+            if id_type in ("symbol", "ncbi"):
+                col = self.genes[id_type]
+                out[:] = col.astype(object).where(col.notna(), None).to_numpy()
+            sub = self.ids[self.ids["id_type"] == id_type].drop_duplicates("gene")
+            gene = sub["gene"].to_numpy(dtype=np.int64)
+            missing = pd.isna(out[gene])
+            out[gene[missing]] = sub["id_value"].to_numpy(dtype=object)[missing]
+            self._primary[id_type] = out
+        return self._primary[id_type]
+
+    def map(self, values, from_types, to_type="symbol"):
+        """Translate values of from_types (one type or several, tried in order) to to_type; None if unknown."""
+        rows = self.gene_rows(values, from_types)
+        out = np.full(len(rows), None, dtype=object)
+        ok = rows >= 0
+        out[ok] = self.primary(to_type)[rows[ok]]
+        return out
+
+    def genes_with(self, id_type, source=None):
+        """(gene row, id_value) frame of the identifiers of one type, optionally from one source."""
+        m = self.ids["id_type"] == id_type
+        if source is not None:
+            m &= self.ids["source"] == source
+        return self.ids.loc[m, ["gene", "id_value"]].reset_index(drop=True)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--raw", default=str(RAW))
+    p.add_argument("--out", default=str(DEFAULT_STORE))
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    t0 = time.time()
+    store = IDStore.build(args.raw)
+    store.save(args.out)
+    counts = store.ids["id_type"].value_counts().to_dict()
+    print(f"Saved ID store with {len(store)} genes and {len(store.ids)} identifiers → {args.out} "
+          f"({time.time() - t0:.1f}s)")
+    print(counts)
@@ -1,22 +1,14 @@
 import pandas as pd
-import mygene
 
-mg = mygene.MyGeneInfo()
+from id_store import IDStore
 
-df = pd.read_csv("data/layers/drug_targets.csv", dtype=str).fillna("")
+store = IDStore.open()
 
-# Query mygene: convert full gene names → official symbols
-results = mg.querymany(
-    df["gene_symbol"].tolist(),
-    scopes="name,alias",
-    fields="symbol",
-    species="human",
-    as_dataframe=True
-)
+df = pd.read_csv("data/layers/drug_targets.csv", dtype=str).fillna("")
 
-# Merge results
-mapped = df.join(results["symbol"], how="left")
-mapped = mapped.rename(columns={"symbol": "gene_symbol_clean"})
+# Convert full gene / protein names and aliases → official symbols (local, no network)
+mapped = df.copy()
+mapped["gene_symbol_clean"] = store.map(df["gene_symbol"], ("symbol", "synonym", "name", "protein_name"), "symbol")
 
 mapped.to_csv("data/layers/drug_targets_normalized.csv", index=False)
 print("Saved → data/layers/drug_targets_normalized.csv")
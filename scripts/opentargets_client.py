@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Open Targets GraphQL client: top disease associations per Ensembl gene,
+fetched through http_fetch.PooledFetcher (pooled session, token
+bucket, retries, SQLite response cache).
+
+Point OT_GRAPHQL_URL at a local stub server (e.g. a ThreadingHTTPServer
+returning canned GraphQL JSON) to test without the network.
+"""
+import os
+
+
+OT_GRAPHQL_URL = os.environ.get("OT_GRAPHQL_URL", "https://platform.opentargets.org/api/v4/graphql")
+
+# GraphQL query to get top disease associations for a gene (by ensembl id)
+ASSOCIATIONS_QUERY = '''
+query getAssociations($ensg:String!, $size:Int!) {
+  target(ensemblId: $ensg) {
+    id
+    approvedSymbol
+    associations(diseaseType: DISEASE, size: $size) {
+      count
+      rows {
+        disease {
+          id
+          name
+        }
+        score
+      }
+    }
+  }
+}
+'''
+
+
+def graphql_error(body):
+    """Error text of a GraphQL response that carries errors and no data, else None."""
+    if body.get("errors") and not body.get("data"):
+        return f"GraphQL error: {body['errors']}"
+    return None
+
+
+def fetch_gene_associations(fetcher, ensg, size=50, url=None):
+    """Association rows [(disease_id, disease_name, score)] for one gene; [] if the target is unknown."""
+    payload = {"query": ASSOCIATIONS_QUERY, "variables": {"ensg": ensg, "size": size}}
+    # error bodies are rejected before they reach the response cache
+    body = fetcher.post_json(url or OT_GRAPHQL_URL, payload, validate=graphql_error)
+    target = (body.get("data") or {}).get("target")
+    if not target:
+        return []
+    rows = (target.get("associations") or {}).get("rows") or []
+    return [(r["disease"]["id"], r["disease"]["name"], float(r.get("score") or 0.0)) for r in rows]
+
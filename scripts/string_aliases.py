@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Persisted index of the STRING protein alias file (9606.protein.aliases*.txt.gz).
+
+The gzip is parsed once, in chunks, into data/layers/string_aliases/:
+ - aliases.parquet: every (string_id, alias, source) row, dictionary-encoded
+ - preferred.parquet: one preferred gene symbol per STRING ID
+ - meta.json: version, mtime and size of the alias file it was built from
+
+and rebuilt only when the alias file changes. The preferred symbols load in
+milliseconds; the full alias table is read on first use.
+
+Preferred symbol: the first alias from the highest-ranked symbol source
+(SYMBOL_SOURCES), else the first alias that looks like a gene symbol.
+
+Usage:
+python scripts/string_aliases.py --aliases data/raw/9606.protein.aliases.v12.0.txt.gz
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAW = Path("data") / "raw"
+DEFAULT_INDEX = Path("data") / "layers" / "string_aliases"
+INDEX_VERSION = 1
+
+# alias sources naming the gene symbol, best first (matched as lower-case substrings)
+SYMBOL_SOURCES = ("ensembl_hgnc_symbol", "biomart_hugo", "ensembl_hgnc", "uniprot_gn_name", "ensembl_genename")
+SYMBOL_PATTERN = r"[A-Z0-9\-]{2,10}"
+
+
+def find_alias_file(raw_dir=RAW):
+    files = sorted(Path(raw_dir).glob("9606.protein.aliases*.txt.gz"))
+    return files[0] if files else None
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return {"version": INDEX_VERSION, "file": Path(path).name, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def read_alias_file(path, chunksize=2_000_000):
+    """(string_id, alias, source) frame of the whole alias file, read in chunks."""
+    parts = []
+    with gzip.open(path, "rt", errors="ignore") as fh:
+        for chunk in pd.read_csv(fh, sep="\t", header=None, names=["string_id", "alias", "source"],
+                                 usecols=[0, 1, 2], dtype=str, quoting=3, chunksize=chunksize,
+                                 on_bad_lines="skip"):
+            parts.append(chunk[~chunk["string_id"].str.startswith("#") & chunk["alias"].notna()])
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["string_id", "alias", "source"])
+    return df.astype({"string_id": "category", "source": "category"})
+
+
+def symbol_rank(aliases):
+    """Rank of each alias as the symbol of its protein (lower is better, -1 = not a symbol)."""
+    src = aliases["source"].astype(str).str.lower()
+    rank = np.full(len(aliases), -1, dtype=np.int16)
+    for r, pattern in reversed(list(enumerate(SYMBOL_SOURCES))):
+        rank[src.str.contains(pattern, regex=False).to_numpy()] = r
+    heuristic = (rank < 0) & aliases["alias"].str.fullmatch(SYMBOL_PATTERN).fillna(False).to_numpy()
+    rank[heuristic] = len(SYMBOL_SOURCES)
+    return rank
+
+
+def preferred_symbols(aliases):
+    """One preferred symbol per STRING ID (string_id, symbol, source)."""
+    rank = symbol_rank(aliases)
+    ok = rank >= 0
+    cand = aliases.loc[ok, ["string_id", "alias", "source"]].assign(rank=rank[ok], order=np.flatnonzero(ok))
+    best = cand.sort_values(["rank", "order"], kind="stable").drop_duplicates("string_id")
+    best = best.sort_values("order", kind="stable")
+    return pd.DataFrame({"string_id": best["string_id"].astype(str).to_numpy(),
+                         "symbol": best["alias"].to_numpy(), "source": best["source"].astype(str).to_numpy()})
+
+
+class StringAliasIndex:
+    """Preferred symbol per STRING ID plus the full alias table, with vectorized lookups."""
+
+    def __init__(self, preferred, aliases=None, path=None):
+        self.preferred = preferred.reset_index(drop=True)
+        self._ids = pd.Index(self.preferred["string_id"].to_numpy(dtype=object))
+        self._symbols = self.preferred["symbol"].to_numpy(dtype=object)
+        self._aliases = aliases
+        self._alias_index = None
+        self.path = Path(path) if path else None
+
+    def __len__(self):
+        return len(self.preferred)
+
+    @classmethod
+    def build(cls, alias_file, path=DEFAULT_INDEX):
+        """Parse alias_file and save the index under path."""
+        aliases = read_alias_file(alias_file)
+        preferred = preferred_symbols(aliases)
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        aliases.to_parquet(path / "aliases.parquet", index=False)
+        preferred.to_parquet(path / "preferred.parquet", index=False)
+        (path / "meta.json").write_text(json.dumps(_signature(alias_file)))
+        return cls(preferred, aliases, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX):
+        path = Path(path)
+        return cls(pd.read_parquet(path / "preferred.parquet"), path=path)
+
+    @classmethod
+    def open(cls, alias_file=None, path=DEFAULT_INDEX, raw_dir=RAW):
+        """Saved index for alias_file (default: the alias file in raw_dir), rebuilt if the file changed."""
+        alias_file = alias_file or find_alias_file(raw_dir)
+        meta = Path(path) / "meta.json"
+        if alias_file is None:
+            if meta.exists():
+                return cls.load(path)
+            raise FileNotFoundError(f"No 9606.protein.aliases*.txt.gz in {raw_dir} and no index at {path}")
+        if meta.exists() and json.loads(meta.read_text()) == _signature(alias_file):
+            return cls.load(path)
+        print(f"Indexing STRING aliases from {alias_file} (one time)...")
+        return cls.build(alias_file, path)
+
+    @property
+    def aliases(self):
+        """Full (string_id, alias, source) table."""
+        if self._aliases is None:
+            self._aliases = pd.read_parquet(self.path / "aliases.parquet")
+        return self._aliases
+
+    def to_symbol(self, string_ids):
+        """Preferred symbol of every STRING ID (None if unknown)."""
+        pos = self._ids.get_indexer(pd.Index(string_ids, dtype=object))
+        out = np.full(len(pos), None, dtype=object)
+        out[pos >= 0] = self._symbols[pos[pos >= 0]]
+        return out
+
+    def from_alias(self, aliases):
+        """STRING ID of every alias (None if unknown); preferred symbols win over other aliases."""
+        if self._alias_index is None:
+            table = pd.concat([self.preferred[["symbol", "string_id"]].set_axis(["alias", "string_id"], axis=1),
+                               self.aliases[["alias", "string_id"]].astype(str)], ignore_index=True)
+            table = table.drop_duplicates("alias")
+            self._alias_index = (pd.Index(table["alias"].to_numpy(dtype=object)),
+                                 table["string_id"].to_numpy(dtype=object))
+        index, ids = self._alias_index
+        pos = index.get_indexer(pd.Index(aliases, dtype=object))
+        out = np.full(len(pos), None, dtype=object)
+        out[pos >= 0] = ids[pos[pos >= 0]]
+        return out
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--aliases", default=None, help="STRING alias gzip (default: the one in data/raw)")
+    p.add_argument("--out", default=str(DEFAULT_INDEX))
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    alias_file = args.aliases or find_alias_file()
+    if alias_file is None:
+        print(f"[WARN] No STRING alias file found in {RAW}.", file=sys.stderr)
+        sys.exit(1)
+    t0 = time.time()
+    index = StringAliasIndex.build(alias_file, args.out)
+    print(f"Indexed {len(index.aliases)} aliases of {len(index)} STRING proteins → {args.out} "
+          f"({time.time() - t0:.1f}s)")
+    t0 = time.time()
+    StringAliasIndex.load(args.out)
+    print(f"Preferred symbols load in {1000 * (time.time() - t0):.1f} ms")
@@ -19,6 +19,8 @@ except Exception:
         print("Could not import TriplesFactory from pykeen:", e, file=sys.stderr)
         raise
 
+from triples_cache import MappedTriples
+
 ROOT = Path.cwd()
 TRIPLES = ROOT / "data" / "kg_triples.csv"
 MODEL_DIR = ROOT / "models" / "complex-model"
@@ -27,18 +29,9 @@ ARTIFACTS.mkdir(exist_ok=True, parents=True)
 
 def build_triples_factory(path: Path):
     print("Building TriplesFactory from", path)
-    # pykeen expects triples as tab/space/comma-separated head relation tail
-    # we will use pandas to load and then TriplesFactory.from_labeled_triples
-    df = pd.read_csv(path, dtype=str)
-    if {'head','relation','tail'}.issubset(df.columns):
-        triples = df[['head','relation','tail']].values
-    else:
-        # fallback: assume three columns in order
-        triples = df.values[:, :3]
-    # convert to list of tuples
-    triples = [tuple(map(str, t)) for t in triples]
+    # integer-mapped arrays cached by file hash (scripts/triples_cache.py); no per-row relabeling
     try:
-        tf = TriplesFactory.from_labeled_triples(triples)
+        tf = MappedTriples.open(path).triples_factory()
     except Exception:
         # some pykeen versions accept from_path
         try:
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Parallel PyKEEN training sweep with cached results.
+
+Trains every configuration of a sweep (model, embedding dim, epochs, loss,
+learning rate, batch size, seed) in parallel CPU processes. Each worker is limited
+to --threads torch/BLAS threads and is started fresh for every configuration,
+so its peak memory is that configuration's own. Workers load the ID-mapped
+triples from the triples cache (scripts/triples_cache.py) and split them with
+the same seed, so all configurations share one train/validation/test split.
+
+A finished configuration writes models/sweep/<key>/result.json, keyed by the
+configuration, the split and the triples file; rerunning skips it, failed
+configurations are retried. The comparison table (wall time, peak RSS, MRR,
+Hits@k) is written to artifacts/train_sweep.csv.
+
+Usage:
+python scripts/train_sweep.py --models ComplEx TransE --dims 64 128 --epochs 50 --lrs 1e-3 1e-2 --workers 4
+python scripts/train_sweep.py --configs sweep.json --workers 8 --threads 2 --save_models
+
+sweep.json is a list of configurations; missing fields take DEFAULT_CONFIG:
+[{"model": "ComplEx", "dim": 128, "epochs": 100, "loss": "BCEWithLogitsLoss", "lr": 0.001}]
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing as mp
+import multiprocessing.connection as mp_connection
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from triples_cache import CACHE_ROOT, MappedTriples
+
+TRIPLES = Path("data") / "kg_triples.csv"
+SWEEP_ROOT = Path("models") / "sweep"
+OUT = Path("artifacts") / "train_sweep.csv"
+
+DEFAULT_CONFIG = {"model": "ComplEx", "dim": 64, "epochs": 10, "loss": None, "lr": 1e-3,
+                  "batch_size": 256, "seed": 42}
+# table column -> pykeen metric name (test split, both sides, realistic ranks)
+METRICS = {"mrr": "mean_reciprocal_rank", "hits_at_1": "hits_at_1", "hits_at_3": "hits_at_3",
+           "hits_at_10": "hits_at_10"}
+THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def config_key(cfg, triples_hash, split, split_seed):
+    blob = json.dumps({"config": cfg, "triples": triples_hash, "split": split, "split_seed": split_seed},
+                      sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def expand_grid(models, dims, epochs, losses, lrs, batch_sizes, seeds):
+    return [dict(zip(("model", "dim", "epochs", "loss", "lr", "batch_size", "seed"), values))
+            for values in itertools.product(models, dims, epochs, losses, lrs, batch_sizes, seeds)]
+
+
+def load_configs(path):
+    with open(path) as f:
+        configs = json.load(f)
+    unknown = {k for cfg in configs for k in cfg} - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"{path}: unknown config fields {sorted(unknown)}")
+    return [{**DEFAULT_CONFIG, **cfg} for cfg in configs]
+
+
+def _write_json(path, obj):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(obj, indent=2))
+    os.replace(tmp, path)
+
+
+def train_config(cfg, key, triples_path, run_dir, threads, split, split_seed, save_model):
+    """Train one configuration in this (fresh) worker process; returns its result record."""
+    import torch
+    from pykeen.pipeline import pipeline
+
+    torch.set_num_threads(threads)
+    run_dir = Path(run_dir)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    tf = MappedTriples.load(triples_path).triples_factory()
+    training, validation, testing = tf.split(split, random_state=split_seed)
+    kwargs = {}
+    if cfg["loss"]:
+        kwargs["loss"] = cfg["loss"]
+    result = pipeline(
+        training=training,
+        validation=validation,
+        testing=testing,
+        model=cfg["model"],
+        model_kwargs=dict(embedding_dim=cfg["dim"]),
+        optimizer="Adam",
+        optimizer_kwargs=dict(lr=cfg["lr"]),
+        training_kwargs=dict(batch_size=cfg["batch_size"]),
+        epochs=cfg["epochs"],
+        random_seed=cfg["seed"],
+        device="cpu",
+        **kwargs,
+    )
+    wall = time.perf_counter() - t0
+    metrics = {}
+    for column, name in METRICS.items():
+        try:
+            metrics[column] = float(result.get_metric(name))
+        except Exception:
+            metrics[column] = None
+    if save_model:
+        result.save_to_directory(str(run_dir))
+    record = {"key": key, **cfg, "threads": threads, "wall_time_s": round(wall, 2),
+              "train_time_s": getattr(result, "train_seconds", None),
+              "eval_time_s": getattr(result, "evaluate_seconds", None),
+              # ru_maxrss is in KiB on Linux
+              "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+              **metrics, "finished": time.time()}
+    _write_json(run_dir / "result.json", record)
+    return record
+
+
+def _train_worker(conn, *args):
+    """Process target: send ("ok", record) or ("error", message) back to the parent."""
+    try:
+        conn.send(("ok", train_config(*args)))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def run_sweep(configs, triples_csv=TRIPLES, sweep_root=SWEEP_ROOT, workers=1, threads=None,
+              split=(0.8, 0.1, 0.1), split_seed=42, save_models=False, cache_root=CACHE_ROOT):
+    """Train the configurations not done yet; returns (records of all configurations, failed config rows)."""
+    triples = MappedTriples.open(triples_csv, cache_root)
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    sweep_root = Path(sweep_root)
+
+    jobs, records = {}, {}
+    for cfg in configs:
+        key = config_key(cfg, triples.path.name, list(split), split_seed)
+        done = sweep_root / key / "result.json"
+        if done.exists():
+            records[key] = json.loads(done.read_text())
+        else:
+            jobs[key] = cfg
+    print(f"{len(configs)} configurations: {len(records)} cached, {len(jobs)} to train "
+          f"({workers} workers x {threads} threads)")
+
+    # set before the workers start, so BLAS / OpenMP pools are sized at import
+    for var in THREAD_VARS:
+        os.environ[var] = str(threads)
+    failures = []
+    if jobs:
+        # one spawned process per configuration: no forked torch state, ru_maxrss is that configuration's
+        # own, and a worker killed by the OOM killer surfaces as a failed configuration
+        ctx = mp.get_context("spawn")
+        queue, running = list(jobs.items()), {}
+        while queue or running:
+            while queue and len(running) < workers:
+                key, cfg = queue.pop(0)
+                recv, send = ctx.Pipe(duplex=False)
+                proc = ctx.Process(target=_train_worker, args=(send, cfg, key, str(triples.path),
+                                                             str(sweep_root / key), threads, list(split),
+                                                             split_seed, save_models))
+                proc.start()
+                send.close()
+                running[recv] = (key, proc)
+            # a pipe is ready once the result arrives, or at EOF when the worker died without sending one
+            for recv in mp_connection.wait(list(running)):
+                key, proc = running.pop(recv)
+                try:
+                    status, value = recv.recv()
+                except EOFError:
+                    status, value = "error", None
+                recv.close()
+                proc.join()
+                if status == "ok":
+                    records[key] = r = value
+                    print(f"[done] {r['model']} dim={r['dim']} epochs={r['epochs']} lr={r['lr']}: "
+                          f"mrr={r['mrr']} in {r['wall_time_s']}s, {r['peak_rss_mb']} MB")
+                    continue
+                if value is None:
+                    value = f"worker exited with code {proc.exitcode}"
+                    if proc.exitcode is not None and proc.exitcode < 0:
+                        value += f" (signal {-proc.exitcode})"
+                failures.append({"key": key, **jobs[key], "threads": threads, "error": value})
+                print(f"[WARN] {jobs[key]} failed: {value}", file=sys.stderr)
+    return list(records.values()), failures
+
+
+def results_table(records, failures=()):
+    """One row per configuration, best MRR first; failed configurations keep their error."""
+    df = pd.DataFrame(list(records) + list(failures))
+    if "mrr" in df.columns:
+        df = df.sort_values("mrr", ascending=False, na_position="last", kind="stable")
+    return df.drop(columns=[c for c in ("finished",) if c in df.columns])
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--triples", default=str(TRIPLES))
+    p.add_argument("--configs", default=None, help="JSON list of configurations (instead of the grid flags)")
+    p.add_argument("--models", nargs="+", default=[DEFAULT_CONFIG["model"]])
+    p.add_argument("--dims", nargs="+", type=int, default=[DEFAULT_CONFIG["dim"]])
+    p.add_argument("--epochs", nargs="+", type=int, default=[DEFAULT_CONFIG["epochs"]])
+    p.add_argument("--losses", nargs="+", default=[DEFAULT_CONFIG["loss"]], help="pykeen loss names (default: model's)")
+    p.add_argument("--lrs", nargs="+", type=float, default=[DEFAULT_CONFIG["lr"]])
+    p.add_argument("--batch_sizes", nargs="+", type=int, default=[DEFAULT_CONFIG["batch_size"]])
+    p.add_argument("--seeds", nargs="+", type=int, default=[DEFAULT_CONFIG["seed"]])
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--threads", type=int, default=None, help="torch/BLAS threads per worker (default: cores / workers)")
+    p.add_argument("--split", nargs=3, type=float, default=[0.8, 0.1, 0.1], help="train / validation / test ratios")
+    p.add_argument("--split_seed", type=int, default=42)
+    p.add_argument("--save_models", action="store_true", help="also save each trained model in its sweep dir")
+    p.add_argument("--sweep_root", default=str(SWEEP_ROOT))
+    p.add_argument("--out", default=str(OUT))
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configs = load_configs(args.configs) if args.configs else \
+        expand_grid(args.models, args.dims, args.epochs, args.losses, args.lrs, args.batch_sizes, args.seeds)
+    if not math.isclose(sum(args.split), 1.0):
+        print(f"[WARN] --split ratios sum to {sum(args.split)}, not 1", file=sys.stderr)
+    t0 = time.time()
+    records, failures = run_sweep(configs, args.triples, args.sweep_root, args.workers, args.threads,
+                                  tuple(args.split), args.split_seed, args.save_models)
+    table = results_table(records, failures)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(args.out, index=False)
+    print(f"Wrote {len(table)} configurations → {args.out} ({time.time() - t0:.0f}s)")
+    if len(table):
+        print(table.head(10).to_string(index=False))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Integer-mapped KG triples for PyKEEN, cached by the hash of the triples file.
+
+The head,relation,tail CSV is read once, labels are mapped to IDs with a
+vectorized factorize (sorted labels, the same IDs TriplesFactory.
+from_labeled_triples assigns), and the result is saved under
+data/cache/triples/<file hash>/:
+ - mapped.npy: int64 [n_triples, 3] (head, relation, tail) IDs
+ - entities.dict/, relations.dict/: label <-> ID dictionaries
+   (symbolic_module.entity_dict)
+ - meta.json: source file, hash and counts
+
+Later runs on an unchanged file load the arrays and build the TriplesFactory
+from them directly, without relabeling.
+
+Usage:
+python scripts/triples_cache.py --triples data/kg_triples.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from symbolic_module.entity_dict import EntityDict
+
+CACHE_ROOT = Path("data") / "cache" / "triples"
+CACHE_VERSION = 1
+
+
+def file_hash(path, chunk=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{CACHE_VERSION}".encode())
+    with open(path, "rb") as f:
+        while block := f.read(chunk):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_labeled_triples(path):
+    """head / relation / tail columns of a triples CSV (else its first three columns), complete rows only."""
+    df = pd.read_csv(path, dtype=str)
+    if not {"head", "relation", "tail"}.issubset(df.columns):
+        df = df.iloc[:, :3].set_axis(["head", "relation", "tail"], axis=1)
+    df = df[["head", "relation", "tail"]]
+    incomplete = df.isna().any(axis=1)
+    if incomplete.any():
+        print(f"[WARN] Skipping {int(incomplete.sum())} triples with an empty field in {path}", file=sys.stderr)
+        df = df[~incomplete]
+    return df
+
+
+def map_triples(df):
+    """(mapped [n, 3] int64, entity labels, relation labels), IDs in sorted label order."""
+    n = len(df)
+    ent_codes, entities = pd.factorize(pd.concat([df["head"], df["tail"]], ignore_index=True), sort=True)
+    rel_codes, relations = pd.factorize(df["relation"], sort=True)
+    mapped = np.empty((n, 3), dtype=np.int64)
+    mapped[:, 0] = ent_codes[:n]
+    mapped[:, 1] = rel_codes
+    mapped[:, 2] = ent_codes[n:]
+    return mapped, np.asarray(entities, dtype=object), np.asarray(relations, dtype=object)
+
+
+class MappedTriples:
+    """ID-mapped triples with their entity and relation dictionaries."""
+
+    def __init__(self, mapped, entities, relations, path=None):
+        self.mapped = mapped
+        self.entities = entities
+        self.relations = relations
+        self.path = path
+
+    def __len__(self):
+        return len(self.mapped)
+
+    @classmethod
+    def build(cls, triples_csv, path):
+        mapped, entities, relations = map_triples(read_labeled_triples(triples_csv))
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "mapped.npy", mapped)
+        EntityDict.from_names(entities).save(tmp / "entities.dict")
+        EntityDict.from_names(relations).save(tmp / "relations.dict")
+        (tmp / "meta.json").write_text(json.dumps({
+            "version": CACHE_VERSION, "source": str(triples_csv), "hash": path.name,
+            "triples": len(mapped), "entities": len(entities), "relations": len(relations)}))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        return cls(np.load(path / "mapped.npy", mmap_mode="r"), EntityDict.load(path / "entities.dict"),
+                   EntityDict.load(path / "relations.dict"), path)
+
+    @classmethod
+    def open(cls, triples_csv, cache_root=CACHE_ROOT):
+        """Cached mapping of triples_csv, built on the first run for its content."""
+        path = Path(cache_root) / file_hash(triples_csv)
+        if (path / "meta.json").exists():
+            return cls.load(path)
+        print(f"Mapping triples of {triples_csv} (cached under {path})...")
+        return cls.build(triples_csv, path)
+
+    def entity_labels(self):
+        return self.entities.names_by_id()
+
+    def relation_labels(self):
+        return self.relations.names_by_id()
+
+    def triples_factory(self, create_inverse_triples=False):
+        """PyKEEN TriplesFactory over the cached arrays."""
+        import torch
+        from pykeen.triples import TriplesFactory
+
+        entities, relations = self.entity_labels(), self.relation_labels()
+        try:
+            # writable in-memory copy: torch must not share the read-only mapping of mapped.npy
+            return TriplesFactory(mapped_triples=torch.from_numpy(np.array(self.mapped)),
+                                  entity_to_id=dict(zip(entities, range(len(entities)))),
+                                  relation_to_id=dict(zip(relations, range(len(relations)))),
+                                  create_inverse_triples=create_inverse_triples)
+        except TypeError:
+            # older pykeen without the mapped-triples constructor: relabel once
+            m = np.asarray(self.mapped)
+            labeled = np.stack([entities[m[:, 0]], relations[m[:, 1]], entities[m[:, 2]]], axis=1).astype(str)
+            return TriplesFactory.from_labeled_triples(labeled, create_inverse_triples=create_inverse_triples)
+
+
+def load_triples_factory(triples_csv, cache_root=CACHE_ROOT, create_inverse_triples=False):
+    return MappedTriples.open(triples_csv, cache_root).triples_factory(create_inverse_triples)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--triples", default="data/kg_triples.csv")
+    p.add_argument("--cache_root", default=str(CACHE_ROOT))
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    t0 = time.time()
+    triples = MappedTriples.open(args.triples, args.cache_root)
+    print(f"{len(triples)} triples, {len(triples.entities)} entities, {len(triples.relations)} relations "
+          f"→ {triples.path} ({time.time() - t0:.1f}s)")
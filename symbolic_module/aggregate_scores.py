@@ -9,39 +9,36 @@ python -m symbolic_module.aggregate_scores \
   --drugprops data/drug_properties.csv \
   --pathway data/pathway_genes.csv \
   --out artifacts/final_ranked_candidates.csv
+
+Add --stream (with --top_n / --per_disease_k) when the neural CSV does not fit in memory.
+The per-pair components are also written to <out>_components.parquet; use
+symbolic_module.rerank to try new weights without re-aggregating. Stage timings,
+peak memory and record counters go to <out>_report.json (--profile DIR adds
+per-stage cProfile dumps). --explain_top N writes rule explanations for the best
+N candidates to <out>_explanations.jsonl.
 """
 
 import argparse
+import os
 import pandas as pd
 import numpy as np
 import json
 import jsonlines
 import sys
 from symbolic_module import rules, explain
+from symbolic_module.paths_reader import expand_paths, read_jsonl_parallel
+from symbolic_module.batch_rules import RULE_NAMES, BatchRuleEngine
+from symbolic_module import component_store, parquet_output
+from symbolic_module.instrument import RunReport, default_report_path
+
+OUTPUT_COLUMNS = ["drug", "disease", "final_score", "neural_score", "best_path_score", "symbolic_score",
+                  "best_path"] + [f"rule_{name}" for name in RULE_NAMES]
 
-def compute_symbolic_score(drug, best_path, drug_props_df, pathway_genes):
-    # apply rules and normalize to 0..1
-    r1 = rules.target_in_pathway(best_path, pathway_genes)   # 0/1
-    r2 = rules.bbb_check(drug, drug_props_df)               # 0..1
-    r3 = rules.toxicity_ok(drug, drug_props_df)             # 0..1
-    r4 = rules.mechanism_consistent(best_path)              # 0..1
-    r5 = rules.meta_path_score(best_path)                   # 0..1
-    raw = np.array([r1, r2, r3, r4, r5], dtype=float)
-    # weighted sum (simple equal weights)
-    symbolic_score = float(raw.mean())
-    breakdown = {
-        "target_in_pathway": float(r1),
-        "bbb_check": float(r2),
-        "toxicity_ok": float(r3),
-        "mechanism_consistent": float(r4),
-        "meta_path_score": float(r5)
-    }
-    return symbolic_score, breakdown
-
-def read_paths_jsonl_safe(paths_jsonl):
+def read_paths_jsonl_safe(paths_jsonl, stats=None):
     """
     Generator: yields valid dict items from a JSONL file.
-    Skips blank/invalid lines and logs them to stderr.
+    Skips blank/invalid lines and logs them to stderr; invalid lines are
+    counted in stats["invalid"] when a stats dict is given.
     """
     try:
         with open(paths_jsonl, "r", encoding="utf-8") as fh:
@@ -62,138 +59,408 @@ def read_paths_jsonl_safe(paths_jsonl):
                         yield obj
                     except Exception:
                         print(f"[WARN] Skipping invalid JSON at line {i} in {paths_jsonl}: {e_json}", file=sys.stderr)
+                        if stats is not None:
+                            stats["invalid"] = stats.get("invalid", 0) + 1
                         # optionally could print the line content truncated
                         continue
     except FileNotFoundError:
         print(f"[WARN] paths file not found: {paths_jsonl}. No paths will be processed.", file=sys.stderr)
         return
 
-def aggregate(neural_csv, paths_jsonl, drugprops_csv, pathway_csv, out_csv,
-              alpha=0.4, beta=0.35, gamma=0.25):
-    # load neural scores
-    try:
-        neural_df = pd.read_csv(neural_csv)
-    except Exception:
-        print(f"[WARN] Could not read neural CSV: {neural_csv}. Proceeding with empty neural scores.", file=sys.stderr)
-        neural_df = pd.DataFrame(columns=["drug","disease","score"])
+def pick_best_path(paths, path_scores):
+    """Return (best_path, best_path_score) for one JSONL record."""
+    if path_scores and len(path_scores)==len(paths):
+        try:
+            best_idx = int(np.argmax(path_scores))
+        except Exception:
+            best_idx = 0
+        return paths[best_idx], float(path_scores[best_idx])
+    if paths:
+        return paths[0], 0.0
+    return [], 0.0
 
-    # load drug props and pathway genes
-    drug_props_df = rules.load_drug_properties(drugprops_csv)
-    pathway_genes = rules.load_pathway_genes(pathway_csv)
+def path_record_row(item):
+    """Reduce one JSONL record to (drug, disease, best_path, best_path_score), or None if unusable."""
+    drug = item.get("drug")
+    disease = item.get("disease")
+    if not drug or not disease:
+        return None
+    best_path, best_path_score = pick_best_path(item.get("paths", []), item.get("path_scores", []))
+    return (drug, disease, best_path, best_path_score)
 
-    results = []
-    seen = set()
+def load_path_records(paths_jsonl, workers=1, stats=None):
+    """
+    Parse the JSONL path file(s) into a frame with one row per valid record:
+    drug, disease, best_path (list of nodes), best_path_score.
+    paths_jsonl may be one path, a glob or a list of shards; workers > 1 parses
+    newline-aligned byte ranges in a process pool.
+    Returns (paths_df, count_lines, count_valid). A stats dict, if given, is
+    filled with invalid_lines and missing_keys counts.
+    """
+    columns = ["drug", "disease", "best_path", "best_path_score"]
+    stats = stats if stats is not None else {}
+    if workers != 1:
+        rows, read_stats = read_jsonl_parallel(paths_jsonl, workers=workers or None, transform=path_record_row)
+        skipped = read_stats["records"] - len(rows)
+        if skipped:
+            print(f"[WARN] Skipped {skipped} entries with missing drug/disease", file=sys.stderr)
+        stats["invalid_lines"] = read_stats["invalid"]
+        stats["missing_keys"] = skipped
+        return pd.DataFrame(rows, columns=columns), read_stats["parsed"], read_stats["records"]
 
-    # iterate safely over JSONL lines
+    rows = []
     count_lines = 0
     count_valid = 0
-    for item in read_paths_jsonl_safe(paths_jsonl):
-        count_lines += 1
-        if not isinstance(item, dict):
-            continue
-        count_valid += 1
-        drug = item.get("drug")
-        disease = item.get("disease")
-        paths = item.get("paths", [])
-        path_scores = item.get("path_scores", [])
-
-        if not drug or not disease:
-            print(f"[WARN] Skipping entry with missing drug/disease at JSONL item #{count_lines}", file=sys.stderr)
-            continue
-
-        # pick best path (by path_scores) if available, else blank
-        if path_scores and len(path_scores)==len(paths):
+    read_stats = {}
+    for path in expand_paths(paths_jsonl):
+        for item in read_paths_jsonl_safe(path, read_stats):
+            count_lines += 1
+            if not isinstance(item, dict):
+                continue
+            count_valid += 1
+            row = path_record_row(item)
+            if row is None:
+                print(f"[WARN] Skipping entry with missing drug/disease at JSONL item #{count_lines}", file=sys.stderr)
+                continue
+            rows.append(row)
+    paths_df = pd.DataFrame(rows, columns=columns)
+    stats["invalid_lines"] = read_stats.get("invalid", 0)
+    stats["missing_keys"] = count_valid - len(rows)
+    return paths_df, count_lines, count_valid
+
+def join_neural_scores(paths_df, neural_df, stats=None):
+    """
+    Keyed join of path records and neural scores on (drug, disease).
+    Every path record keeps its row (neural_score 0.0 when unmatched) and
+    neural pairs without a path record are appended with an empty path.
+    Both sides are hashed once, so the cost is O(N + M). A stats dict, if
+    given, receives pairs_matched / path_only_pairs / neural_only_pairs.
+    """
+    neural = neural_df[["drug", "disease", "score"]].drop_duplicates(["drug", "disease"], keep="first")
+    neural = neural.rename(columns={"score": "neural_score"})
+    neural["neural_score"] = pd.to_numeric(neural["neural_score"], errors="coerce")
+
+    matched = paths_df.merge(neural, on=["drug", "disease"], how="left")
+
+    path_keys = paths_df[["drug", "disease"]].drop_duplicates()
+    neural_only = neural.merge(path_keys, on=["drug", "disease"], how="left", indicator=True)
+    neural_only = neural_only[neural_only["_merge"] == "left_only"].drop(columns="_merge")
+    neural_only["best_path"] = [[] for _ in range(len(neural_only))]
+    neural_only["best_path_score"] = 0.0
+
+    if stats is not None:
+        n_matched = int(matched["neural_score"].notna().sum())
+        stats.update(pairs_matched=n_matched, path_only_pairs=len(matched) - n_matched,
+                     neural_only_pairs=len(neural_only))
+    joined = pd.concat([matched, neural_only[matched.columns]], ignore_index=True)
+    joined["neural_score"] = joined["neural_score"].fillna(0.0).astype(float)
+    joined["best_path_score"] = joined["best_path_score"].astype(float)
+    return joined
+
+def score_candidates(joined, engine, alpha, beta, gamma):
+    """Evaluate the rules and fuse the scores for joined candidate rows (unsorted)."""
+    # evaluate every rule as a column over all candidates
+    breakdown = engine.evaluate(joined["drug"].to_numpy(), joined["best_path"])
+    breakdown.index = joined.index
+    symbolic_score = breakdown["symbolic_score"]
+
+    out_df = pd.DataFrame({
+        "drug": joined["drug"],
+        "disease": joined["disease"],
+        "final_score": alpha * joined["neural_score"] + beta * joined["best_path_score"] + gamma * symbolic_score,
+        "neural_score": joined["neural_score"],
+        "best_path_score": joined["best_path_score"],
+        "symbolic_score": symbolic_score,
+        "best_path": joined["best_path"].map(" | ".join),
+    })
+    for name in RULE_NAMES:
+        out_df[f"rule_{name}"] = breakdown[name]
+    return out_df
+
+def aggregate(neural_csv, paths_jsonl, drugprops_csv, pathway_csv, out_csv,
+              alpha=0.4, beta=0.35, gamma=0.25, workers=1, components=None,
+              out_format="csv", top_k=50, top_n=1000, report_path=None, profile_dir=None, explain_top=0):
+    with RunReport("aggregate", params=dict(
+        neural=neural_csv, paths=paths_jsonl, drugprops=drugprops_csv, pathway=pathway_csv, out=out_csv,
+        alpha=alpha, beta=beta, gamma=gamma, workers=workers, format=out_format), profile_dir=profile_dir) as report:
+
+        # load neural scores
+        with report.stage("load_neural"):
             try:
-                best_idx = int(np.argmax(path_scores))
+                neural_df = pd.read_csv(neural_csv)
             except Exception:
-                best_idx = 0
-            best_path = paths[best_idx]
-            best_path_score = float(path_scores[best_idx])
-        elif paths:
-            best_path = paths[0]
-            best_path_score = 0.0
+                print(f"[WARN] Could not read neural CSV: {neural_csv}. Proceeding with empty neural scores.",
+                      file=sys.stderr)
+                neural_df = pd.DataFrame(columns=["drug","disease","score"])
+        report.set("neural_rows", len(neural_df))
+
+        # load drug props and pathway genes
+        with report.stage("load_rules"):
+            drug_props_df = rules.load_drug_properties(drugprops_csv)
+            pathway_genes = rules.load_pathway_genes(pathway_csv)
+            engine = BatchRuleEngine(drug_props_df, pathway_genes)
+        report.set("drugs_with_properties", len(drug_props_df))
+        report.set("pathways", len(pathway_genes))
+
+        path_stats = {}
+        with report.stage("parse_paths"):
+            paths_df, count_lines, count_valid = load_path_records(paths_jsonl, workers, path_stats)
+        report.set("jsonl_lines", count_lines + path_stats["invalid_lines"])
+        report.set("records_parsed", count_valid)
+        report.set("path_records", len(paths_df))
+        report.counters.update(path_stats)
+
+        join_stats = {}
+        with report.stage("join_neural"):
+            joined = join_neural_scores(paths_df, neural_df, join_stats)
+        report.counters.update(join_stats)
+
+        with report.stage("evaluate_rules"):
+            out_df = score_candidates(joined, engine, alpha, beta, gamma)
+        with report.stage("sort"):
+            out_df = out_df.sort_values("final_score", ascending=False, kind="stable").reset_index(drop=True)
+        report.set("candidates", len(out_df))
+        if out_format in ("csv", "both"):
+            with report.stage("write_csv"):
+                out_df.to_csv(out_csv, index=False)
+            print(f"Wrote {len(out_df)} final candidates to {out_csv} "
+                  f"(processed {count_lines} JSONL lines, {count_valid} valid).")
+        if out_format in ("parquet", "both"):
+            with report.stage("write_parquet"):
+                parquet_output.write_ranked_parquet(out_df, parquet_output.default_parquet_dir(out_csv), top_k, top_n)
+        # persist the components so new weights only need a re-rank
+        if components is not False:
+            with report.stage("write_components"):
+                component_store.save_components(out_df, components or component_store.default_components_path(out_csv))
+        if explain_top:
+            with report.stage("explain_top"):
+                write_top_explanations(out_df, engine.index, out_csv, explain_top)
+        if report_path is not False:
+            print(report.summary())
+            report.write(report_path or default_report_path(out_csv))
+        return out_df
+
+def write_top_explanations(ranked_df, index, out_csv, top_n):
+    """Explain only the best top_n rows of an aggregated frame."""
+    service = explain.ExplanationService(ranked_df, index, cache_size=top_n)
+    out_path = os.path.splitext(out_csv)[0] + "_explanations.jsonl"
+    explain.write_explanations(service.explain_top(top_n), out_path)
+    return out_path
+
+def _keep_top(top, scored, top_n, per_disease_k):
+    """Merge a scored chunk into the running global top-N and per-disease top-K frames."""
+    top_all, top_disease = top
+    if top_n:
+        if top_all is not None and len(top_all) >= top_n:
+            # rows below the current N-th score can never enter the top-N
+            scored_n = scored[scored["final_score"] >= top_all["final_score"].iloc[-1]]
         else:
-            best_path = []
-            best_path_score = 0.0
+            scored_n = scored
+        top_all = scored_n if top_all is None else pd.concat([top_all, scored_n], ignore_index=True)
+        top_all = top_all.sort_values("final_score", ascending=False, kind="stable").head(top_n)
+    if per_disease_k:
+        top_disease = scored if top_disease is None else pd.concat([top_disease, scored], ignore_index=True)
+        top_disease = (top_disease.sort_values("final_score", ascending=False, kind="stable")
+                       .groupby("disease", sort=False).head(per_disease_k))
+    return top_all, top_disease
+
+def aggregate_streaming(neural_csv, paths_jsonl, drugprops_csv, pathway_csv, out_csv,
+                        alpha=0.4, beta=0.35, gamma=0.25, chunksize=1_000_000,
+                        top_n=1000, per_disease_k=0, workers=1, components=None, out_format="csv",
+                        report_path=None, profile_dir=None, explain_top=0):
+    """
+    Out-of-core variant of aggregate(): the neural CSV is read in chunks and each
+    chunk is joined against an index of the path records. Only the global top-N
+    (and optionally the top-K per disease) are kept, so memory is bounded by
+    chunksize + top_n + n_diseases * per_disease_k rows.
+
+    Path records are indexed by (drug, disease), keeping the first record for a
+    pair. Neural rows are not deduplicated across chunks.
+
+    Unless components is False, every scored row is appended to the component
+    store as it is produced, so re-ranking still sees all pairs. With
+    out_format "parquet" only the top tables are written, since the full
+    candidate set is never held in memory.
+    """
+    with RunReport("aggregate_streaming", params=dict(
+        neural=neural_csv, paths=paths_jsonl, drugprops=drugprops_csv, pathway=pathway_csv, out=out_csv,
+        alpha=alpha, beta=beta, gamma=gamma, chunksize=chunksize, top_n=top_n, per_disease_k=per_disease_k,
+        workers=workers, format=out_format), profile_dir=profile_dir) as report:
+
+        with report.stage("load_rules"):
+            drug_props_df = rules.load_drug_properties(drugprops_csv)
+            pathway_genes = rules.load_pathway_genes(pathway_csv)
+            engine = BatchRuleEngine(drug_props_df, pathway_genes)
+        report.set("drugs_with_properties", len(drug_props_df))
+        report.set("pathways", len(pathway_genes))
+
+        path_stats = {}
+        with report.stage("parse_paths"):
+            paths_df, count_lines, count_valid = load_path_records(paths_jsonl, workers, path_stats)
+        report.set("jsonl_lines", count_lines + path_stats["invalid_lines"])
+        report.set("records_parsed", count_valid)
+        report.set("path_records", len(paths_df))
+        report.counters.update(path_stats)
 
-        # find neural score (if present)
-        df_match = neural_df[(neural_df["drug"]==drug) & (neural_df["disease"]==disease)]
-        if not df_match.empty:
+        with report.stage("index_paths"):
+            side = paths_df.drop_duplicates(["drug", "disease"], keep="first").reset_index(drop=True)
+            side_index = pd.MultiIndex.from_frame(side[["drug", "disease"]])
+            side_matched = np.zeros(len(side), dtype=bool)
+            side_paths = side["best_path"].to_numpy()
+            side_scores = np.append(side["best_path_score"].to_numpy(dtype=float), 0.0)
+
+        writer = None
+        if components is not False:
+            store_path = components or component_store.default_components_path(out_csv)
             try:
-                neural_score = float(df_match["score"].iloc[0])
-            except Exception:
-                neural_score = 0.0
-        else:
-            neural_score = 0.0
-
-        symbolic_score, breakdown = compute_symbolic_score(drug, best_path, drug_props_df, pathway_genes)
-
-        final_score = alpha * neural_score + beta * best_path_score + gamma * symbolic_score
-
-        results.append({
-            "drug": drug,
-            "disease": disease,
-            "final_score": final_score,
-            "neural_score": neural_score,
-            "best_path_score": best_path_score,
-            "symbolic_score": symbolic_score,
-            "best_path": " | ".join(best_path),
-            "rule_target_in_pathway": breakdown["target_in_pathway"],
-            "rule_bbb_check": breakdown["bbb_check"],
-            "rule_toxicity_ok": breakdown["toxicity_ok"],
-            "rule_mechanism_consistent": breakdown["mechanism_consistent"],
-            "rule_meta_path_score": breakdown["meta_path_score"]
-        })
-        seen.add((drug,disease))
-
-    # If some (drug,disease) pairs exist in neural_df but not in paths_jsonl, include them with empty path
-    for _, row in neural_df.iterrows():
-        drug = row["drug"]
-        disease = row["disease"]
-        key = (drug,disease)
-        if key in seen:
-            continue
+                writer = component_store.ComponentWriter(store_path)
+            except ImportError as e:
+                print(f"[WARN] {e}; not writing component store {store_path}", file=sys.stderr)
+
+        top = (None, None)
+        n_rows = 0
+        n_dropped = 0
+        n_chunks = 0
         try:
-            neural_score = float(row["score"])
+            reader = iter(pd.read_csv(neural_csv, usecols=["drug", "disease", "score"], chunksize=chunksize))
         except Exception:
-            neural_score = 0.0
-        best_path = []
-        best_path_score = 0.0
-        symbolic_score, breakdown = compute_symbolic_score(drug, best_path, drug_props_df, pathway_genes)
-        final_score = alpha * neural_score + beta * best_path_score + gamma * symbolic_score
-        results.append({
-            "drug": drug,
-            "disease": disease,
-            "final_score": final_score,
-            "neural_score": neural_score,
-            "best_path_score": best_path_score,
-            "symbolic_score": symbolic_score,
-            "best_path": "",
-            "rule_target_in_pathway": breakdown["target_in_pathway"],
-            "rule_bbb_check": breakdown["bbb_check"],
-            "rule_toxicity_ok": breakdown["toxicity_ok"],
-            "rule_mechanism_consistent": breakdown["mechanism_consistent"],
-            "rule_meta_path_score": breakdown["meta_path_score"]
-        })
-
-    out_df = pd.DataFrame(results)
-    out_df = out_df.sort_values("final_score", ascending=False).reset_index(drop=True)
-    out_df.to_csv(out_csv, index=False)
-    print(f"Wrote {len(out_df)} final candidates to {out_csv} (processed {count_lines} JSONL lines, {count_valid} valid).")
-    return out_df
+            print(f"[WARN] Could not read neural CSV: {neural_csv}. Proceeding with empty neural scores.", file=sys.stderr)
+            reader = iter(())
+
+        while True:
+            with report.stage("read_neural_chunk", accumulate=True):
+                chunk = next(reader, None)
+            if chunk is None:
+                break
+            n_rows += len(chunk)
+            n_chunks += 1
+            with report.stage("join_neural", accumulate=True):
+                chunk = chunk.rename(columns={"score": "neural_score"}).reset_index(drop=True)
+                chunk["neural_score"] = pd.to_numeric(chunk["neural_score"], errors="coerce").fillna(0.0).astype(float)
+                pos = side_index.get_indexer(pd.MultiIndex.from_frame(chunk[["drug", "disease"]]))
+
+                # a path record pairs with the first neural row seen for it
+                hit = pos >= 0
+                first = np.zeros(len(pos), dtype=bool)
+                if hit.any():
+                    hit_idx = np.flatnonzero(hit)
+                    uniq_pos, first_at = np.unique(pos[hit_idx], return_index=True)
+                    fresh = ~side_matched[uniq_pos]
+                    first[hit_idx[first_at[fresh]]] = True
+                    side_matched[uniq_pos[fresh]] = True
+                keep = ~hit | first
+                n_dropped += int((~keep).sum())
+
+                chunk = chunk[keep]
+                pos = pos[keep]
+                from_path = pos >= 0
+                best_path = np.empty(len(pos), dtype=object)
+                best_path[:] = [[]] * len(pos)
+                best_path[from_path] = side_paths[pos[from_path]]
+                chunk["best_path"] = best_path
+                chunk["best_path_score"] = np.where(from_path, side_scores[np.maximum(pos, 0)], 0.0)
+            with report.stage("evaluate_rules", accumulate=True):
+                scored = score_candidates(chunk, engine, alpha, beta, gamma)
+            if writer is not None:
+                with report.stage("write_components", accumulate=True):
+                    writer.write(scored)
+            with report.stage("keep_top", accumulate=True):
+                top = _keep_top(top, scored, top_n, per_disease_k)
+
+        # path records that never met a neural row
+        rest = side[~side_matched].copy()
+        rest["neural_score"] = 0.0
+        if len(rest):
+            with report.stage("evaluate_rules", accumulate=True):
+                scored = score_candidates(rest, engine, alpha, beta, gamma)
+            if writer is not None:
+                with report.stage("write_components", accumulate=True):
+                    writer.write(scored)
+            with report.stage("keep_top", accumulate=True):
+                top = _keep_top(top, scored, top_n, per_disease_k)
+        if writer is not None:
+            with report.stage("write_components", accumulate=True):
+                writer.close()
+            print(f"Wrote {writer.rows} component rows to {writer.path}")
+
+        n_matched = int(side_matched.sum())
+        report.counters.update(neural_rows=n_rows, neural_chunks=n_chunks, pairs_matched=n_matched,
+                               path_only_pairs=len(rest), neural_only_pairs=n_rows - n_dropped - n_matched,
+                               duplicate_neural_rows_for_paths=n_dropped,
+                               candidates=n_rows - n_dropped + len(rest))
+
+        empty = pd.DataFrame(columns=OUTPUT_COLUMNS)
+        top_all = empty if top[0] is None else top[0].reset_index(drop=True)
+        top_disease = empty if top[1] is None else top[1]
+        if out_format in ("csv", "both"):
+            with report.stage("write_csv"):
+                top_all.to_csv(out_csv, index=False)
+                print(f"Wrote top {len(top_all)} of {n_rows} neural rows (+{len(rest)} path-only pairs) to {out_csv} "
+                      f"(processed {count_lines} JSONL lines, {count_valid} valid).")
+                if per_disease_k:
+                    disease_csv = os.path.splitext(out_csv)[0] + f"_top{per_disease_k}_per_disease.csv"
+                    top_disease = top_disease.sort_values(["disease", "final_score"], ascending=[True, False], kind="stable")
+                    top_disease.reset_index(drop=True).to_csv(disease_csv, index=False)
+                    print(f"Wrote per-disease top {per_disease_k} ({len(top_disease)} rows) to {disease_csv}")
+        if out_format in ("parquet", "both"):
+            with report.stage("write_parquet"):
+                base_dir = parquet_output.default_parquet_dir(out_csv)
+                os.makedirs(base_dir, exist_ok=True)
+                top_all.to_parquet(os.path.join(base_dir, "top_n_global.parquet"), index=False)
+                if per_disease_k:
+                    parquet_output.top_k_per_disease(top_disease, per_disease_k).to_parquet(
+                        os.path.join(base_dir, "top_k_per_disease.parquet"), index=False)
+                print(f"Wrote top tables to {base_dir}")
+        if explain_top:
+            with report.stage("explain_top"):
+                write_top_explanations(top_all, engine.index, out_csv, explain_top)
+        if report_path is not False:
+            print(report.summary())
+            report.write(report_path or default_report_path(out_csv))
+        return top_all
 
 def parse_args():
     p = argparse.ArgumentParser()
     p.add_argument("--neural", default="artifacts/global_scores.csv")
-    p.add_argument("--paths", default="artifacts/paths.jsonl")
+    p.add_argument("--paths", nargs="+", default=["artifacts/paths.jsonl"],
+                   help="paths.jsonl, several shards, or a glob")
     p.add_argument("--drugprops", default="data/drug_properties.csv")
     p.add_argument("--pathway", default="data/pathway_genes.csv")
     p.add_argument("--out", default="artifacts/final_ranked_candidates.csv")
     p.add_argument("--alpha", type=float, default=0.4)
     p.add_argument("--beta", type=float, default=0.35)
     p.add_argument("--gamma", type=float, default=0.25)
+    p.add_argument("--workers", type=int, default=1,
+                   help="processes for JSONL parsing (0 = all cores)")
+    p.add_argument("--components", default=None,
+                   help="component store for rerank (default: <out>_components.parquet)")
+    p.add_argument("--no_components", action="store_true", help="do not write the component store")
+    p.add_argument("--format", dest="out_format", choices=["csv", "parquet", "both"], default="csv",
+                   help="parquet writes <out without .csv>/ partitioned by disease plus top-K/top-N tables")
+    p.add_argument("--top_k", type=int, default=50, help="per-disease top-K table size for --format parquet")
+    p.add_argument("--stream", action="store_true",
+                   help="read the neural CSV in chunks and keep only the top candidates")
+    p.add_argument("--chunksize", type=int, default=1_000_000)
+    p.add_argument("--top_n", type=int, default=1000,
+                   help="global top-N kept in --stream mode / written as the Parquet top-N table")
+    p.add_argument("--per_disease_k", type=int, default=0, help="also keep the top-K per disease in --stream mode")
+    p.add_argument("--explain_top", type=int, default=0,
+                   help="write explanations for the best N candidates to <out>_explanations.jsonl")
+    p.add_argument("--report", default=None, help="run report JSON (default: <out>_report.json)")
+    p.add_argument("--no_report", action="store_true", help="do not write the run report")
+    p.add_argument("--profile", default=None, metavar="DIR", help="dump a cProfile file per stage into DIR")
     return p.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
-    aggregate(args.neural, args.paths, args.drugprops, args.pathway, args.out, args.alpha, args.beta, args.gamma)
+    components = False if args.no_components else args.components
+    report_path = False if args.no_report else args.report
+    if args.stream:
+        aggregate_streaming(args.neural, args.paths, args.drugprops, args.pathway, args.out,
+                            args.alpha, args.beta, args.gamma, args.chunksize, args.top_n, args.per_disease_k, args.workers,
+                            components, args.out_format, report_path, args.profile,
+                            args.explain_top)
+    else:
+        aggregate(args.neural, args.paths, args.drugprops, args.pathway, args.out, args.alpha, args.beta, args.gamma,
+                  args.workers, components, args.out_format, args.top_k, args.top_n, report_path, args.profile,
+                  args.explain_top)
@@ -0,0 +1,150 @@
+# symbolic_module/component_store.py
+"""
+Columnar store of the per-pair score components written by aggregate_scores.
+
+Only the final linear combination depends on alpha/beta/gamma, so the store keeps
+neural_score, best_path_score, symbolic_score and every rule column (float32,
+Parquet with dictionary-encoded names). ComponentStore.rerank recomputes
+final_score and the top-N from it in one vectorized pass.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from symbolic_module.batch_rules import RULE_NAMES
+
+SCORE_COLUMNS = ["neural_score", "best_path_score", "symbolic_score"]
+RULE_COLUMNS = [f"rule_{name}" for name in RULE_NAMES]
+KEY_COLUMNS = ["drug", "disease"]
+
+
+def default_components_path(out_csv):
+    """Where aggregate_scores puts the store for a given output CSV."""
+    return os.path.splitext(out_csv)[0] + "_components.parquet"
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("pyarrow is required for the component store (pip install pyarrow)")
+
+
+def _to_table(df):
+    cols = {c: df[c].astype(str).to_numpy() for c in KEY_COLUMNS}
+    for c in SCORE_COLUMNS + RULE_COLUMNS:
+        cols[c] = df[c].to_numpy(dtype=np.float32)
+    cols["best_path"] = df["best_path"].fillna("").astype(str).to_numpy()
+    return pa.table(cols)
+
+
+class ComponentWriter:
+    """Append scored frames (aggregate_scores output layout) to one Parquet file."""
+
+    def __init__(self, path):
+        _require_pyarrow()
+        self.path = path
+        self._writer = None
+        self.rows = 0
+
+    def write(self, df):
+        if not len(df):
+            return
+        table = _to_table(df)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is None:
+            # keep an empty but valid store so rerank does not fail on it
+            pq.write_table(_to_table(pd.DataFrame(columns=KEY_COLUMNS + SCORE_COLUMNS + RULE_COLUMNS + ["best_path"])),
+                           self.path)
+        else:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_components(df, path):
+    """Write the component columns of an aggregated frame; returns False if pyarrow is missing."""
+    if pq is None:
+        print(f"[WARN] pyarrow not installed; not writing component store {path}", file=sys.stderr)
+        return False
+    with ComponentWriter(path) as w:
+        w.write(df)
+    print(f"Wrote {len(df)} component rows to {path}")
+    return True
+
+
+class ComponentStore:
+    """Memory-mapped component store; load once, re-rank as often as needed."""
+
+    def __init__(self, path):
+        _require_pyarrow()
+        self.path = path
+        self.table = pq.read_table(path, memory_map=True, read_dictionary=KEY_COLUMNS)
+        self.scores = np.column_stack([self.table[c].to_numpy() for c in SCORE_COLUMNS]) \
+            if self.table.num_rows else np.zeros((0, len(SCORE_COLUMNS)), dtype=np.float32)
+        self._rules = None
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def rules(self):
+        if self._rules is None:
+            self._rules = np.column_stack([self.table[c].to_numpy() for c in RULE_COLUMNS]) \
+                if self.table.num_rows else np.zeros((0, len(RULE_COLUMNS)), dtype=np.float32)
+        return self._rules
+
+    def components(self, rule_weights=None):
+        """(n, 3) neural / path / symbolic matrix; rule_weights re-weights the symbolic column."""
+        if rule_weights is None:
+            return self.scores
+        w = np.array([rule_weights.get(name, 0.0) for name in RULE_NAMES], dtype=np.float32)
+        total = w.sum()
+        symbolic = self.rules @ (w / total if total else w)
+        return np.column_stack([self.scores[:, :2], symbolic])
+
+    def final_scores(self, alpha=0.4, beta=0.35, gamma=0.25, rule_weights=None):
+        return self.components(rule_weights) @ np.array([alpha, beta, gamma], dtype=np.float32)
+
+    def top_indices(self, scores, top_n=None):
+        """Row positions of the top_n scores, best first (all rows when top_n is None)."""
+        if top_n is not None and top_n < len(scores):
+            idx = np.argpartition(-scores, top_n)[:top_n]
+        else:
+            idx = np.arange(len(scores))
+        return idx[np.argsort(-scores[idx], kind="stable")]
+
+    def rows(self, idx, final_scores):
+        """Materialize rows in the aggregate_scores output layout."""
+        out = self.table.take(pa.array(idx, type=pa.int64())).to_pandas()
+        for c in KEY_COLUMNS:
+            out[c] = out[c].astype(str)
+        for c in SCORE_COLUMNS + RULE_COLUMNS:
+            out[c] = out[c].astype(float)
+        out.insert(2, "final_score", final_scores[idx].astype(float))
+        cols = KEY_COLUMNS + ["final_score"] + SCORE_COLUMNS + ["best_path"] + RULE_COLUMNS
+        return out[cols]
+
+    def rerank(self, alpha=0.4, beta=0.35, gamma=0.25, top_n=None, rule_weights=None):
+        comp = self.components(rule_weights)
+        scores = comp @ np.array([alpha, beta, gamma], dtype=np.float32)
+        idx = self.top_indices(scores, top_n)
+        out = self.rows(idx, scores)
+        if rule_weights is not None:
+            out["symbolic_score"] = comp[idx, 2].astype(float)
+        return out
@@ -0,0 +1,168 @@
+# symbolic_module/embedding_store.py
+"""
+Type-partitioned entity embedding store.
+
+The export step splits the entity embedding matrix into one contiguous block
+per entity type (Compound, Disease, Gene, ...), so a scorer memory-maps only
+the blocks it needs instead of loading the whole matrix and fancy-indexing
+copies of the drug and disease rows out of it. A store is a directory:
+  meta.json                  dim, dtype and the block file of every type
+  entities.dict/             the entity dictionary (symbolic_module.entity_dict)
+  block-NN.vectors.npy       [rows, dim] embeddings of one type
+  block-NN.ids.npy           entity ID (original matrix row) of every block row
+  block-NN.norms.npy         L2 norm of every block row
+
+Block rows follow the dictionary's name order, so row r of a type's block is
+the entity at dictionary position type_start + r.
+
+Usage:
+python -m symbolic_module.embedding_store --embeddings embeddings.npy --entities entities.dict --out embeddings.store
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from symbolic_module.entity_dict import EntityDict, open_entity_dict
+
+STORE_VERSION = 1
+CHUNK_ROWS = 65536
+
+
+class EmbeddingBlock:
+    """Embeddings, entity IDs and norms of one entity type (memory-mapped)."""
+
+    def __init__(self, kind, vectors, ids, norms, entity_dict):
+        self.kind = kind
+        self.vectors = vectors
+        self.ids = ids
+        self.norms = norms
+        self.entity_dict = entity_dict
+        self.start = entity_dict.type_range(kind)[0]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def names(self):
+        return self.entity_dict.type_names(self.kind)
+
+    def rows(self, names):
+        """Block row of every name (-1 if unknown or of another type)."""
+        ids = self.entity_dict.name_to_id(names)
+        out = np.full(len(ids), -1, dtype=np.int64)
+        known = ids >= 0
+        r = self.entity_dict.pos[ids[known]] - self.start
+        out[known] = np.where((r >= 0) & (r < len(self)), r, -1)
+        return out
+
+    def cosine(self, other, rows=slice(None)):
+        """Cosine similarity of this block's rows (default all) with every row of other."""
+        a = np.asarray(self.vectors[rows], dtype=np.float32)
+        na = np.asarray(self.norms[rows], dtype=np.float32)
+        sims = a @ np.asarray(other.vectors, dtype=np.float32).T
+        denom = np.outer(na, other.norms)
+        return np.divide(sims, denom, out=np.zeros_like(sims), where=denom > 0)
+
+
+class EmbeddingStore:
+    """Per-type embedding blocks of one entity dictionary."""
+
+    def __init__(self, path, meta, entity_dict, mmap=True):
+        self.path = path
+        self.meta = meta
+        self.entity_dict = entity_dict
+        self.mmap = mmap
+        self._blocks = {}
+
+    @property
+    def kinds(self):
+        return list(self.meta["blocks"])
+
+    @property
+    def dim(self):
+        return self.meta["dim"]
+
+    @classmethod
+    def build(cls, embeddings, entity_dict, path):
+        """Write the blocks of an [n_entities, dim] matrix (rows = entity IDs) under path."""
+        if len(entity_dict.pos) > len(embeddings):
+            raise ValueError(f"entity IDs go up to {len(entity_dict.pos) - 1} but there are "
+                             f"{len(embeddings)} embedding rows")
+        os.makedirs(path, exist_ok=True)
+        entity_dict.save(os.path.join(path, "entities.dict"))
+        blocks = {}
+        for n, kind in enumerate(entity_dict.types):
+            ids = np.asarray(entity_dict.type_ids(kind))
+            stem = f"block-{n:02d}"
+            vectors = np.lib.format.open_memmap(os.path.join(path, f"{stem}.vectors.npy"), mode="w+",
+                                                dtype=embeddings.dtype, shape=(len(ids), embeddings.shape[1]))
+            norms = np.empty(len(ids), dtype=np.float32)
+            # sorted ID chunks keep the reads of a memory-mapped source sequential
+            for i in range(0, len(ids), CHUNK_ROWS):
+                chunk = ids[i:i + CHUNK_ROWS]
+                order = np.argsort(chunk, kind="stable")
+                rows = np.empty((len(chunk), embeddings.shape[1]), dtype=embeddings.dtype)
+                rows[order] = embeddings[chunk[order]]
+                vectors[i:i + len(chunk)] = rows
+                norms[i:i + len(chunk)] = np.linalg.norm(rows.astype(np.float32), axis=1)
+            vectors.flush()
+            del vectors
+            np.save(os.path.join(path, f"{stem}.ids.npy"), ids.astype(np.int64))
+            np.save(os.path.join(path, f"{stem}.norms.npy"), norms)
+            blocks[kind] = {"file": stem, "rows": int(len(ids))}
+        meta = {"version": STORE_VERSION, "dim": int(embeddings.shape[1]), "dtype": str(embeddings.dtype),
+                "blocks": blocks}
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"{path}: unsupported embedding store version {meta.get('version')}")
+        return cls(path, meta, EntityDict.load(os.path.join(path, "entities.dict"), mmap), mmap)
+
+    @classmethod
+    def open(cls, path, embeddings_npy=None, entities=None):
+        """Saved store at path, built there first from a legacy matrix + entity dictionary if missing."""
+        if os.path.exists(os.path.join(path, "meta.json")):
+            return cls.load(path)
+        if embeddings_npy is None or entities is None or not os.path.exists(embeddings_npy):
+            raise FileNotFoundError(f"No embedding store at {path}")
+        print(f"Partitioning {embeddings_npy} by entity type → {path} (one time)...")
+        return cls.build(np.load(embeddings_npy, mmap_mode="r"), open_entity_dict(entities), path)
+
+    def block(self, kind):
+        """Embedding block of one entity type (empty if the type has no entities)."""
+        if kind not in self._blocks:
+            info = self.meta["blocks"].get(kind)
+            mode = "r" if self.mmap else None
+            if info is None:
+                block = EmbeddingBlock(kind, np.zeros((0, self.dim), dtype=self.meta["dtype"]),
+                                       np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), self.entity_dict)
+            else:
+                stem = os.path.join(self.path, info["file"])
+                block = EmbeddingBlock(kind, *(np.load(f"{stem}.{part}.npy", mmap_mode=mode)
+                                               for part in ("vectors", "ids", "norms")), self.entity_dict)
+            self._blocks[kind] = block
+        return self._blocks[kind]
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--embeddings", required=True, help="[n_entities, dim] .npy, rows = entity IDs")
+    p.add_argument("--entities", required=True, help="entity dictionary dir, entity2id.json or entity list")
+    p.add_argument("--out", required=True)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    store = EmbeddingStore.build(np.load(args.embeddings, mmap_mode="r"), open_entity_dict(args.entities), args.out)
+    print(f"Wrote {len(store.kinds)} embedding blocks (dim {store.dim}) → {args.out}")
+    for kind in store.kinds:
+        print(f"  {kind or '(untyped)'}: {store.meta['blocks'][kind]['rows']}")
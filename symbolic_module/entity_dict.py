@@ -0,0 +1,234 @@
+# symbolic_module/entity_dict.py
+"""
+Compact, memory-mappable entity dictionary (replaces entity2id.json).
+
+A dictionary is a directory of flat arrays:
+  names.bin     UTF-8 entity names, sorted, concatenated
+  offsets.npy   int64 [n + 1] byte offsets of each sorted name in names.bin
+  ids.npy       int64 [n]     entity ID of each sorted name
+  pos.npy       int64 [max_id + 1]  sorted position of each ID (-1 = unused ID)
+  hashes.npy    uint64 [n]    sorted 64-bit hashes of the names, for name -> ID
+  hash_pos.npy  int64 [n]     sorted position of each hash
+  meta.json     count, and the [start, end) sorted-position range of every
+                entity type (the part of the name before "::", e.g. Compound)
+
+Because names are sorted, each type is one contiguous range, so
+type_ids("Compound") is a zero-copy slice of ids.npy. Name -> ID lookups hash
+the queries, binary-search the sorted hashes and check the candidate names;
+ID -> name lookups decode only the requested names.
+
+Usage:
+python -m symbolic_module.entity_dict --entities data/drkg/embed/entities.tsv --out data/drkg/entities.dict
+python -m symbolic_module.entity_dict --entity2id entity2id.json --out entities.dict
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DICT_VERSION = 1
+TYPE_SEPARATOR = "::"
+
+
+def _hash(names):
+    return pd.util.hash_array(np.asarray(names, dtype=object))
+
+
+def _spans(starts, lengths):
+    """Flat index of every byte in the [start, start + length) spans, in order."""
+    ends = np.cumsum(lengths)
+    return np.repeat(starts - (ends - lengths), lengths) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def _encode(names):
+    """UTF-8 bytes of names as one uint8 array plus per-name offsets."""
+    encoded = [n.encode("utf-8") for n in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def entity_type(name):
+    return name.split(TYPE_SEPARATOR, 1)[0] if TYPE_SEPARATOR in name else ""
+
+
+class EntityDict:
+    """Sorted string table with ID arrays, per-type ranges and a hash index."""
+
+    def __init__(self, blob, offsets, ids, pos, hashes, hash_pos, types):
+        self.blob = blob
+        self.offsets = offsets
+        self.ids = ids
+        self.pos = pos
+        self.hashes = hashes
+        self.hash_pos = hash_pos
+        self.types = types
+
+    # ---------- construction ----------
+
+    @classmethod
+    def from_names(cls, names, ids=None):
+        """Dictionary of names with the given IDs (default: their positions)."""
+        names = np.asarray(names, dtype=object)
+        ids = np.arange(len(names), dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        if len(pd.unique(names)) != len(names):
+            raise ValueError("entity names must be unique")
+        # byte order equals code point order for UTF-8, so names sort the same either way
+        order = np.argsort(names.astype(str), kind="stable") if len(names) else np.zeros(0, dtype=np.int64)
+        names, ids = names[order], ids[order]
+        blob, offsets = _encode(names)
+
+        pos = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int64)
+        pos[ids] = np.arange(len(ids))
+        h = _hash(names)
+        hash_pos = np.argsort(h, kind="stable")
+        hashes = h[hash_pos]
+        if len(hashes) > 1 and (np.diff(hashes) == 0).any():
+            raise ValueError("64-bit hash collision between entity names")
+
+        kinds = pd.Series([entity_type(n) for n in names], dtype=object)
+        types = {}
+        if len(kinds):
+            starts = np.flatnonzero(np.r_[True, kinds.to_numpy()[1:] != kinds.to_numpy()[:-1]])
+            ends = np.r_[starts[1:], len(kinds)]
+            for s, e in zip(starts, ends):
+                types[kinds.iat[s]] = [int(s), int(e)]
+        return cls(blob, offsets, ids, pos, hashes, hash_pos.astype(np.int64), types)
+
+    @classmethod
+    def from_json(cls, entity2id_json):
+        """Dictionary of a legacy {name: id} entity2id.json."""
+        with open(entity2id_json) as f:
+            node2id = json.load(f)
+        return cls.from_names(list(node2id), list(node2id.values()))
+
+    @classmethod
+    def from_lines(cls, path):
+        """Dictionary of a one-name-per-line file (e.g. DRKG entities.tsv); IDs are line numbers."""
+        with open(path) as f:
+            lines = [line.strip() for line in f]
+        keep = [i for i, n in enumerate(lines) if n]
+        return cls.from_names([lines[i] for i in keep], keep)
+
+    # ---------- persistence ----------
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.blob.tofile(os.path.join(path, "names.bin"))
+        for name in ("offsets", "ids", "pos", "hashes", "hash_pos"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"version": DICT_VERSION, "count": len(self), "types": self.types}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != DICT_VERSION:
+            raise ValueError(f"{path}: unsupported entity dictionary version {meta.get('version')}")
+        blob_path = os.path.join(path, "names.bin")
+        blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if mmap and os.path.getsize(blob_path) else \
+            np.fromfile(blob_path, dtype=np.uint8)
+        arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+                  for name in ("offsets", "ids", "pos", "hashes", "hash_pos")]
+        return cls(blob, *arrays, meta["types"])
+
+    # ---------- lookups ----------
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _decode(self, sorted_pos):
+        """Names at the given sorted positions, decoded in one pass."""
+        sorted_pos = np.asarray(sorted_pos, dtype=np.int64)
+        if not len(sorted_pos):
+            return np.zeros(0, dtype=object)
+        starts = self.offsets[sorted_pos]
+        lengths = self.offsets[sorted_pos + 1] - starts
+        # gather the names with a trailing newline each (names never contain one) and split once
+        buf = np.full(int(lengths.sum()) + len(lengths), ord("\n"), dtype=np.uint8)
+        dest = _spans(np.cumsum(lengths + 1) - (lengths + 1), lengths)
+        buf[dest] = self.blob[_spans(starts, lengths)]
+        return np.array(buf.tobytes().decode("utf-8").split("\n")[:-1], dtype=object)
+
+    def name_to_id(self, names):
+        """ID of every name (-1 if unknown)."""
+        names = np.asarray(names, dtype=object)
+        out = np.full(len(names), -1, dtype=np.int64)
+        if not len(names) or not len(self):
+            return out
+        h = _hash(names)
+        i = np.minimum(np.searchsorted(self.hashes, h), len(self.hashes) - 1)
+        cand = np.flatnonzero(self.hashes[i] == h)
+        if not len(cand):
+            return out
+        # confirm the hash hits byte for byte against the string table
+        p = self.hash_pos[i[cand]]
+        qblob, qoff = _encode(names[cand])
+        qlen = np.diff(qoff)
+        same = qlen == self.offsets[p + 1] - self.offsets[p]
+        cand, p, qoff, qlen = cand[same], p[same], qoff[:-1][same], qlen[same]
+        diff = self.blob[_spans(self.offsets[p], qlen)] != qblob[_spans(qoff, qlen)]
+        owner = np.repeat(np.arange(len(cand)), qlen)
+        ok = np.bincount(owner[diff], minlength=len(cand)) == 0
+        out[cand[ok]] = self.ids[p[ok]]
+        return out
+
+    def id_to_name(self, ids):
+        """Name of every ID (None if unused)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        out = np.full(len(ids), None, dtype=object)
+        inside = (ids >= 0) & (ids < len(self.pos))
+        p = np.full(len(ids), -1, dtype=np.int64)
+        p[inside] = self.pos[ids[inside]]
+        ok = p >= 0
+        out[ok] = self._decode(p[ok])
+        return out
+
+    def type_range(self, kind):
+        return tuple(self.types.get(kind, (0, 0)))
+
+    def type_ids(self, kind):
+        """IDs of all entities of one type (e.g. "Compound"), in name order; a view of ids.npy."""
+        start, end = self.type_range(kind)
+        return self.ids[start:end]
+
+    def type_names(self, kind):
+        start, end = self.type_range(kind)
+        return self._decode(np.arange(start, end))
+
+    def names_by_id(self, n=None):
+        """Object array of names indexed by ID (length n, default max ID + 1)."""
+        n = len(self.pos) if n is None else n
+        return self.id_to_name(np.arange(n))
+
+
+def open_entity_dict(path):
+    """EntityDict from a dictionary directory, or converted from a legacy entity2id.json."""
+    if os.path.isdir(path):
+        return EntityDict.load(path)
+    if path.endswith(".json"):
+        return EntityDict.from_json(path)
+    return EntityDict.from_lines(path)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--entities", help="one entity name per line; IDs are line numbers")
+    src.add_argument("--entity2id", help="legacy {name: id} JSON")
+    p.add_argument("--out", required=True)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    d = EntityDict.from_lines(args.entities) if args.entities else EntityDict.from_json(args.entity2id)
+    d.save(args.out)
+    print(f"Wrote {len(d)} entities → {args.out}")
+    for kind, (start, end) in d.types.items():
+        print(f"  {kind or '(untyped)'}: {end - start}")
@@ -1,4 +1,35 @@
 # symbolic_module/explain.py
+"""
+Human-readable explanations for ranked candidates.
+
+format_explanation renders one explanation. ExplanationService builds them on
+demand: the ranked candidates (CSV or component store) are indexed by
+(drug, disease) once, and each explain(drug, disease) call assembles the score
+and rule breakdown, the best path and per-rule reasons from that index and the
+rule data. Results are memoized in a size-bounded LRU cache, and explain_top()
+only produces explanations for the best N candidates.
+
+Usage (batch, top-N only):
+python -m symbolic_module.explain \
+  --ranked artifacts/final_ranked_candidates.csv \
+  --drugprops data/drug_properties.csv \
+  --pathway data/pathway_genes.csv \
+  --top_n 100 --out artifacts/explanations.jsonl
+"""
+
+import argparse
+import json
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from symbolic_module.batch_rules import RULE_NAMES
+from symbolic_module.rule_index import RuleIndex
+
+DEFAULT_CACHE_SIZE = 4096
+
 
 def format_explanation(drug, disease, neural_score, symbolic_score, rules_explanations, best_path):
     text = []
@@ -15,3 +46,181 @@ def format_explanation(drug, disease, neural_score, symbolic_score, rules_explan
     for exp in rules_explanations:
         text.append(f"  - {exp}")
     return "\n".join(text)
+
+
+def split_path(raw_path):
+    """Path nodes from the " | "-joined best_path column (also accepts "->")."""
+    raw_path = "" if raw_path is None or (isinstance(raw_path, float) and np.isnan(raw_path)) else str(raw_path)
+    if not raw_path.strip():
+        return []
+    sep = " | " if " | " in raw_path else ("->" if "->" in raw_path else None)
+    if sep is None:
+        return [raw_path.strip()]
+    return [p.strip() for p in raw_path.split(sep) if p.strip()]
+
+
+def pathway_hit(path, index):
+    """First (gene, pathway) on the path where the gene belongs to the pathway, or None."""
+    if index is None or not path:
+        return None
+    nodes = np.asarray(path, dtype=object)
+    pws = nodes[index.pathways.get_indexer(pd.Index(nodes, dtype=object)) >= 0]
+    if not len(pws):
+        return None
+    pw = np.repeat(pws, len(nodes))
+    genes = np.tile(nodes, len(pws))
+    hit = np.flatnonzero(index.in_pathway(pw, genes))
+    return (genes[hit[0]], pw[hit[0]]) if len(hit) else None
+
+
+def rule_explanations(drug, path, rule_values, index=None):
+    """One sentence per aggregator rule, in RULE_NAMES order."""
+    out = []
+    hit = pathway_hit(path, index)
+    if hit is not None:
+        out.append(f"target_in_pathway: gene {hit[0]} on the path belongs to pathway {hit[1]}")
+    elif rule_values.get("target_in_pathway", 0.0) > 0:
+        out.append("target_in_pathway: a gene on the path belongs to a pathway on the path")
+    else:
+        out.append("target_in_pathway: no gene on the path belongs to a pathway on the path")
+
+    has_props = False
+    if index is not None:
+        i = index.drug_ids([drug])[0]
+        has_props = bool(i >= 0 and index.has_props[i])
+    if index is not None and not has_props:
+        out.append("bbb_check: no blood-brain barrier data for this drug")
+        out.append("toxicity_ok: no toxicity data for this drug")
+    else:
+        out.append(f"bbb_check: blood-brain barrier permeability {rule_values.get('bbb_check', 0.0):.2f}")
+        tox_ok = rule_values.get("toxicity_ok", 0.0)
+        out.append(f"toxicity_ok: toxicity {1.0 - tox_ok:.2f} (score {tox_ok:.2f})")
+
+    if rule_values.get("mechanism_consistent", 0.0) > 0:
+        out.append(f"mechanism_consistent: {len(path) - 2} intermediate node(s), no node revisited")
+    elif len(path) < 3:
+        out.append("mechanism_consistent: path has no intermediate node")
+    else:
+        out.append("mechanism_consistent: path revisits a node")
+
+    hops = max(len(path) - 1, 0)
+    out.append(f"meta_path_score: {hops}-hop path (score {rule_values.get('meta_path_score', 0.0):.2f})")
+    return out
+
+
+class FrameCandidates:
+    """(drug, disease) lookups over a frame in the aggregate_scores output layout."""
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        keys = pd.MultiIndex.from_arrays([self.df["drug"].astype(str), self.df["disease"].astype(str)])
+        # only the first (best) row of each pair is used
+        first = ~keys.duplicated(keep="first")
+        self._keys = keys[first]
+        self._rows = np.flatnonzero(first)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, drug, disease):
+        pos = self._keys.get_indexer(pd.MultiIndex.from_tuples([(str(drug), str(disease))]))[0]
+        return None if pos < 0 else self.df.iloc[self._rows[pos]]
+
+    def top(self, n, disease=None):
+        ranked = self.df.iloc[self._rows]
+        if disease is not None:
+            ranked = ranked[ranked["disease"].astype(str) == str(disease)]
+        return ranked.nlargest(n, "final_score", keep="first") if n else ranked
+
+
+class ExplanationService:
+    """
+    On-demand explanations for ranked candidates.
+
+    candidates is a frame in the aggregate_scores output layout, or any object
+    with lookup(drug, disease) -> row and top(n, disease) -> frame (such as the
+    app's CandidateTable). index is an optional RuleIndex used to name the
+    gene/pathway behind target_in_pathway and to tell missing drug properties
+    from zero values.
+    """
+
+    def __init__(self, candidates, index=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.candidates = FrameCandidates(candidates) if isinstance(candidates, pd.DataFrame) else candidates
+        self.index = index
+        # bound method wrapped per instance so each service has its own cache
+        self.explain = lru_cache(maxsize=cache_size)(self._explain)
+
+    @classmethod
+    def from_files(cls, ranked_csv=None, store=None, drugprops_csv=None, pathway_csv=None,
+                   cache_size=DEFAULT_CACHE_SIZE):
+        """Load candidates from the ranked CSV or a component store (store wins when both are given)."""
+        if store is not None:
+            from symbolic_module.component_store import ComponentStore
+            candidates = ComponentStore(store).rerank()
+        else:
+            candidates = pd.read_csv(ranked_csv)
+        index = RuleIndex.from_files(drugprops_csv, pathway_csv) if drugprops_csv or pathway_csv else None
+        return cls(candidates, index, cache_size)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def cache_info(self):
+        return self.explain.cache_info()
+
+    def clear_cache(self):
+        self.explain.cache_clear()
+
+    def _explain(self, drug, disease):
+        """Explanation dict for one pair, or None if the pair is not ranked."""
+        row = self.candidates.lookup(drug, disease)
+        if row is None:
+            return None
+        path = split_path(row.get("best_path", ""))
+        values = {name: float(row.get(f"rule_{name}", 0.0)) for name in RULE_NAMES}
+        reasons = rule_explanations(str(drug), path, values, self.index)
+        scores = {c: float(row.get(c, 0.0)) for c in ("final_score", "neural_score", "best_path_score", "symbolic_score")}
+        return {
+            "drug": str(drug),
+            "disease": str(disease),
+            **scores,
+            "best_path": path,
+            "rules": values,
+            "rule_explanations": reasons,
+            "text": format_explanation(drug, disease, scores["neural_score"], scores["symbolic_score"],
+                                       reasons, " -> ".join(path) if path else "(none)"),
+        }
+
+    def explain_top(self, top_n=100, disease=None):
+        """Explanations for the best top_n candidates (optionally of one disease), best first."""
+        ranked = self.candidates.top(top_n, disease)
+        return [self.explain(str(d), str(x)) for d, x in zip(ranked["drug"], ranked["disease"])]
+
+
+def write_explanations(explanations, out_jsonl):
+    with open(out_jsonl, "w", encoding="utf-8") as fh:
+        for item in explanations:
+            fh.write(json.dumps(item) + "\n")
+    print(f"Wrote {len(explanations)} explanations to {out_jsonl}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--ranked", default="artifacts/final_ranked_candidates.csv")
+    p.add_argument("--store", default=None, help="component store to read candidates from instead of --ranked")
+    p.add_argument("--drugprops", default="data/drug_properties.csv")
+    p.add_argument("--pathway", default="data/pathway_genes.csv")
+    p.add_argument("--top_n", type=int, default=100)
+    p.add_argument("--disease", default=None, help="only explain candidates for this disease")
+    p.add_argument("--out", default="artifacts/explanations.jsonl")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        service = ExplanationService.from_files(args.ranked, args.store, args.drugprops, args.pathway)
+    except FileNotFoundError as e:
+        print(f"[WARN] {e}", file=sys.stderr)
+        sys.exit(1)
+    write_explanations(service.explain_top(args.top_n, args.disease), args.out)
@@ -0,0 +1,185 @@
+# symbolic_module/instrument.py
+"""
+Per-stage instrumentation for the batch pipelines.
+
+A RunReport times named stages (wall and CPU seconds), samples the process RSS
+in a background thread to get the peak memory of each stage, and collects
+counters. write() emits everything as one JSON document; with profile_dir set,
+every stage is also run under cProfile and dumped to <profile_dir>/<stage>.prof
+(inspect with `python -m pstats` or snakeviz). Stages entered with
+accumulate=True (e.g. once per chunk) are merged into a single entry.
+
+    with RunReport("aggregate", params={...}) as report:
+        with report.stage("parse_paths"):
+            ...
+        report.count("records_parsed", n)
+        report.write("artifacts/final_ranked_candidates_report.json")
+
+Leaving the with block (or close()) stops the RSS sampler thread.
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+SAMPLE_INTERVAL = 0.05
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # no procfs: fall back to the lifetime peak (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def lifetime_peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RssSampler(threading.Thread):
+    """Polls RSS and keeps the maximum since the last reset()."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def reset(self):
+        """Start a new peak window; returns the peak of the previous one."""
+        rss = current_rss()
+        peak = max(self.peak, rss)
+        self.peak = rss
+        return peak
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class RunReport:
+    """Stage timings, peak RSS and counters for one pipeline run."""
+
+    def __init__(self, name, params=None, profile_dir=None, sample_interval=SAMPLE_INTERVAL):
+        self.name = name
+        self.params = dict(params or {})
+        self.profile_dir = profile_dir
+        self.stages = []
+        self.counters = {}
+        self._profiles = {}
+        self.started = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._sampler = _RssSampler(sample_interval)
+        self._sampler.start()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the RSS sampler thread."""
+        self._sampler.stop()
+        if self._sampler.is_alive() and self._sampler is not threading.current_thread():
+            self._sampler.join()
+
+    def _entry(self, name):
+        return next((s for s in self.stages if s["stage"] == name), None)
+
+    @contextlib.contextmanager
+    def stage(self, name, accumulate=False):
+        """Time the enclosed block and record its peak RSS."""
+        rss_start = current_rss()
+        self._sampler.reset()
+        profiler = None
+        if self.profile_dir:
+            key = name if accumulate else (name, len(self.stages))
+            profiler = self._profiles.setdefault(key, cProfile.Profile())
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            entry = {
+                "stage": name,
+                "wall_s": time.perf_counter() - wall,
+                "cpu_s": time.process_time() - cpu,
+                "rss_start_mb": round(rss_start / 2**20, 1),
+                "rss_end_mb": round(current_rss() / 2**20, 1),
+                "peak_rss_mb": round(self._sampler.reset() / 2**20, 1),
+                "calls": 1,
+            }
+            prev = self._entry(name) if accumulate else None
+            if prev is not None:
+                prev["wall_s"] += entry["wall_s"]
+                prev["cpu_s"] += entry["cpu_s"]
+                prev["rss_end_mb"] = entry["rss_end_mb"]
+                prev["peak_rss_mb"] = max(prev["peak_rss_mb"], entry["peak_rss_mb"])
+                prev["calls"] += 1
+                entry = prev
+            else:
+                self.stages.append(entry)
+            if profiler is not None:
+                entry.setdefault("profile", os.path.join(self.profile_dir, f"{len(self.stages) - 1:02d}_{name}.prof"))
+                profiler.dump_stats(entry["profile"])
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def set(self, name, value):
+        self.counters[name] = value
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "total_wall_s": round(time.perf_counter() - self._t0, 6),
+            "peak_rss_mb": round(lifetime_peak_rss() / 2**20, 1),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            "params": self.params,
+            "stages": [dict(s, wall_s=round(s["wall_s"], 6), cpu_s=round(s["cpu_s"], 6)) for s in self.stages],
+            "counters": self.counters,
+        }
+
+    def summary(self):
+        """One line per stage, for the console."""
+        lines = [f"{s['stage']:<20} {s['wall_s']:>9.3f}s  peak {s['peak_rss_mb']:>8.1f} MB"
+                 + (f"  ({s['calls']} calls)" if s["calls"] > 1 else "") for s in self.stages]
+        return "\n".join(lines)
+
+    def write(self, path):
+        self.close()
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, indent=2, default=str)
+        print(f"Wrote run report to {path}")
+        return path
+
+
+def default_report_path(out_csv):
+    """Where the pipelines put the run report for a given output CSV."""
+    return os.path.splitext(out_csv)[0] + "_report.json"
@@ -0,0 +1,254 @@
+# symbolic_module/kg_index.py
+"""
+Compact knowledge-graph index for neighbourhood queries.
+
+Nodes and relations are mapped to dense integer IDs and every edge is stored in
+both directions in a CSR layout (indptr / neighbour / relation / forward flag),
+so all out- and in-edges of a node are one contiguous slice. The index is built
+once from the triples file and cached next to it as <triples>.kgindex.npz,
+keyed by the file's mtime and size.
+
+KGIndex.subgraph(drug, disease) returns the union of the connecting paths of at
+most max_hops edges plus a few immediate neighbours of the nodes on them, capped
+by a node budget and optionally restricted to some relations. Both BFS passes
+are vectorized over whole frontiers.
+
+Usage:
+python -m symbolic_module.kg_index \
+  --triples data/kg_triples.csv --lookup data/node_lookup.csv \
+  --source Metformin --target Alzheimers --max_hops 3
+"""
+
+import argparse
+import fnmatch
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+INDEX_VERSION = 1
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return np.array([INDEX_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def read_triples(triples_path):
+    """head, relation, tail frame from kg_triples.csv (with header) or a tab-separated DRKG file."""
+    if triples_path.endswith(".csv"):
+        df = pd.read_csv(triples_path, dtype=str)
+        return df.iloc[:, :3].set_axis(["head", "relation", "tail"], axis=1)
+    # DRKG relation names contain spaces, so split on tabs only
+    return pd.read_csv(triples_path, sep="\t", header=None, names=["head", "relation", "tail"], dtype=str)
+
+
+def _gather(indptr, rows):
+    """CSR entry positions of all edges of the given rows, and the row each came from."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    pos = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths) + starts[owner]
+    return pos, rows[owner]
+
+
+class KGIndex:
+    """Bidirectional CSR adjacency over integer node / relation IDs."""
+
+    def __init__(self, nodes, relations, indptr, neighbour, relation, forward, aliases=None):
+        self.nodes = pd.Index(nodes)
+        self.relations = pd.Index(relations)
+        self.indptr = indptr
+        self.neighbour = neighbour
+        self.relation = relation
+        self.forward = forward
+        self.degree = np.diff(indptr)
+        # lower-cased display names / ids (e.g. from node_lookup.csv) -> node ID
+        self.aliases = aliases if aliases is not None else {}
+
+    @classmethod
+    def from_triples(cls, triples):
+        codes, nodes = pd.factorize(pd.concat([triples["head"], triples["tail"]], ignore_index=True))
+        rel, relations = pd.factorize(triples["relation"])
+        m = len(triples)
+        head, tail = codes[:m], codes[m:]
+        src = np.concatenate([head, tail])
+        dst = np.concatenate([tail, head])
+        rel2 = np.concatenate([rel, rel])
+        fwd = np.concatenate([np.ones(m, dtype=bool), np.zeros(m, dtype=bool)])
+        order = np.lexsort((dst, src))
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+        return cls(np.asarray(nodes, dtype=str), np.asarray(relations, dtype=str), indptr,
+                   dst[order].astype(np.int32), rel2[order].astype(np.int32), fwd[order])
+
+    @classmethod
+    def load(cls, triples_path, lookup_csv=None, cache=True):
+        """Index for triples_path, read from / written to the .kgindex.npz cache next to it."""
+        cache_path = triples_path + ".kgindex.npz"
+        sig = _signature(triples_path)
+        index = None
+        if cache and os.path.exists(cache_path):
+            with np.load(cache_path, allow_pickle=False) as z:
+                if np.array_equal(z["signature"], sig):
+                    index = cls(z["nodes"], z["relations"], z["indptr"], z["neighbour"], z["relation"], z["forward"])
+        if index is None:
+            index = cls.from_triples(read_triples(triples_path))
+            if cache:
+                try:
+                    np.savez(cache_path, signature=sig, nodes=np.asarray(index.nodes, dtype=str),
+                             relations=np.asarray(index.relations, dtype=str), indptr=index.indptr,
+                             neighbour=index.neighbour, relation=index.relation, forward=index.forward)
+                except OSError as e:
+                    print(f"[WARN] Could not write KG index cache {cache_path}: {e}", file=sys.stderr)
+        if lookup_csv:
+            index.add_aliases(lookup_csv)
+        return index
+
+    def add_aliases(self, lookup_csv):
+        """Let display names / ids from node_lookup.csv (node_key, id, name columns) resolve to nodes."""
+        try:
+            df = pd.read_csv(lookup_csv, dtype=str)
+        except Exception:
+            print(f"[WARN] Could not read node lookup: {lookup_csv}. Only exact node keys resolve.", file=sys.stderr)
+            return
+        ids = self.nodes.get_indexer(df["node_key"])
+        for col in ("name", "id"):
+            if col in df.columns:
+                for alias, i in zip(df[col].str.lower(), ids):
+                    if i >= 0 and isinstance(alias, str):
+                        self.aliases.setdefault(alias, int(i))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def resolve(self, name):
+        """Node ID for a node key or a known alias (case-insensitive), else -1."""
+        i = self.nodes.get_indexer([name])[0]
+        return int(i) if i >= 0 else self.aliases.get(str(name).lower(), -1)
+
+    def relation_mask(self, relations=None):
+        """Per-edge boolean mask for the given relation names / glob patterns (None = all)."""
+        if not relations:
+            return None
+        keep = np.zeros(len(self.relations), dtype=bool)
+        for pattern in relations:
+            keep |= np.fromiter((fnmatch.fnmatchcase(r, pattern) for r in self.relations), dtype=bool,
+                                count=len(self.relations))
+        return keep[self.relation]
+
+    def bfs(self, start, max_hops, edge_ok=None, hub_degree=None):
+        """Hop distance from start to every node within max_hops (-1 beyond)."""
+        dist = np.full(len(self.nodes), -1, dtype=np.int16)
+        dist[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+        for hop in range(1, max_hops + 1):
+            if hub_degree is not None and hop > 1:
+                # do not walk through hubs; they are still reached as endpoints
+                frontier = frontier[self.degree[frontier] <= hub_degree]
+            pos, _ = _gather(self.indptr, frontier)
+            if edge_ok is not None:
+                pos = pos[edge_ok[pos]]
+            nxt = np.unique(self.neighbour[pos])
+            nxt = nxt[dist[nxt] < 0]
+            if not len(nxt):
+                break
+            dist[nxt] = hop
+            frontier = nxt.astype(np.int64)
+        return dist
+
+    def subgraph(self, source, target, max_hops=3, node_budget=40, relations=None,
+                 neighbours_per_node=2, hub_degree=5000):
+        """
+        Nodes and edges of the paths of at most max_hops edges between source and
+        target, plus up to neighbours_per_node neighbours of each path node, at
+        most node_budget nodes in total. Returns (nodes_df, edges_df); both are
+        empty when an endpoint is unknown. dist_source / dist_target are hop
+        counts, -1 when farther than max_hops - 1.
+        """
+        s, t = self.resolve(source), self.resolve(target)
+        empty = (pd.DataFrame(columns=["node", "role", "dist_source", "dist_target"]),
+                 pd.DataFrame(columns=["head", "relation", "tail"]))
+        if s < 0 or t < 0:
+            return empty
+        edge_ok = self.relation_mask(relations)
+        # interior nodes of a <= max_hops walk are within max_hops - 1 of both ends
+        ds = self.bfs(s, max_hops - 1, edge_ok, hub_degree)
+        dt = self.bfs(t, max_hops - 1, edge_ok, hub_degree)
+
+        # nodes on some connecting walk of <= max_hops edges; shortest and most specific first
+        on_path = np.flatnonzero((ds >= 0) & (dt >= 0) & (ds.astype(np.int32) + dt <= max_hops))
+        order = np.lexsort((self.degree[on_path], ds[on_path].astype(np.int32) + dt[on_path]))
+        keep = list(dict.fromkeys([s, t] + on_path[order].tolist()))[:node_budget]
+        roles = {n: "path" for n in keep}
+        roles[s], roles[t] = "source", "target"
+
+        # edges that advance from source towards target within the hop budget
+        kept = np.zeros(len(self.nodes), dtype=bool)
+        kept[keep] = True
+        pos, owner = _gather(self.indptr, np.asarray(keep, dtype=np.int64))
+        nb = self.neighbour[pos]
+        ok = kept[nb] & (ds[owner].astype(np.int32) + 1 + dt[nb] <= max_hops) & (ds[owner] >= 0) & (dt[nb] >= 0)
+        if edge_ok is not None:
+            ok &= edge_ok[pos]
+        edge_pos = [pos[ok]]
+        edge_owner = [owner[ok]]
+
+        # a few immediate neighbours around the path, lowest degree first
+        room = node_budget - len(keep)
+        if room > 0 and neighbours_per_node:
+            out = ~kept[nb] if edge_ok is None else ~kept[nb] & edge_ok[pos]
+            frame = pd.DataFrame({"pos": pos[out], "owner": owner[out], "node": nb[out]})
+            frame["degree"] = self.degree[frame["node"].to_numpy()]
+            frame = (frame.sort_values(["degree", "node"], kind="stable")
+                     .drop_duplicates("node").groupby("owner", sort=False).head(neighbours_per_node)
+                     .head(room))
+            for n in frame["node"]:
+                roles[int(n)] = "neighbour"
+            keep += frame["node"].astype(int).tolist()
+            edge_pos.append(frame["pos"].to_numpy())
+            edge_owner.append(frame["owner"].to_numpy())
+
+        ids = np.asarray(keep, dtype=np.int64)
+        nodes_df = pd.DataFrame({
+            "node": np.asarray(self.nodes)[ids],
+            "role": [roles[i] for i in keep],
+            "dist_source": ds[ids],
+            "dist_target": dt[ids],
+        })
+        pos = np.concatenate(edge_pos)
+        a = np.concatenate(edge_owner)
+        b = self.neighbour[pos]
+        fwd = self.forward[pos]
+        names = np.asarray(self.nodes)
+        edges_df = pd.DataFrame({
+            "head": names[np.where(fwd, a, b)],
+            "relation": np.asarray(self.relations)[self.relation[pos]],
+            "tail": names[np.where(fwd, b, a)],
+        }).drop_duplicates(ignore_index=True)
+        return nodes_df, edges_df
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--triples", default="data/kg_triples.csv")
+    p.add_argument("--lookup", default="data/node_lookup.csv")
+    p.add_argument("--source", required=True)
+    p.add_argument("--target", required=True)
+    p.add_argument("--max_hops", type=int, default=3)
+    p.add_argument("--node_budget", type=int, default=40)
+    p.add_argument("--relations", nargs="*", default=None, help="relation names or glob patterns to keep")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    kg = KGIndex.load(args.triples, args.lookup)
+    nodes, edges = kg.subgraph(args.source, args.target, args.max_hops, args.node_budget, args.relations)
+    print(nodes.to_string(index=False))
+    print()
+    print(edges.to_string(index=False))
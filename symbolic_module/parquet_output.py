@@ -0,0 +1,88 @@
+# symbolic_module/parquet_output.py
+"""
+Parquet output for final_ranked_candidates.
+
+Layout under one base directory:
+
+  candidates/disease=<name>/part-*.parquet   all pairs, partitioned by disease and
+                                             sorted by final_score (row-group
+                                             min/max stats let readers skip groups)
+  top_k_per_disease.parquet                  best K pairs of every disease
+  top_n_global.parquet                       best N pairs overall
+
+A per-disease query reads one partition (or one small table) instead of the
+whole CSV.
+"""
+
+import os
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+ROW_GROUP_ROWS = 64 * 1024
+
+
+def default_parquet_dir(out_csv):
+    """Parquet base directory that sits next to the CSV output."""
+    return os.path.splitext(out_csv)[0]
+
+
+def top_k_per_disease(df, k):
+    return (df.sort_values("final_score", ascending=False, kind="stable")
+            .groupby("disease", sort=False).head(k)
+            .sort_values(["disease", "final_score"], ascending=[True, False], kind="stable")
+            .reset_index(drop=True))
+
+
+def write_top_tables(df, base_dir, top_k=50, top_n=1000, is_sorted=False):
+    """Write the small per-disease top-K and global top-N tables."""
+    os.makedirs(base_dir, exist_ok=True)
+    ranked = df if is_sorted else df.sort_values("final_score", ascending=False, kind="stable")
+    ranked.head(top_n).reset_index(drop=True).to_parquet(os.path.join(base_dir, "top_n_global.parquet"), index=False)
+    top_k_per_disease(ranked, top_k).to_parquet(os.path.join(base_dir, "top_k_per_disease.parquet"), index=False)
+
+
+def write_ranked_parquet(df, base_dir, top_k=50, top_n=1000, row_group_rows=ROW_GROUP_ROWS):
+    """Write the partitioned candidate dataset plus the two top tables. Returns False without pyarrow."""
+    if pq is None:
+        print(f"[WARN] pyarrow not installed; not writing Parquet output to {base_dir}", file=sys.stderr)
+        return False
+    os.makedirs(base_dir, exist_ok=True)
+    ordered = df.sort_values(["disease", "final_score"], ascending=[True, False], kind="stable")
+    table = pa.Table.from_pandas(ordered, preserve_index=False)
+    n_diseases = ordered["disease"].nunique()
+    ds.write_dataset(
+        table, os.path.join(base_dir, "candidates"), format="parquet",
+        partitioning=["disease"], partitioning_flavor="hive",
+        existing_data_behavior="delete_matching",
+        max_partitions=max(1024, n_diseases),
+        max_rows_per_group=row_group_rows,
+        min_rows_per_group=min(row_group_rows, 1024),
+    )
+    write_top_tables(df, base_dir, top_k, top_n)
+    print(f"Wrote Parquet candidates for {n_diseases} diseases (+ top-{top_k} per disease, global top-{top_n}) to {base_dir}")
+    return True
+
+
+def read_disease(base_dir, disease, min_score=None, columns=None):
+    """All candidates for one disease, best first; only that partition is read."""
+    filters = [("disease", "=", disease)]
+    if min_score is not None:
+        filters.append(("final_score", ">=", min_score))
+    table = pq.read_table(os.path.join(base_dir, "candidates"), filters=filters, columns=columns)
+    return table.to_pandas().sort_values("final_score", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def read_top_k(base_dir, disease=None):
+    """The precomputed per-disease top-K table, optionally for one disease."""
+    filters = [("disease", "=", disease)] if disease is not None else None
+    return pq.read_table(os.path.join(base_dir, "top_k_per_disease.parquet"), filters=filters).to_pandas()
+
+
+def read_top_n(base_dir):
+    return pq.read_table(os.path.join(base_dir, "top_n_global.parquet")).to_pandas()
@@ -0,0 +1,139 @@
+# symbolic_module/paths_reader.py
+"""
+Parallel JSONL ingestion for paths.jsonl (or a set of shards).
+
+Each file is cut into byte ranges aligned to newlines and the ranges are parsed
+in a process pool. Bad lines are skipped with the same [WARN] message as
+aggregate_scores.read_paths_jsonl_safe, with line numbers resolved across ranges
+and counts summed over workers.
+"""
+
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson  # optional; several times faster than json.loads
+    _fast_loads = orjson.loads
+except ImportError:
+    _fast_loads = json.loads
+
+# target size of one byte range handed to a worker
+CHUNK_BYTES = 32 * 1024 * 1024
+
+
+def expand_paths(paths):
+    """Accept one path, a glob, or a list of either; return existing files in order."""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = []
+    for p in paths:
+        p = str(p)
+        matches = sorted(glob.glob(p)) if glob.has_magic(p) else [p]
+        files.extend(matches)
+    return files
+
+
+def split_byte_ranges(path, n_parts):
+    """Split a file into at most n_parts [start, end) ranges that begin on line starts."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    bounds = [0]
+    with open(path, "rb") as fh:
+        for k in range(1, n_parts):
+            fh.seek(max(size * k // n_parts, bounds[-1]))
+            fh.readline()
+            pos = fh.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_range(task):
+    """
+    Worker: parse one byte range. Returns (items, n_lines, n_parsed, n_records,
+    warnings) where warnings are (line number within the range, error text).
+    """
+    path, start, end, transform = task
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        buf = fh.read(end - start)
+    lines = buf.split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+
+    items = []
+    warnings = []
+    n_parsed = 0
+    n_records = 0
+    for i, raw in enumerate(lines, start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            obj = _fast_loads(line)
+        except Exception as e_fast:
+            try:
+                # stdlib decoder is more lenient (NaN, Infinity)
+                obj = json.loads(line)
+            except Exception:
+                warnings.append((i, str(e_fast)))
+                continue
+        n_parsed += 1
+        if not isinstance(obj, dict):
+            continue
+        n_records += 1
+        if transform is not None:
+            obj = transform(obj)
+            if obj is None:
+                continue
+        items.append(obj)
+    return items, len(lines), n_parsed, n_records, warnings
+
+
+def read_jsonl_parallel(paths, workers=None, transform=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Parse JSONL files in parallel.
+
+    transform, if given, must be a top-level (picklable) function; it runs in the
+    workers on every dict record and may return None to drop it.
+
+    Returns (items, stats) with items in file order and
+    stats = {"lines", "parsed", "records", "invalid"}, where records counts the
+    dict objects before transform.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    for file_no, path in enumerate(expand_paths(paths)):
+        if not os.path.exists(path):
+            print(f"[WARN] paths file not found: {path}. No paths will be processed.", file=sys.stderr)
+            continue
+        n_parts = max(workers, -(-os.path.getsize(path) // chunk_bytes))
+        tasks.extend((file_no, (path, start, end, transform)) for start, end in split_byte_ranges(path, n_parts))
+
+    items = []
+    stats = {"lines": 0, "parsed": 0, "records": 0, "invalid": 0}
+    line_offset = {}
+    if not tasks:
+        return items, stats
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_parse_range, [task for _, task in tasks])
+        for (file_no, task), (part, n_lines, n_parsed, n_records, warnings) in zip(tasks, results):
+            path = task[0]
+            offset = line_offset.get(file_no, 0)
+            for i, err in warnings:
+                print(f"[WARN] Skipping invalid JSON at line {offset + i} in {path}: {err}", file=sys.stderr)
+            line_offset[file_no] = offset + n_lines
+            items.extend(part)
+            stats["lines"] += n_lines
+            stats["parsed"] += n_parsed
+            stats["records"] += n_records
+            stats["invalid"] += len(warnings)
+    return items, stats
@@ -0,0 +1,46 @@
+# symbolic_module/rerank.py
+"""
+Re-rank candidates under new alpha/beta/gamma from the stored component matrix,
+without re-running the aggregation.
+
+Usage:
+python -m symbolic_module.rerank \
+  --store artifacts/final_ranked_candidates_components.parquet \
+  --alpha 0.5 --beta 0.3 --gamma 0.2 --top_n 500 \
+  --out artifacts/final_ranked_candidates.csv
+"""
+
+import argparse
+import json
+import time
+from symbolic_module.component_store import ComponentStore
+
+
+def rerank(store_path, out_csv, alpha=0.4, beta=0.35, gamma=0.25, top_n=None, rule_weights=None):
+    t0 = time.time()
+    store = ComponentStore(store_path)
+    out_df = store.rerank(alpha, beta, gamma, top_n, rule_weights)
+    # components are stored as float32; don't print digits they never had
+    out_df.to_csv(out_csv, index=False, float_format="%.7g")
+    print(f"Re-ranked {len(store)} pairs (alpha={alpha}, beta={beta}, gamma={gamma}); "
+          f"wrote {len(out_df)} rows to {out_csv} in {time.time() - t0:.2f}s")
+    return out_df
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--store", default="artifacts/final_ranked_candidates_components.parquet")
+    p.add_argument("--out", default="artifacts/final_ranked_candidates.csv")
+    p.add_argument("--alpha", type=float, default=0.4)
+    p.add_argument("--beta", type=float, default=0.35)
+    p.add_argument("--gamma", type=float, default=0.25)
+    p.add_argument("--top_n", type=int, default=None, help="keep only the best N pairs")
+    p.add_argument("--rule_weights", default=None,
+                   help='JSON weights for the symbolic rules, e.g. \'{"bbb_check": 2, "toxicity_ok": 1}\'')
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rule_weights = json.loads(args.rule_weights) if args.rule_weights else None
+    rerank(args.store, args.out, args.alpha, args.beta, args.gamma, args.top_n, rule_weights)
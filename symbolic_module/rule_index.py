@@ -0,0 +1,224 @@
+# symbolic_module/rule_index.py
+"""
+Integer-ID indexes behind the symbolic rules.
+
+Drugs, diseases, pathways and genes are mapped to dense integer IDs once. Each
+drug's targets, each disease's genes and each pathway's genes are stored as a
+row of a boolean CSR matrix (i.e. a sorted gene-ID array per entity), so rule
+checks become sparse row intersections that can be evaluated for millions of
+(drug, disease) pairs in one call.
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# diseases for which rule_bbb_requirement asks the drug to cross the blood-brain barrier
+CNS_DISEASES = ("alzheimer's", "parkinson's", "epilepsy")
+
+# each hop of a supporting path adds this much to meta_path_score (capped at 1)
+META_PATH_HOP_WEIGHT = 0.3
+
+# PoLo-style rule weights, per shared item
+PATHWAY_OVERLAP_WEIGHT = 0.2
+TARGET_HIT_WEIGHT = 0.3
+ANTAGONIST_WEIGHT = -0.4
+TOXICITY_WEIGHT = -0.2
+BBB_MISSING_PENALTY = -0.5
+BBB_BONUS = 0.3
+
+POLO_RULE_NAMES = ["pathway_overlap", "target_in_disease_genes", "antagonistic_gene_interactions",
+                   "bbb_requirement", "toxicity"]
+
+
+def _to_unit_float(col):
+    """Coerce a property column (bool, yes/no, numeric) to floats in 0..1."""
+    as_bool = col.astype(str).str.strip().str.lower().map(
+        {"true": 1.0, "yes": 1.0, "false": 0.0, "no": 0.0})
+    vals = pd.to_numeric(col, errors="coerce").fillna(as_bool).fillna(0.0)
+    return vals.clip(0.0, 1.0).astype(float)
+
+
+def _empty_drug_properties():
+    return pd.DataFrame(columns=["bbb", "toxicity"], index=pd.Index([], name="drug"), dtype=float)
+
+
+def load_drug_properties(drugprops_csv):
+    """
+    Load per-drug properties indexed by drug name.
+    Expected columns: drug, bbb (0..1), toxicity (0..1, higher is worse).
+    """
+    try:
+        df = pd.read_csv(drugprops_csv, dtype=str)
+    except Exception:
+        print(f"[WARN] Could not read drug properties: {drugprops_csv}. Drug rules will score 0.", file=sys.stderr)
+        return _empty_drug_properties()
+    key = "drug" if "drug" in df.columns else df.columns[0]
+    props = pd.DataFrame({
+        "bbb": _to_unit_float(df["bbb"]).to_numpy() if "bbb" in df.columns else 0.0,
+        "toxicity": _to_unit_float(df["toxicity"]).to_numpy() if "toxicity" in df.columns else 0.0,
+    }, index=pd.Index(df[key].astype(str), name="drug"))
+    return props[~props.index.duplicated(keep="first")]
+
+
+def load_gene_sets(csv_path, key_cols, gene_cols, what):
+    """
+    Load {key: set(genes)} from a two-column layer file, picking the first
+    matching column name from key_cols / gene_cols.
+    """
+    try:
+        df = pd.read_csv(csv_path, dtype=str).dropna()
+    except Exception:
+        print(f"[WARN] Could not read {what}: {csv_path}. Rules using it will score 0.", file=sys.stderr)
+        return {}
+    kcol = next((c for c in key_cols if c in df.columns), df.columns[0])
+    gcol = next((c for c in gene_cols if c in df.columns), df.columns[1])
+    return {k: set(g) for k, g in df.groupby(kcol)[gcol]}
+
+
+def load_pathway_genes(pathway_csv):
+    """Load pathway membership as {pathway: set(genes)} from pathway,gene rows."""
+    return load_gene_sets(pathway_csv, ["pathway", "pathway_id"], ["gene", "gene_symbol", "gene_id"], "pathway genes")
+
+
+def _membership_matrix(groups, key_index, gene_index):
+    """Boolean CSR (keys x genes) from {key: iterable of genes}; unknown names are dropped."""
+    keys = list(groups.keys())
+    lengths = np.fromiter((len(groups[k]) for k in keys), dtype=np.int64, count=len(keys))
+    flat = [g for k in keys for g in groups[k]]
+    rows = np.repeat(key_index.get_indexer(pd.Index(keys)), lengths)
+    cols = gene_index.get_indexer(pd.Index(flat)) if flat else np.zeros(0, dtype=np.int64)
+    ok = (rows >= 0) & (cols >= 0)
+    m = sp.csr_matrix((np.ones(ok.sum(), dtype=np.int8), (rows[ok], cols[ok])),
+                      shape=(len(key_index), len(gene_index)))
+    m.sum_duplicates()
+    m.data[:] = 1
+    return m
+
+
+def row_overlap(A, B, ia, ib):
+    """|A[ia[k]] & B[ib[k]]| for every k; rows with a negative ID count as empty."""
+    ia = np.asarray(ia)
+    ib = np.asarray(ib)
+    out = np.zeros(len(ia))
+    ok = (ia >= 0) & (ib >= 0)
+    if ok.any() and A.shape[1]:
+        out[ok] = np.asarray(A[ia[ok]].multiply(B[ib[ok]]).sum(axis=1)).ravel()
+    return out
+
+
+class RuleIndex:
+    """Drug / disease / pathway gene sets and drug properties under integer IDs."""
+
+    def __init__(self, drug_props_df=None, pathway_genes=None, drug_targets=None,
+                 disease_genes=None, opposite_genes=None):
+        drug_props_df = drug_props_df if drug_props_df is not None else _empty_drug_properties()
+        pathway_genes = pathway_genes or {}
+        drug_targets = drug_targets or {}
+        disease_genes = disease_genes or {}
+        opposite_genes = opposite_genes or {}
+
+        all_genes = set()
+        for groups in (pathway_genes, drug_targets, disease_genes, opposite_genes):
+            for genes in groups.values():
+                all_genes.update(genes)
+        self.genes = pd.Index(sorted(all_genes))
+        self.drugs = pd.Index(drug_props_df.index.astype(str)).union(pd.Index(list(drug_targets), dtype=object))
+        self.diseases = pd.Index(sorted(set(disease_genes) | set(opposite_genes)))
+        self.pathways = pd.Index(sorted(pathway_genes))
+
+        # per-drug property columns (0 where a drug has no properties row)
+        pos = drug_props_df.index.astype(str)
+        self.bbb = drug_props_df["bbb"].reindex(self.drugs).fillna(0.0).to_numpy(dtype=float) \
+            if len(pos) else np.zeros(len(self.drugs))
+        self.toxicity = drug_props_df["toxicity"].reindex(self.drugs).fillna(0.0).to_numpy(dtype=float) \
+            if len(pos) else np.zeros(len(self.drugs))
+        self.has_props = self.drugs.isin(pos)
+
+        self.targets = _membership_matrix(drug_targets, self.drugs, self.genes)
+        self.disease_genes = _membership_matrix(disease_genes, self.diseases, self.genes)
+        self.opposite_genes = _membership_matrix(opposite_genes, self.diseases, self.genes)
+        self.pathway_genes = _membership_matrix(pathway_genes, self.pathways, self.genes)
+
+        # pathways reached by a drug's targets / containing a disease's genes
+        # (int32 products: int8 overlap counts wrap, e.g. 256 shared genes -> 0)
+        pathway_genes_t = self.pathway_genes.T.astype(np.int32)
+        self.drug_pathways = (self.targets.astype(np.int32) @ pathway_genes_t).astype(bool).tocsr()
+        self.disease_pathways = (self.disease_genes.astype(np.int32) @ pathway_genes_t).astype(bool).tocsr()
+
+        # sorted pathway_id * n_genes + gene_id keys for O(log n) membership tests
+        pw = self.pathway_genes.tocoo()
+        self.pathway_gene_keys = np.sort(pw.row.astype(np.int64) * len(self.genes) + pw.col)
+
+    @classmethod
+    def from_files(cls, drugprops_csv, pathway_csv, drug_targets_csv=None, disease_genes_csv=None,
+                   opposite_genes_csv=None):
+        drug_targets = disease_genes = opposite_genes = None
+        if drug_targets_csv:
+            drug_targets = load_gene_sets(drug_targets_csv, ["drug", "drug_id"],
+                                          ["gene_symbol", "gene_id", "gene"], "drug targets")
+        if disease_genes_csv:
+            disease_genes = load_gene_sets(disease_genes_csv, ["disease", "disease_id"],
+                                           ["gene_symbol", "gene_id", "gene"], "disease genes")
+        if opposite_genes_csv:
+            opposite_genes = load_gene_sets(opposite_genes_csv, ["disease", "disease_id"],
+                                            ["gene_symbol", "gene_id", "gene"], "opposite genes")
+        return cls(load_drug_properties(drugprops_csv), load_pathway_genes(pathway_csv),
+                   drug_targets, disease_genes, opposite_genes)
+
+    def drug_ids(self, drugs):
+        return self.drugs.get_indexer(pd.Index(drugs, dtype=object))
+
+    def disease_ids(self, diseases):
+        return self.diseases.get_indexer(pd.Index(diseases, dtype=object))
+
+    def drug_columns(self, drugs):
+        """bbb_check and toxicity_ok columns for an array of drugs (0 for drugs without properties)."""
+        ids = self.drug_ids(drugs)
+        known = ids >= 0
+        known[known] = self.has_props[ids[known]]
+        bbb = np.zeros(len(ids))
+        tox_ok = np.zeros(len(ids))
+        bbb[known] = self.bbb[ids[known]]
+        tox_ok[known] = 1.0 - self.toxicity[ids[known]]
+        return bbb, tox_ok
+
+    def in_pathway(self, pathways, genes):
+        """Elementwise: is genes[k] a member of pathways[k]?"""
+        p = self.pathways.get_indexer(pd.Index(pathways, dtype=object))
+        g = self.genes.get_indexer(pd.Index(genes, dtype=object))
+        ok = (p >= 0) & (g >= 0)
+        out = np.zeros(len(p), dtype=bool)
+        if ok.any() and len(self.pathway_gene_keys):
+            keys = p[ok].astype(np.int64) * len(self.genes) + g[ok]
+            at = np.searchsorted(self.pathway_gene_keys, keys)
+            at = np.minimum(at, len(self.pathway_gene_keys) - 1)
+            out[ok] = self.pathway_gene_keys[at] == keys
+        return out
+
+    def apply_all_rules(self, drugs, diseases):
+        """
+        The PoLo-style rule set of rules.apply_all_rules for many (drug, disease)
+        pairs at once. Returns a frame with one column per rule plus total.
+        """
+        d = self.drug_ids(drugs)
+        x = self.disease_ids(diseases)
+        dx = np.maximum(d, 0)
+        known_d = d >= 0
+
+        bbb_ok = np.where(known_d, self.bbb[dx] > 0, False) if len(self.drugs) else np.zeros(len(d), dtype=bool)
+        codes, uniq = pd.factorize(pd.Index(diseases, dtype=object))
+        needs = pd.Index(uniq).astype(str).str.lower().isin(CNS_DISEASES)[codes] if len(uniq) \
+            else np.zeros(len(codes), dtype=bool)
+        tox = np.where(known_d, self.toxicity[dx], 0.0) if len(self.drugs) else np.zeros(len(d))
+
+        res = pd.DataFrame({
+            "pathway_overlap": PATHWAY_OVERLAP_WEIGHT * row_overlap(self.drug_pathways, self.disease_pathways, d, x),
+            "target_in_disease_genes": TARGET_HIT_WEIGHT * row_overlap(self.targets, self.disease_genes, d, x),
+            "antagonistic_gene_interactions": ANTAGONIST_WEIGHT * row_overlap(self.targets, self.opposite_genes, d, x),
+            "bbb_requirement": np.where(needs & ~bbb_ok, BBB_MISSING_PENALTY, np.where(needs, BBB_BONUS, 0.0)),
+            "toxicity": TOXICITY_WEIGHT * tox,
+        })
+        res["total"] = res[POLO_RULE_NAMES].sum(axis=1)
+        return res
@@ -1,47 +1,119 @@
 # symbolic_module/rules.py
 
 import re
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from symbolic_module.rule_index import (
+    ANTAGONIST_WEIGHT, BBB_BONUS, BBB_MISSING_PENALTY, CNS_DISEASES, META_PATH_HOP_WEIGHT,
+    PATHWAY_OVERLAP_WEIGHT, POLO_RULE_NAMES, TARGET_HIT_WEIGHT, TOXICITY_WEIGHT, RuleIndex, row_overlap,
+    load_drug_properties, load_pathway_genes,
+)
+
+
+def _as_set(items):
+    """Reuse sets/frozensets as-is; only lists and other iterables are copied."""
+    return items if isinstance(items, (set, frozenset)) else set(items)
+
+# ---------------------------------------------------------------------------
+# Rules used by aggregate_scores (each returns a float in 0..1)
+# ---------------------------------------------------------------------------
+
+def target_in_pathway(best_path, pathway_genes):
+    """1.0 if a gene on the path belongs to a pathway that is also on the path."""
+    if not best_path:
+        return 0.0
+    if isinstance(pathway_genes, RuleIndex):
+        nodes = np.asarray(best_path, dtype=object)
+        pw = nodes[pathway_genes.pathways.get_indexer(pd.Index(nodes, dtype=object)) >= 0]
+        if not len(pw):
+            return 0.0
+        return float(pathway_genes.in_pathway(np.repeat(pw, len(nodes)), np.tile(nodes, len(pw))).any())
+    nodes = set(best_path)
+    for node in best_path:
+        genes = pathway_genes.get(node)
+        if genes and not nodes.isdisjoint(genes):
+            return 1.0
+    return 0.0
+
+
+def _drug_property(drug, drug_props_df, column):
+    if isinstance(drug_props_df, RuleIndex):
+        i = drug_props_df.drugs.get_indexer([drug])[0]
+        if i < 0 or not drug_props_df.has_props[i]:
+            return None
+        return float(getattr(drug_props_df, column)[i])
+    if drug in drug_props_df.index:
+        return float(drug_props_df.at[drug, column])
+    return None
+
+
+def bbb_check(drug, drug_props_df):
+    """Blood-brain-barrier permeability of the drug (0 when unknown)."""
+    bbb = _drug_property(drug, drug_props_df, "bbb")
+    return 0.0 if bbb is None else bbb
+
+
+def toxicity_ok(drug, drug_props_df):
+    """1 - toxicity of the drug (0 when unknown)."""
+    tox = _drug_property(drug, drug_props_df, "toxicity")
+    return 0.0 if tox is None else 1.0 - tox
+
+
+def mechanism_consistent(best_path):
+    """1.0 if the path goes drug -> intermediate(s) -> disease without revisiting a node."""
+    return float(len(best_path) >= 3 and len(set(best_path)) == len(best_path))
+
+
+def meta_path_score(best_path):
+    """META_PATH_HOP_WEIGHT per hop of the supporting path, capped at 1."""
+    return min(1.0, META_PATH_HOP_WEIGHT * max(len(best_path) - 1, 0))
+
+# ---------------------------------------------------------------------------
+# PoLo-style rules over drug / disease gene sets
+# ---------------------------------------------------------------------------
 
 def rule_pathway_overlap(drug_pathways, disease_pathways):
     """Boost if drug and disease share pathways."""
-    overlap = set(drug_pathways) & set(disease_pathways)
-    score = len(overlap) * 0.2   # weight is learnable later
+    overlap = _as_set(drug_pathways) & _as_set(disease_pathways)
+    score = len(overlap) * PATHWAY_OVERLAP_WEIGHT   # weight is learnable later
     explanation = f"Shared pathways: {', '.join(overlap)}" if overlap else "No shared pathways"
     return score, explanation
 
 
 def rule_target_in_disease_genes(drug_targets, disease_genes):
     """Boost score if drug targets appear in disease gene list."""
-    hits = set(drug_targets) & set(disease_genes)
-    score = len(hits) * 0.3
+    hits = _as_set(drug_targets) & _as_set(disease_genes)
+    score = len(hits) * TARGET_HIT_WEIGHT
     explanation = f"Drug hits disease genes: {', '.join(hits)}" if hits else "No direct target hits"
     return score, explanation
 
 
 def rule_antagonistic_gene_interactions(drug_targets, opposite_genes):
     """Penalty: Drug targets may worsen the disease."""
-    hits = set(drug_targets) & set(opposite_genes)
-    score = -0.4 * len(hits)
+    hits = _as_set(drug_targets) & _as_set(opposite_genes)
+    score = ANTAGONIST_WEIGHT * len(hits)
     explanation = f"Antagonistic gene interactions: {', '.join(hits)}" if hits else "No harmful gene interactions"
     return score, explanation
 
 
 def rule_bbb_requirement(drug_properties, disease):
     """Boost if drug crosses BBB for CNS diseases, penalize if not."""
-    needs_bbb = disease.lower() in ["alzheimer's", "parkinson's", "epilepsy"]
+    needs_bbb = disease.lower() in CNS_DISEASES
     bbb_ok = drug_properties.get("bbb", False)
 
     if needs_bbb and not bbb_ok:
-        return -0.5, "Disease requires BBB crossing but drug cannot cross"
+        return BBB_MISSING_PENALTY, "Disease requires BBB crossing but drug cannot cross"
     if needs_bbb and bbb_ok:
-        return 0.3, "Drug crosses BBB"
+        return BBB_BONUS, "Drug crosses BBB"
     return 0.0, "BBB not relevant"
 
 
 def rule_toxicity(drug_properties):
     """Penalty based on toxicity severity."""
     tox = drug_properties.get("toxicity", 0)
-    score = -0.2 * tox
+    score = TOXICITY_WEIGHT * tox
     explanation = f"Toxicity penalty: level {tox}"
     return score, explanation
 
@@ -52,6 +124,7 @@ def apply_all_rules(context):
     context = {
         'drug_targets': [...],
         'drug_pathways': [...],
+        'disease_pathways': [...],
         'drug_properties': {...},
         'disease': 'Alzheimers',
         'disease_genes': [...],
@@ -84,3 +157,64 @@ def apply_all_rules(context):
     explanations = [r[1] for r in rules]
 
     return total_score, explanations
+
+
+def _context_matrix(contexts, key, vocab):
+    """Boolean CSR (contexts x vocab) of the item lists under context[key]."""
+    lists = [c.get(key) or () for c in contexts]
+    lengths = np.fromiter((len(l) for l in lists), dtype=np.int64, count=len(lists))
+    flat = [x for l in lists for x in l]
+    cols = vocab.get_indexer(pd.Index(flat, dtype=object)) if flat else np.zeros(0, dtype=np.int64)
+    rows = np.repeat(np.arange(len(lists)), lengths)
+    m = sp.csr_matrix((np.ones(len(cols), dtype=np.int8), (rows, cols)), shape=(len(lists), len(vocab)))
+    m.sum_duplicates()
+    m.data[:] = 1
+    return m
+
+
+def apply_all_rules_batch(contexts, index=None, explain=False):
+    """
+    apply_all_rules for many contexts at once.
+
+    contexts is either a list of context dicts (same keys as apply_all_rules) or,
+    when a RuleIndex is given, a pair of arrays (drugs, diseases) whose gene sets
+    are looked up in the index. Set intersections run as sparse row products.
+
+    Returns (total_scores, components) where components is a frame with one
+    column per rule; with explain=True a list of explanation lists is returned
+    as a third element.
+    """
+    if index is not None:
+        drugs, diseases = contexts
+        components = index.apply_all_rules(drugs, diseases)
+        totals = components.pop("total").to_numpy()
+        if explain:
+            raise ValueError("explanations need context dicts; use symbolic_module.explain for indexed pairs")
+        return totals, components
+
+    contexts = list(contexts)
+    n = len(contexts)
+    genes = pd.Index(sorted({g for c in contexts for k in ("drug_targets", "disease_genes", "opposite_genes")
+                             for g in (c.get(k) or ())}))
+    pathways = pd.Index(sorted({p for c in contexts for k in ("drug_pathways", "disease_pathways")
+                                for p in (c.get(k) or ())}))
+    rows = np.arange(n)
+
+    def overlap(key_a, key_b, vocab):
+        return row_overlap(_context_matrix(contexts, key_a, vocab), _context_matrix(contexts, key_b, vocab), rows, rows)
+
+    bbb_ok = np.fromiter((bool(c["drug_properties"].get("bbb", False)) for c in contexts), dtype=bool, count=n)
+    needs = np.fromiter((c["disease"].lower() in CNS_DISEASES for c in contexts), dtype=bool, count=n)
+    tox = np.fromiter((c["drug_properties"].get("toxicity", 0) for c in contexts), dtype=float, count=n)
+
+    components = pd.DataFrame({
+        "pathway_overlap": PATHWAY_OVERLAP_WEIGHT * overlap("drug_pathways", "disease_pathways", pathways),
+        "target_in_disease_genes": TARGET_HIT_WEIGHT * overlap("drug_targets", "disease_genes", genes),
+        "antagonistic_gene_interactions": ANTAGONIST_WEIGHT * overlap("drug_targets", "opposite_genes", genes),
+        "bbb_requirement": np.where(needs & ~bbb_ok, BBB_MISSING_PENALTY, np.where(needs, BBB_BONUS, 0.0)),
+        "toxicity": TOXICITY_WEIGHT * tox,
+    }, columns=POLO_RULE_NAMES)
+    totals = components.sum(axis=1).to_numpy()
+    if explain:
+        return totals, components, [apply_all_rules(c)[1] for c in contexts]
+    return totals, components
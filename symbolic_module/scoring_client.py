@@ -0,0 +1,107 @@
+# symbolic_module/scoring_client.py
+"""
+Thin client for symbolic_module.scoring_service.
+
+Usage:
+python -m symbolic_module.scoring_client score --drug Compound::DB00331 --disease Disease::MESH:D000544
+python -m symbolic_module.scoring_client top_k --disease Disease::MESH:D000544 --k 50 --out top50.csv
+python -m symbolic_module.scoring_client batch --pairs pairs.csv --out scored.csv
+"""
+
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+from symbolic_module.scoring_service import DEFAULT_PORT
+
+DEFAULT_URL = f"http://127.0.0.1:{DEFAULT_PORT}"
+BATCH_SIZE = 10000
+
+
+class ScoringClient:
+    def __init__(self, url=DEFAULT_URL, timeout=60):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, params=None, payload=None):
+        url = self.url + path + ("?" + urllib.parse.urlencode(params) if params else "")
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            raise ValueError(json.loads(e.read() or b"{}").get("error", str(e))) from None
+
+    def health(self):
+        return self._request("/health")
+
+    def stats(self):
+        return self._request("/stats")
+
+    def score(self, drug, disease):
+        return self._request("/score", {"drug": drug, "disease": disease})
+
+    def score_batch(self, pairs, batch_size=BATCH_SIZE):
+        out = []
+        pairs = [list(p) for p in pairs]
+        for i in range(0, len(pairs), batch_size):
+            out.extend(self._request("/score_batch", payload={"pairs": pairs[i:i + batch_size]}))
+        return out
+
+    def top_k(self, drug=None, disease=None, k=50):
+        params = {"k": k}
+        if drug is not None:
+            params["drug"] = drug
+        if disease is not None:
+            params["disease"] = disease
+        return self._request("/top_k", params)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--url", default=DEFAULT_URL)
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("score")
+    s.add_argument("--drug", required=True)
+    s.add_argument("--disease", required=True)
+    t = sub.add_parser("top_k")
+    t.add_argument("--drug", default=None)
+    t.add_argument("--disease", default=None)
+    t.add_argument("--k", type=int, default=50)
+    t.add_argument("--out", default=None)
+    b = sub.add_parser("batch")
+    b.add_argument("--pairs", required=True, help="CSV with drug,disease columns")
+    b.add_argument("--out", required=True)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    client = ScoringClient(args.url)
+    try:
+        if args.cmd == "score":
+            print(json.dumps(client.score(args.drug, args.disease), indent=2))
+        elif args.cmd == "top_k":
+            df = pd.DataFrame(client.top_k(args.drug, args.disease, args.k))
+            if args.out:
+                df.to_csv(args.out, index=False)
+                print(f"Wrote {len(df)} rows to {args.out}")
+            else:
+                print(df.to_string(index=False))
+        else:
+            pairs = pd.read_csv(args.pairs, dtype=str)[["drug", "disease"]]
+            df = pd.DataFrame(client.score_batch(pairs.itertuples(index=False, name=None)))
+            df.to_csv(args.out, index=False)
+            print(f"Scored {len(df)} pairs → {args.out}")
+    except (urllib.error.URLError, ConnectionError) as e:
+        print(f"[WARN] Scoring service not reachable at {args.url}: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"[WARN] {e}", file=sys.stderr)
+        sys.exit(1)
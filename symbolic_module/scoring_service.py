@@ -0,0 +1,312 @@
+# symbolic_module/scoring_service.py
+"""
+Long-running local scoring service.
+
+Loads the entity embeddings, entity index, rule index and path index once and
+answers scoring queries over HTTP with the same fused score as
+aggregate_scores (alpha * neural + beta * best_path + gamma * symbolic, where
+neural is the cosine similarity of the drug and disease embeddings, as in
+generate_global_scores_drkg). Repeated queries are served from an LRU cache.
+
+Endpoints (JSON):
+  GET  /health
+  GET  /score?drug=...&disease=...
+  POST /score_batch        {"pairs": [["drug", "disease"], ...]}
+  GET  /top_k?disease=...&k=50      (or drug=... for the best diseases of a drug)
+  GET  /stats
+
+Usage:
+python -m symbolic_module.scoring_service \
+  --embeddings embeddings.store \
+  --paths artifacts/paths.jsonl \
+  --drugprops data/drug_properties.csv --pathway data/pathway_genes.csv \
+  --port 8765
+
+Query it with symbolic_module.scoring_client.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from symbolic_module import rules
+from symbolic_module.aggregate_scores import load_path_records, score_candidates
+from symbolic_module.batch_rules import BatchRuleEngine
+from symbolic_module.embedding_store import EmbeddingStore
+from symbolic_module.entity_dict import open_entity_dict
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 65536
+
+
+def load_entity_index(entity_dict_path, n_rows):
+    """Entity names aligned with embedding rows, from an entity dictionary (or legacy entity2id.json)."""
+    return pd.Index(open_entity_dict(entity_dict_path).names_by_id(n_rows))
+
+
+class LRUCache:
+    """Thread-safe size-bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
+class ScoringModel:
+    """Embeddings, rule and path indexes kept in memory for fast fused scoring."""
+
+    def __init__(self, embeddings, entities, engine, paths_df=None, alpha=0.4, beta=0.35, gamma=0.25,
+                 drug_prefix="Compound::", disease_prefix="Disease::", cache_size=DEFAULT_CACHE_SIZE, norms=None):
+        self.entities = entities
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True) if norms is None else \
+            np.asarray(norms, dtype=np.float32).reshape(-1, 1)
+        self.unit = (np.asarray(embeddings, dtype=np.float32) / np.where(norms > 0, norms, 1)).astype(np.float32)
+        self.engine = engine
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+
+        names = entities.astype(str)
+        self.drug_rows = np.flatnonzero(names.str.startswith(drug_prefix))
+        self.disease_rows = np.flatnonzero(names.str.startswith(disease_prefix))
+
+        paths_df = paths_df if paths_df is not None else pd.DataFrame(
+            columns=["drug", "disease", "best_path", "best_path_score"])
+        side = paths_df.drop_duplicates(["drug", "disease"], keep="first").reset_index(drop=True)
+        self._path_index = pd.MultiIndex.from_frame(side[["drug", "disease"]].astype(str))
+        # position -1 (no path record) picks the trailing empty path
+        self._paths = np.empty(len(side) + 1, dtype=object)
+        self._paths[:-1] = side["best_path"].to_numpy(dtype=object)
+        self._paths[-1] = []
+        self._path_scores = np.append(side["best_path_score"].to_numpy(dtype=float), 0.0)
+
+        # the rule engine keeps a per-drug cache, so scoring is serialized
+        self._lock = threading.Lock()
+        self.pair_cache = LRUCache(cache_size)
+        self.top_k_cache = LRUCache(max(64, cache_size // 256))
+
+    @classmethod
+    def from_files(cls, embeddings_npy, entity_dict_path, paths_jsonl=None, drugprops_csv=None, pathway_csv=None,
+                   workers=1, **kwargs):
+        if os.path.isdir(embeddings_npy):
+            # embedding store: only the Compound and Disease blocks are read
+            store = EmbeddingStore.load(embeddings_npy)
+            blocks = [store.block("Compound"), store.block("Disease")]
+            emb = np.concatenate([b.vectors for b in blocks])
+            entities = pd.Index(np.concatenate([b.names() for b in blocks]))
+            kwargs.setdefault("norms", np.concatenate([b.norms for b in blocks]))
+        else:
+            emb = np.load(embeddings_npy, mmap_mode="r")
+            entities = load_entity_index(entity_dict_path, len(emb))
+        engine = BatchRuleEngine(rules.load_drug_properties(drugprops_csv) if drugprops_csv else None,
+                                 rules.load_pathway_genes(pathway_csv) if pathway_csv else None)
+        paths_df = load_path_records(paths_jsonl, workers)[0] if paths_jsonl else None
+        return cls(emb, entities, engine, paths_df, **kwargs)
+
+    def neural_scores(self, drugs, diseases):
+        """Cosine similarity of the pairs' embeddings (0 for unknown entities)."""
+        a = self.entities.get_indexer(pd.Index(drugs, dtype=object))
+        b = self.entities.get_indexer(pd.Index(diseases, dtype=object))
+        ok = (a >= 0) & (b >= 0)
+        out = np.zeros(len(a))
+        if ok.any():
+            out[ok] = np.einsum("ij,ij->i", self.unit[a[ok]], self.unit[b[ok]])
+        return out
+
+    def score_pairs(self, drugs, diseases, neural=None):
+        """Aggregator output rows (unsorted) for aligned drug / disease arrays."""
+        drugs = np.asarray(drugs, dtype=object)
+        diseases = np.asarray(diseases, dtype=object)
+        pos = self._path_index.get_indexer(pd.MultiIndex.from_arrays([drugs, diseases])) if len(drugs) else \
+            np.zeros(0, dtype=np.int64)
+        joined = pd.DataFrame({
+            "drug": drugs,
+            "disease": diseases,
+            "neural_score": self.neural_scores(drugs, diseases) if neural is None else neural,
+            "best_path": self._paths[pos],
+            "best_path_score": self._path_scores[pos],
+        })
+        with self._lock:
+            return score_candidates(joined, self.engine, self.alpha, self.beta, self.gamma)
+
+    def score_pair(self, drug, disease):
+        return self.score_batch([(drug, disease)])[0]
+
+    def score_batch(self, pairs):
+        """Scores for many pairs; cached pairs are reused, the rest are scored in one pass."""
+        pairs = [(str(d), str(x)) for d, x in pairs]
+        found = [self.pair_cache.get(p) for p in pairs]
+        misses = list(dict.fromkeys(p for p, row in zip(pairs, found) if row is None))
+        if misses:
+            scored = dict(zip(misses, self.score_pairs([d for d, _ in misses], [x for _, x in misses])
+                              .to_dict("records")))
+            for key, row in scored.items():
+                self.pair_cache.put(key, row)
+            found = [row if row is not None else scored[p] for p, row in zip(pairs, found)]
+        return found
+
+    def top_k(self, drug=None, disease=None, k=50):
+        """Best k diseases for a drug, or best k drugs for a disease, by fused score."""
+        if (drug is None) == (disease is None):
+            raise ValueError("give exactly one of drug / disease")
+        key = (drug, disease, int(k))
+        rows = self.top_k_cache.get(key)
+        if rows is None:
+            rows = self._top_k(drug, disease, int(k))
+            self.top_k_cache.put(key, rows)
+        return rows
+
+    def _top_k(self, drug, disease, k):
+        anchor = drug if drug is not None else disease
+        i = self.entities.get_indexer([anchor])[0]
+        others = self.disease_rows if drug is not None else self.drug_rows
+        neural = self.unit[others] @ self.unit[i] if i >= 0 else np.zeros(len(others), dtype=np.float32)
+        names = np.asarray(self.entities[others], dtype=object)
+        fixed = np.full(len(others), anchor, dtype=object)
+        drugs, diseases = (fixed, names) if drug is not None else (names, fixed)
+        scored = self.score_pairs(drugs, diseases, neural.astype(float))
+        return scored.nlargest(k, "final_score", keep="first").to_dict("records")
+
+    def stats(self):
+        return {
+            "entities": len(self.entities),
+            "drugs": len(self.drug_rows),
+            "diseases": len(self.disease_rows),
+            "path_pairs": len(self._path_index),
+            "score_cache": self.pair_cache.info(),
+            "top_k_cache": self.top_k_cache.info(),
+        }
+
+
+def _json_safe(obj):
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def make_handler(model):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(_json_safe(payload)).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self, handler):
+            try:
+                self._send(200, handler())
+            except KeyError as e:
+                # q[name] of a query parameter the request did not give
+                self._send(400, {"error": f"missing parameter: {e.args[0]}"})
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                print(f"[WARN] {self.path}: {e}", file=sys.stderr)
+                self._send(500, {"error": str(e)})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if url.path == "/health":
+                self._send(200, {"status": "ok"})
+            elif url.path == "/score":
+                self._route(lambda: model.score_pair(q["drug"], q["disease"]))
+            elif url.path == "/top_k":
+                self._route(lambda: model.top_k(q.get("drug"), q.get("disease"), int(q.get("k", 50))))
+            elif url.path == "/stats":
+                self._send(200, model.stats())
+            else:
+                self._send(404, {"error": f"unknown endpoint {url.path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/score_batch":
+                self._send(404, {"error": f"unknown endpoint {url.path}"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+
+            def handle():
+                body = json.loads(self.rfile.read(length) or b"{}")
+                return model.score_batch(body["pairs"])
+            self._route(handle)
+
+        def log_message(self, fmt, *args):
+            # keep the console quiet; errors are reported in _route
+            pass
+
+    return Handler
+
+
+def serve(model, host="127.0.0.1", port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), make_handler(model))
+    print(f"Scoring service on http://{host}:{server.server_port} "
+          f"({len(model.drug_rows)} drugs, {len(model.disease_rows)} diseases)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--embeddings", default="embeddings.store", help="embedding store dir, or an embeddings .npy")
+    p.add_argument("--entity2id", default="entities.dict",
+                   help="entity dictionary dir or legacy entity2id.json (only with an embeddings .npy)")
+    p.add_argument("--paths", nargs="*", default=["artifacts/paths.jsonl"], help="paths.jsonl shards or globs")
+    p.add_argument("--drugprops", default="data/drug_properties.csv")
+    p.add_argument("--pathway", default="data/pathway_genes.csv")
+    p.add_argument("--alpha", type=float, default=0.4)
+    p.add_argument("--beta", type=float, default=0.35)
+    p.add_argument("--gamma", type=float, default=0.25)
+    p.add_argument("--workers", type=int, default=1, help="processes for JSONL parsing (0 = all cores)")
+    p.add_argument("--cache_size", type=int, default=DEFAULT_CACHE_SIZE)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    t0 = time.time()
+    model = ScoringModel.from_files(args.embeddings, args.entity2id, args.paths or None, args.drugprops,
+                                    args.pathway, args.workers, alpha=args.alpha, beta=args.beta,
+                                    gamma=args.gamma, cache_size=args.cache_size)
+    print(f"Loaded model in {time.time() - t0:.2f}s")
+    serve(model, args.host, args.port)
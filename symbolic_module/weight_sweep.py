@@ -0,0 +1,139 @@
+# symbolic_module/weight_sweep.py
+"""
+Evaluate many alpha/beta/gamma weight vectors against the stored component
+matrix at once.
+
+Scores for a block of weight vectors are one matrix product
+(n_pairs x 3) @ (3 x block). For every vector the sweep reports how stable the
+top-K is relative to the reference weights (overlap@K and Kendall tau over the
+reference top-K) and, when known treats edges are given, hits@K.
+
+Usage:
+python -m symbolic_module.weight_sweep \
+  --store artifacts/final_ranked_candidates_components.parquet \
+  --grid_step 0.05 --k 100 \
+  --known_treats data/known_treats.csv \
+  --out artifacts/weight_sweep.csv
+"""
+
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from symbolic_module.component_store import ComponentStore
+
+# memory allowed for one block of (n_pairs x block) float32 scores
+BLOCK_BYTES = 512 * 1024 * 1024
+
+
+def weight_grid(step):
+    """All (alpha, beta, gamma) >= 0 on a simplex grid with the given step."""
+    n = int(round(1.0 / step))
+    ws = [(a, b, n - a - b) for a in range(n + 1) for b in range(n + 1 - a)]
+    return np.array(ws, dtype=np.float32) / n
+
+
+def weight_sample(count, seed=0):
+    """count weight vectors drawn uniformly from the simplex."""
+    return np.random.default_rng(seed).dirichlet(np.ones(3), size=count).astype(np.float32)
+
+
+def known_pair_mask(store, known_csv):
+    """Boolean mask over store rows that are known treats edges (drug, disease columns)."""
+    known = pd.read_csv(known_csv, dtype=str)[["drug", "disease"]].drop_duplicates()
+    keys = pd.MultiIndex.from_arrays([store.table["drug"].to_pandas().astype(str),
+                                      store.table["disease"].to_pandas().astype(str)])
+    return keys.isin(pd.MultiIndex.from_frame(known))
+
+
+def top_k_block(S, k):
+    """Column-wise top-k row positions of S, best first: shape (k, n_cols)."""
+    k = min(k, S.shape[0])
+    part = np.argpartition(-S, k - 1, axis=0)[:k] if k < S.shape[0] else np.tile(
+        np.arange(S.shape[0])[:, None], (1, S.shape[1]))
+    order = np.argsort(-np.take_along_axis(S, part, axis=0), axis=0, kind="stable")
+    return np.take_along_axis(part, order, axis=0)
+
+
+def kendall_tau_block(ref_scores, S_ref_rows):
+    """
+    Kendall tau-a between the reference scores of the reference top-K and each
+    column of S_ref_rows (the same K rows scored under each weight vector).
+    """
+    k = len(ref_scores)
+    if k < 2:
+        return np.ones(S_ref_rows.shape[1])
+    iu = np.triu_indices(k, 1)
+    ref_sign = np.sign(ref_scores[:, None] - ref_scores[None, :])[iu][:, None]
+    # k*k*step pairwise signs at a time
+    step = max(1, (64 * 1024 * 1024) // (4 * k * k))
+    tau = np.empty(S_ref_rows.shape[1])
+    for j in range(0, S_ref_rows.shape[1], step):
+        S = S_ref_rows[:, j:j + step]
+        diff = np.sign(S[:, None, :] - S[None, :, :])[iu]
+        tau[j:j + step] = (ref_sign * diff).sum(axis=0) / len(iu[0])
+    return tau
+
+
+def sweep(store, weights, k=100, reference=(0.4, 0.35, 0.25), positives=None):
+    C = store.components()
+    n = len(C)
+    if n == 0:
+        raise ValueError(f"component store {store.path} is empty")
+    ref_scores = C @ np.asarray(reference, dtype=np.float32)
+    ref_top = top_k_block(ref_scores[:, None], k)[:, 0]
+    in_ref = np.zeros(n, dtype=bool)
+    in_ref[ref_top] = True
+    n_pos = int(positives.sum()) if positives is not None else 0
+
+    block = max(1, BLOCK_BYTES // (4 * n))
+    out = []
+    for i in range(0, len(weights), block):
+        W = weights[i:i + block]
+        S = C @ W.T                                   # (n, block)
+        top = top_k_block(S, k)                       # (k, block)
+        row = {
+            "alpha": W[:, 0], "beta": W[:, 1], "gamma": W[:, 2],
+            "overlap_at_k": in_ref[top].sum(axis=0) / len(ref_top),
+            "kendall_tau": kendall_tau_block(ref_scores[ref_top], S[ref_top]),
+        }
+        if positives is not None:
+            hits = positives[top].sum(axis=0)
+            row["hits_at_k"] = hits
+            row["recall_at_k"] = hits / n_pos if n_pos else 0.0
+        out.append(pd.DataFrame(row))
+    res = pd.concat(out, ignore_index=True)
+    sort_cols = ["hits_at_k", "overlap_at_k"] if positives is not None else ["overlap_at_k", "kendall_tau"]
+    return res.sort_values(sort_cols, ascending=False, kind="stable").reset_index(drop=True)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--store", default="artifacts/final_ranked_candidates_components.parquet")
+    p.add_argument("--out", default="artifacts/weight_sweep.csv")
+    p.add_argument("--grid_step", type=float, default=0.05, help="simplex grid spacing")
+    p.add_argument("--random", type=int, default=0, help="sample this many weight vectors instead of a grid")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--k", type=int, default=100)
+    p.add_argument("--reference", type=float, nargs=3, default=[0.4, 0.35, 0.25],
+                   metavar=("ALPHA", "BETA", "GAMMA"), help="weights the stability metrics compare against")
+    p.add_argument("--known_treats", default=None, help="held-out drug,disease CSV for hits@K")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    t0 = time.time()
+    store = ComponentStore(args.store)
+    weights = weight_sample(args.random, args.seed) if args.random else weight_grid(args.grid_step)
+    positives = None
+    if args.known_treats:
+        positives = known_pair_mask(store, args.known_treats)
+        if not positives.any():
+            print(f"[WARN] none of the pairs in {args.known_treats} are in the store", file=sys.stderr)
+    res = sweep(store, weights, args.k, args.reference, positives)
+    res.to_csv(args.out, index=False)
+    print(f"Evaluated {len(weights)} weight vectors over {len(store)} pairs in {time.time() - t0:.2f}s → {args.out}")
+    print(res.head(10).to_string(index=False))
@@ -0,0 +1,72 @@
+"""Open Targets client against a local stub GraphQL server (no network)."""
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+from http_fetch import FetchError, KVCache, PooledFetcher, cache_key  # noqa: E402
+from opentargets_client import ASSOCIATIONS_QUERY, fetch_gene_associations  # noqa: E402
+
+ERROR_BODY = {"errors": [{"message": "upstream timeout"}], "data": None}
+OK_BODY = {"data": {"target": {"id": "ENSG1", "approvedSymbol": "G1", "associations": {
+    "count": 1, "rows": [{"disease": {"id": "EFO_1", "name": "disease one"}, "score": 0.5}]}}}}
+
+
+@pytest.fixture
+def stub_server():
+    """GraphQL stub that answers with the queued bodies, then OK_BODY; records every call."""
+    calls, queue = [], []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            calls.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            body = json.dumps(queue.pop(0) if queue else OK_BODY).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/graphql", calls, queue
+    server.shutdown()
+    server.server_close()
+
+
+def test_graphql_error_is_not_cached(stub_server, tmp_path):
+    url, calls, queue = stub_server
+    queue.append(ERROR_BODY)
+    cache = KVCache(tmp_path / "cache.sqlite")
+    fetcher = PooledFetcher(rate=100, max_retries=0, cache=cache, namespace="opentargets")
+
+    with pytest.raises(FetchError, match="upstream timeout"):
+        fetch_gene_associations(fetcher, "ENSG1", url=url)
+    # the rerun asks the server again instead of replaying the error
+    assert fetch_gene_associations(fetcher, "ENSG1", url=url) == [("EFO_1", "disease one", 0.5)]
+    assert fetch_gene_associations(fetcher, "ENSG1", url=url) == [("EFO_1", "disease one", 0.5)]
+    assert len(calls) == 2
+    assert calls[0]["variables"] == {"ensg": "ENSG1", "size": 50}
+    cache.close()
+
+
+def test_cached_error_body_is_refetched(stub_server, tmp_path):
+    url, calls, _ = stub_server
+    cache = KVCache(tmp_path / "cache.sqlite")
+    # an error body left in the cache by an older run
+    payload = {"query": ASSOCIATIONS_QUERY, "variables": {"ensg": "ENSG1", "size": 50}}
+    cache.put("opentargets", cache_key("POST", url, None, payload), ERROR_BODY)
+    fetcher = PooledFetcher(rate=100, max_retries=0, cache=cache, namespace="opentargets")
+
+    assert fetch_gene_associations(fetcher, "ENSG1", url=url) == [("EFO_1", "disease one", 0.5)]
+    assert len(calls) == 1
+    assert fetch_gene_associations(fetcher, "ENSG1", url=url) == [("EFO_1", "disease one", 0.5)]
+    assert len(calls) == 1
+    cache.close()